@@ -1,10 +1,58 @@
-import logging
 from collections import UserDict
-from typing import Any, Hashable, Iterable, List, Optional, Tuple
+from collections.abc import Mapping
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from dict_tools.data_models import CommentedKey, d_keys
 from dict_tools.utils import prettyType, simpleType
 
+# the number of replaced keys named in the warning of a bulk update
+_WARN_EXAMPLES = 5
+
+_CD = TypeVar("_CD", bound="CommentedDict")
+
+
+def _warning(msg: str, *args: Any) -> None:
+    """
+    Log a warning
+    :param msg: the message format string
+    :type msg: str
+    :param args: the arguments of the message
+    :type args: Any
+    :return: void
+    :rtype: void
+    """
+    import logging
+
+    logging.warning(msg, *args)
+
+
+def _warn_replaced(replaced: List[Tuple[Hashable, Hashable]]) -> None:
+    """
+    Log one warning for the keys replaced by a bulk update
+    :param replaced: (old key, new key) pairs
+    :type replaced: list
+    :return: void
+    :rtype: void
+    """
+    if replaced:
+        _warning(
+            "%d keys were replaced by keys with the same key attribute: %s",
+            len(replaced),
+            ", ".join(f"{old!r} -> {new!r}" for old, new in replaced[:_WARN_EXAMPLES])
+            + (", ..." if len(replaced) > _WARN_EXAMPLES else ""),
+        )
+
 
 class CommentedDict(UserDict):
     """
@@ -48,7 +96,206 @@ class CommentedDict(UserDict):
 
     def __init__(self, *args: Iterable[Tuple[str, Any]], **kwargs: Any):
         self.comment = kwargs.pop("comment", "").strip()
-        super().__init__(*args, **kwargs)
+        # index of inner key -> CommentedKey so CommentedKeys can be resolved without scanning every key
+        self._commented_keys: Dict[Hashable, CommentedKey] = {}
+        self.data = {}
+        if len(args) > 1:
+            raise TypeError(f"expected at most 1 positional argument, got {len(args)}")
+        self.update(*args, **kwargs)
+
+    @classmethod
+    def from_pairs(
+        cls: Type[_CD], pairs: Iterable[Tuple[Hashable, Any]], comment: str = ""
+    ) -> _CD:
+        """
+        Create a CommentedDict from (key, value) pairs in one pass
+        :param pairs: the items, which may have CommentedKeys
+        :type pairs: iterable of tuples
+        :param comment: the comment of the dictionary
+        :type comment: str
+        :return: the dictionary
+        :rtype: CommentedDict
+        """
+        d = cls(comment=comment)
+        d._set_many(pairs)
+        return d
+
+    @classmethod
+    def fromkeys(cls: Type[_CD], iterable: Iterable[Hashable], value: Any = None) -> _CD:  # type: ignore[override]
+        """
+        Create a CommentedDict with keys from an iterable, all with the same value
+        :param iterable: the keys, which may be CommentedKeys
+        :type iterable: iterable
+        :param value: the value of every key
+        :type value: Any
+        :return: the dictionary
+        :rtype: CommentedDict
+        """
+        d = cls()
+        d._set_many((key, value) for key in iterable)
+        return d
+
+    def dump(self, target: Any) -> None:
+        """
+        Save the dictionary with its comments in a compact file, which can be read with load or MappedCommentedDict.
+        See dict_tools.storage.dump
+        :param target: path of the file or a binary file-like object which can seek
+        :type target: str, os.PathLike or file-like object
+        :return: void
+        :rtype: void
+        """
+        from dict_tools.storage import dump
+
+        dump(self, target)
+
+    @classmethod
+    def load(cls: Type[_CD], source: Any) -> _CD:
+        """
+        Load a dictionary saved by dump, with its comments
+        :param source: path of the file or a binary file-like object
+        :type source: str, os.PathLike or file-like object
+        :return: the dictionary
+        :rtype: CommentedDict
+        """
+        from dict_tools.storage import load
+
+        return load(source, cls)  # type: ignore[return-value]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Update the dictionary from a mapping or an iterable of (key, value) pairs, and keyword arguments
+
+        The items are added as if each was set in turn, so a plain key replaces a CommentedKey with the same key
+        attribute and vice versa, but the collisions of the whole batch are resolved in one pass and at most one
+        warning is logged.
+        :return: void
+        :rtype: void
+        """
+        if len(args) > 1:
+            raise TypeError(
+                f"update expected at most 1 positional argument, got {len(args)}"
+            )
+        if args:
+            other = args[0]
+            if isinstance(other, CommentedDict):
+                self._set_many(other.commented_items())
+            elif isinstance(other, dict):
+                self._set_many(other.items())
+            elif isinstance(other, Mapping) or hasattr(other, "keys"):
+                self._set_many((key, other[key]) for key in other.keys())
+            else:
+                self._set_many(other)
+        if kwargs:
+            self._set_many(kwargs.items())
+
+    def _set_many(self, pairs: Iterable[Tuple[Hashable, Any]]) -> None:
+        """
+        Set many items, with the same result as setting each in turn with __setitem__
+
+        Each key has a slot - the key attribute of a CommentedKey or the plain key itself - which holds at most one
+        key. Setting a key moves its slot to the end of the dictionary, unless a plain key is set again. The new
+        position and key of each slot are worked out for the whole batch, then the displaced keys are removed and the
+        underlying dict is updated at once.
+        :param pairs: the items
+        :type pairs: iterable of tuples
+        :return: void
+        :rtype: void
+        """
+        data = self.data
+        commented_keys = self._commented_keys
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+        commented = [key for key, _ in pairs if isinstance(key, CommentedKey)]
+        if not commented and not commented_keys:
+            data.update(pairs)
+            return
+        slots = [key.key if isinstance(key, CommentedKey) else key for key, _ in pairs]
+        if (
+            len(set(slots)) == len(slots)
+            and data.keys().isdisjoint(slots)
+            and commented_keys.keys().isdisjoint(slots)
+        ):
+            # no key collides with another, so every key is added at the end
+            data.update(pairs)
+            for new in commented:
+                commented_keys[new.key] = new
+            return
+
+        # slot -> (key, value) of the slots which are new or have moved, in their new order
+        moved: Dict[Hashable, Tuple[Hashable, Any]] = {}
+        # new values of the plain keys which keep their position
+        kept: Dict[Hashable, Any] = {}
+        replaced: List[Tuple[Hashable, Hashable]] = []
+        for key, value in pairs:
+            if isinstance(key, CommentedKey):
+                slot = key.key
+                previous = moved.pop(slot, None)
+                if previous is not None:
+                    holder: Optional[Hashable] = previous[0]
+                elif slot in data:
+                    holder = slot
+                    kept.pop(slot, None)
+                else:
+                    holder = commented_keys.get(slot)
+                if holder is not None and not isinstance(holder, CommentedKey):
+                    replaced.append((holder, key))
+                moved[slot] = (key, value)
+                continue
+            previous = moved.get(key)
+            if previous is None:
+                if key in data:
+                    kept[key] = value
+                    continue
+                holder = commented_keys.get(key)
+                if holder is not None:
+                    replaced.append((holder, key))
+                moved[key] = (key, value)
+            elif isinstance(previous[0], CommentedKey):
+                replaced.append((previous[0], key))
+                del moved[key]
+                moved[key] = (key, value)
+            else:
+                # setting an equal plain key again keeps the first key object, as in a dict
+                moved[key] = (previous[0], value)
+
+        for slot in moved:
+            if slot in data:
+                del data[slot]
+            else:
+                ck = commented_keys.pop(slot, None)
+                if ck is not None:
+                    del data[ck]
+        data.update(kept)
+        data.update(moved.values())
+        for slot, (key, _) in moved.items():
+            if isinstance(key, CommentedKey):
+                commented_keys[slot] = key
+        _warn_replaced(replaced)
+
+    def commented_items(self) -> Iterable[Tuple[Hashable, Any]]:
+        """
+        Get the items of the dictionary, with CommentedKeys for the keys which have comments
+        :return: the (key, value) pairs
+        :rtype: iterable of tuples
+        """
+        return self.data.items()
+
+    def commented_key(self, key: Hashable) -> Hashable:
+        """
+        Get a key of the dictionary with its comment
+        :param key: the key - if a CommentedKey then its key attribute is used
+        :type key: Hashable
+        :return: the CommentedKey whose key attribute is key, or key if it has no comment
+        :rtype: Hashable
+        :raises KeyError
+        """
+        inner = key.key if isinstance(key, CommentedKey) else key
+        commentedKey = self._commented_keys.get(inner)
+        if commentedKey is not None:
+            return commentedKey
+        if inner in self.data:
+            return inner
+        raise KeyError(key)
 
     def __repr__(self) -> str:
         dict_repr = super().__repr__()
@@ -66,57 +313,86 @@ class CommentedDict(UserDict):
         """
         if key in self.data:
             return self.data[key]
-        if isinstance(key, CommentedKey):
-            commentedKey = self.__checkCommentedKeys(key.key)
-        else:
-            commentedKey = self.__checkCommentedKeys(key)
+        commentedKey = self.__checkCommentedKeys(key)
         if commentedKey is not None:
             return self.data[commentedKey]
         raise KeyError(key)
 
     def __setitem__(self, key: Hashable, value: Any) -> None:
-        # check for any CommentedKeys in the dictionary
         if isinstance(key, CommentedKey):
-            v = self.data.get(key.key, None)
-            if v is not None:
-                logging.warning(
+            if key.key in self.data:
+                _warning(
                     "Popping %s and replacing with CommentedKey with key %s",
                     key.key,
                     key,
                 )
                 _ = self.data.pop(key.key)
             else:
-                ck = self.__checkCommentedKeys(key.key)
+                ck = self._commented_keys.pop(key.key, None)
                 if ck is not None:
                     _ = self.data.pop(ck)
-        elif self.__anyCommentedKey():
+            self._commented_keys[key.key] = key
+        elif self._commented_keys:
             # check if any of the CommentedKeys have key attribute equal to key
-            ck = self.__checkCommentedKeys(key)
+            ck = self._commented_keys.pop(key, None)
             if ck is not None:
-                logging.warning(
+                _warning(
                     "CommentedKey with key = %s will be replaced with %s", key, key
                 )
                 _ = self.data.pop(ck)
-        else:
-            pass
         self.data[key] = value
 
+    def __delitem__(self, key: Hashable) -> None:
+        if key in self.data:
+            del self.data[key]
+            if isinstance(key, CommentedKey):
+                _ = self._commented_keys.pop(key.key, None)
+            return
+        commentedKey = self.__checkCommentedKeys(key)
+        if commentedKey is None:
+            raise KeyError(key)
+        del self.data[commentedKey]
+        del self._commented_keys[commentedKey.key]
+
+    def __ior__(self, other: Any) -> "CommentedDict":  # type: ignore[misc]
+        self.update(other)
+        return self
+
+    def __copy__(self) -> "CommentedDict":
+        inst = self.__class__.__new__(self.__class__)
+        inst.__dict__.update(self.__dict__)
+        inst.__dict__["data"] = self.data.copy()
+        inst.__dict__["_commented_keys"] = self._commented_keys.copy()
+        return inst
+
+    def copy(self) -> "CommentedDict":
+        """
+        Return a shallow copy of the dictionary, including the comment
+        :return: the copy
+        :rtype: CommentedDict
+        """
+        return self.__copy__()
+
+    def clear(self) -> None:
+        """
+        Remove all items from the dictionary
+        :return: void
+        :rtype: void
+        """
+        self.data.clear()
+        self._commented_keys.clear()
+
     def __checkCommentedKeys(self, key: Hashable) -> Optional[CommentedKey]:
         """
         Check to see if there is a CommentedKey in the dictionary whereby the key attribute equals the input key
-        :param key: input key
+        :param key: input key - if a CommentedKey then its key attribute is used
         :type key: Hashable
         :return: the CommentedKey if found else None
         :rtype: CommentedKey or None
         """
-        match = [k for k in self.__getCommentedKeys() if k.key == key]
-        if len(match) == 0:
-            return None
-        if len(match) == 1:
-            return match[0]
-        raise ValueError(
-            "Cannot have two CommentedKeys with the same key in the same dictionary!"
-        )
+        if isinstance(key, CommentedKey):
+            key = key.key
+        return self._commented_keys.get(key, None)
 
     def set_comment(self, comment: str) -> None:
         """
@@ -153,20 +429,157 @@ class CommentedDict(UserDict):
         """
         return d_keys(self)
 
-    def __anyCommentedKey(self) -> bool:
-        """
-        Determine if any keys of the dictionary are CommentedKeys
-        :return: True if a CommentedKey is found
-        :rtype: bool
-        """
-        return CommentedKey in self.keys_types()
 
-    def __getCommentedKeys(self) -> List[CommentedKey]:
-        """
-        Return the CommentedKeys of the dictionary
-        :return: commented keys
-        :rtype: list of commented keys
-        """
+class CompactCommentedDict(CommentedDict):
+    """
+    CommentedDict which stores the comments of its keys in a side table rather than in CommentedKeys
+
+    The keys of data are the plain keys and the comments are kept in a dictionary of key -> comment, so a commented
+    item takes no more memory than a plain item and a comment. The dictionary behaves as a CommentedDict: iterating it
+    gives CommentedKeys for the keys which have comments and items can be got, set or deleted with either form of key.
+    The CommentedKeys are created when they are needed, which makes iterating the dictionary slower.
+    """
+
+    def __init__(self, *args: Iterable[Tuple[str, Any]], **kwargs: Any):
+        # key -> comment of the keys which are CommentedKeys
+        self._comments: Dict[Hashable, Optional[str]] = {}
+        super().__init__(*args, **kwargs)
+
+    def commented_items(self) -> Iterable[Tuple[Hashable, Any]]:
+        if not self._comments:
+            return self.data.items()
+        comments = self._comments
         return [
-            x for x in d_keys(self, removeComments=False) if isinstance(x, CommentedKey)
+            (CommentedKey(key, comments[key]) if key in comments else key, value)
+            for key, value in self.data.items()
         ]
+
+    def commented_key(self, key: Hashable) -> Hashable:
+        inner = key.key if isinstance(key, CommentedKey) else key
+        if inner in self._comments:
+            return CommentedKey(inner, self._comments[inner])
+        if inner in self.data:
+            return inner
+        raise KeyError(key)
+
+    def __repr__(self) -> str:
+        comments = [f"# {line}" for line in self.comment.splitlines()]
+        return "\n".join(comments + [repr(dict(self.commented_items()))])
+
+    def __iter__(self) -> Iterator[Hashable]:
+        comments = self._comments
+        if not comments:
+            return iter(self.data)
+        return (
+            CommentedKey(key, comments[key]) if key in comments else key
+            for key in self.data
+        )
+
+    def __contains__(self, key: object) -> bool:
+        # as in CommentedDict, a CommentedKey is only in the dictionary with its comment and a plain key without one
+        if isinstance(key, CommentedKey):
+            return key.key in self._comments and self._comments[key.key] == key.comment
+        return key in self.data and key not in self._comments
+
+    def __getitem__(self, key: Hashable) -> Any:
+        if isinstance(key, CommentedKey):
+            if key.key not in self._comments:
+                raise KeyError(key)
+            return self.data[key.key]
+        return self.data[key]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        data = self.data
+        if isinstance(key, CommentedKey):
+            inner = key.key
+            if inner in data:
+                if inner not in self._comments:
+                    _warning(
+                        "Popping %s and replacing with CommentedKey with key %s",
+                        inner,
+                        key,
+                    )
+                # setting a CommentedKey moves the key to the end, as in CommentedDict
+                del data[inner]
+            self._comments[inner] = key.comment
+            data[inner] = value
+            return
+        if key in self._comments:
+            _warning("CommentedKey with key = %s will be replaced with %s", key, key)
+            del self._comments[key]
+            del data[key]
+        data[key] = value
+
+    def __delitem__(self, key: Hashable) -> None:
+        if isinstance(key, CommentedKey):
+            if key.key not in self._comments:
+                raise KeyError(key)
+            del self._comments[key.key]
+            del self.data[key.key]
+            return
+        del self.data[key]
+        self._comments.pop(key, None)
+
+    def __or__(self, other: Any) -> "CompactCommentedDict":
+        if not isinstance(other, (UserDict, dict)):
+            return NotImplemented
+        merged = dict(self.commented_items())
+        merged.update(
+            other.commented_items()
+            if isinstance(other, CommentedDict)
+            else other.items()
+        )
+        return self.__class__.from_pairs(merged.items())
+
+    def __ror__(self, other: Any) -> "CompactCommentedDict":
+        if not isinstance(other, (UserDict, dict)):
+            return NotImplemented
+        merged = dict(
+            other.commented_items()
+            if isinstance(other, CommentedDict)
+            else other.items()
+        )
+        merged.update(self.commented_items())
+        return self.__class__.from_pairs(merged.items())
+
+    def __copy__(self) -> "CompactCommentedDict":
+        inst = super().__copy__()
+        inst.__dict__["_comments"] = self._comments.copy()
+        return inst  # type: ignore[return-value]
+
+    def clear(self) -> None:
+        super().clear()
+        self._comments.clear()
+
+    def _set_many(self, pairs: Iterable[Tuple[Hashable, Any]]) -> None:
+        """
+        Set many items, with the same result as setting each in turn with __setitem__ but at most one warning. The
+        keys are plain keys, so the items are set directly
+        :param pairs: the items
+        :type pairs: iterable of tuples
+        :return: void
+        :rtype: void
+        """
+        data = self.data
+        comments = self._comments
+        if not isinstance(pairs, (list, tuple)):
+            pairs = list(pairs)
+        if not comments and not any(isinstance(key, CommentedKey) for key, _ in pairs):
+            data.update(pairs)
+            return
+        replaced: List[Tuple[Hashable, Hashable]] = []
+        for key, value in pairs:
+            if isinstance(key, CommentedKey):
+                inner = key.key
+                if inner in data:
+                    if inner not in comments:
+                        replaced.append((inner, key))
+                    del data[inner]
+                comments[inner] = key.comment
+                data[inner] = value
+            else:
+                if key in comments:
+                    replaced.append((CommentedKey(key, comments.pop(key)), key))
+                    del data[key]
+                data[key] = value
+        _warn_replaced(replaced)
@@ -0,0 +1,81 @@
+"""Tools for understanding the structure of dictionaries
+
+The public classes and functions below are imported from their modules when they are first used, so that importing
+the package stays fast. For the same reason, standard library modules which are slow to import, e.g. logging,
+hashlib and random, are imported by the functions which use them. The CommentedDict class is imported from the
+dict_tools.CommentedDict module.
+"""
+from typing import TYPE_CHECKING, Any, List
+
+# name -> module which defines it
+_LAZY = {
+    "CommentedKey": "dict_tools.data_models",
+    "CommentedValue": "dict_tools.data_models",
+    "DictionaryParser": "dict_tools.structure",
+    "IncrementalAnalysis": "dict_tools.structure",
+    "MappedCommentedDict": "dict_tools.storage",
+    "ParserObserver": "dict_tools.observers",
+    "PathIndex": "dict_tools.paths",
+    "ProfileObserver": "dict_tools.observers",
+    "SchemaNode": "dict_tools.schema",
+    "SchemaRenderer": "dict_tools.schema",
+    "TextRenderer": "dict_tools.schema",
+    "getSchema_json": "dict_tools.stream",
+    "getSchema_jsonl": "dict_tools.stream",
+    "getStructure_json": "dict_tools.stream",
+    "iter_structure_json": "dict_tools.stream",
+}
+
+__all__ = [
+    "CommentedKey",
+    "CommentedValue",
+    "DictionaryParser",
+    "IncrementalAnalysis",
+    "MappedCommentedDict",
+    "ParserObserver",
+    "PathIndex",
+    "ProfileObserver",
+    "SchemaNode",
+    "SchemaRenderer",
+    "TextRenderer",
+    "getSchema_json",
+    "getSchema_jsonl",
+    "getStructure_json",
+    "iter_structure_json",
+]
+
+if TYPE_CHECKING:
+    from dict_tools.data_models import CommentedKey, CommentedValue
+    from dict_tools.observers import ParserObserver, ProfileObserver
+    from dict_tools.paths import PathIndex
+    from dict_tools.schema import SchemaNode, SchemaRenderer, TextRenderer
+    from dict_tools.storage import MappedCommentedDict
+    from dict_tools.stream import (
+        getSchema_json,
+        getSchema_jsonl,
+        getStructure_json,
+        iter_structure_json,
+    )
+    from dict_tools.structure import DictionaryParser, IncrementalAnalysis
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Import a public class or function from its module the first time it is used
+    :param name: the name of the class or function
+    :type name: str
+    :return: the class or function
+    :rtype: Any
+    """
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
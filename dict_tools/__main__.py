@@ -0,0 +1,6 @@
+"""Run the command line interface with python -m dict_tools"""
+import sys
+
+from dict_tools.cli import main
+
+sys.exit(main())
@@ -0,0 +1,187 @@
+"""Command line interface which summarises the structure of JSON and JSON Lines documents
+
+    dict-tools [options] [FILE ...]
+    python -m dict_tools [options] [FILE ...]
+
+The parser modules are only imported once the arguments have been parsed, to keep the start up time close to that of
+the interpreter.
+"""
+import argparse
+import sys
+import time
+from typing import IO, TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from dict_tools.schema import SchemaNode
+    from dict_tools.structure import DictionaryParser
+
+# file extensions which are read as JSON Lines without the --lines flag
+_JSON_LINES_SUFFIXES = (".jsonl", ".ndjson")
+
+
+def _argument_parser() -> argparse.ArgumentParser:
+    """
+    Create the parser of the command line arguments
+    :return: the argument parser
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="dict-tools",
+        description="Summarise the structure of JSON or JSON Lines documents.",
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        default=["-"],
+        metavar="FILE",
+        help="JSON or JSON Lines files to summarise. Read from stdin if no file or - is given",
+    )
+    parser.add_argument(
+        "-l",
+        "--lines",
+        action="store_true",
+        help="read the files as JSON Lines. Files ending in .jsonl or .ndjson are always read as JSON Lines",
+    )
+    parser.add_argument(
+        "-e",
+        "--show-examples",
+        action="store_true",
+        help="show an example element of each list (showExamples)",
+    )
+    parser.add_argument(
+        "-v",
+        "--show-variables",
+        action="store_true",
+        help="show example values next to their types (showVariables). The whole document is loaded into memory",
+    )
+    parser.add_argument(
+        "-n",
+        "--n-examples",
+        type=int,
+        default=3,
+        help="number of example values to show (nExamples)",
+    )
+    parser.add_argument(
+        "-w",
+        "--where-examples",
+        choices=("random", "first", "last"),
+        default="random",
+        help="which values to show as examples (whereExamples)",
+    )
+    parser.add_argument(
+        "-c",
+        "--type-counts",
+        action="store_true",
+        help="show how many elements of each list have each type (typeCounts)",
+    )
+    parser.add_argument(
+        "-t", "--time", action="store_true", help="report the time taken to stderr"
+    )
+    return parser
+
+
+def _describe(fp: IO[bytes], lines: bool, parser: "DictionaryParser") -> "SchemaNode":
+    """
+    Analyse the structure of a document. The document is streamed unless values are shown, which needs the whole
+    document in memory
+    :param fp: the document, opened in binary mode
+    :type fp: IO[bytes]
+    :param lines: whether the document is JSON Lines
+    :type lines: bool
+    :param parser: the parser whose options are used
+    :type parser: DictionaryParser
+    :return: the root node of the schema tree
+    :rtype: SchemaNode
+    """
+    if not parser.showVariables:
+        from dict_tools.stream import getSchema_json, getSchema_jsonl
+
+        return getSchema_jsonl(fp, parser) if lines else getSchema_json(fp, parser)
+
+    import json
+
+    if lines:
+        return parser._analyse_list([json.loads(line) for line in fp if line.strip()])
+    document = json.load(fp)
+    if isinstance(document, dict):
+        return parser.getSchema(document)
+    if isinstance(document, list):
+        return parser._analyse_list(document)
+    raise TypeError(
+        "Only JSON documents which are an object or an array can be described"
+    )
+
+
+def _summarise(
+    name: str, lines: bool, parser: "DictionaryParser", out: IO[str]
+) -> Tuple[float, float]:
+    """
+    Write the structure of a document to out
+    :param name: path to the document or - for stdin
+    :type name: str
+    :param lines: whether the document is JSON Lines
+    :type lines: bool
+    :param parser: the parser whose options and renderer are used
+    :type parser: DictionaryParser
+    :param out: where to write the structure
+    :type out: IO[str]
+    :return: the time taken to analyse and to render the document in seconds
+    :rtype: tuple
+    """
+    start = time.perf_counter()
+    lines = lines or name.endswith(_JSON_LINES_SUFFIXES)
+    if name == "-":
+        schema = _describe(sys.stdin.buffer, lines, parser)
+    else:
+        with open(name, "rb") as fp:
+            schema = _describe(fp, lines, parser)
+    analysed = time.perf_counter()
+    chunk = ""
+    for chunk in parser.renderer.iter_render(schema):
+        out.write(chunk)
+    if not chunk.endswith("\n"):
+        out.write("\n")
+    return analysed - start, time.perf_counter() - analysed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command line interface
+    :param argv: the command line arguments, without the program name. Defaults to sys.argv[1:]
+    :type argv: list of str or None
+    :return: the exit status
+    :rtype: int
+    """
+    start = time.perf_counter()
+    args = _argument_parser().parse_args(argv)
+
+    from dict_tools.structure import DictionaryParser
+
+    parser = DictionaryParser(
+        showExamples=args.show_examples,
+        showVariables=args.show_variables,
+        nExamples=args.n_examples,
+        whereExamples=args.where_examples,
+        typeCounts=args.type_counts,
+    )
+    imported = time.perf_counter()
+    status = 0
+    for name in args.files:
+        if len(args.files) > 1:
+            sys.stdout.write(f"==> {name} <==\n")
+        try:
+            analysis, rendering = _summarise(name, args.lines, parser, sys.stdout)
+        except (OSError, ValueError, TypeError) as e:
+            sys.stderr.write(f"dict-tools: {name}: {e}\n")
+            status = 1
+            continue
+        if args.time:
+            sys.stderr.write(
+                f"dict-tools: {name}: analysed in {analysis * 1000:.1f} ms, rendered in {rendering * 1000:.1f} ms\n"
+            )
+    if args.time:
+        sys.stderr.write(
+            f"dict-tools: imported in {(imported - start) * 1000:.1f} ms, "
+            f"total {(time.perf_counter() - start) * 1000:.1f} ms\n"
+        )
+    return status
@@ -1,42 +1,166 @@
 """Other commented data models used for keys and values"""
 
-from typing import Any, Generator, Hashable, Mapping, Union
+from typing import Any, Generator, Hashable, Mapping, Optional, Union
 
-from pydantic.dataclasses import dataclass as pyd_dataclass
 
+def _validate_comment(comment: Any) -> Optional[str]:
+    """
+    Check that a comment is a string or None. Numbers are converted to strings
+    :param comment: the comment
+    :type comment: Any
+    :return: the comment
+    :rtype: str or None
+    """
+    if comment is None or isinstance(comment, str):
+        return comment
+    from decimal import Decimal
+
+    if isinstance(comment, (int, float, Decimal)):
+        return str(comment)
+    raise ValueError(
+        f"comment should be a string or None, not {type(comment).__name__}"
+    )
+
+
+class _Frozen:
+    """
+    Base class for the commented data models which prevents their attributes from being changed. The error is the
+    same as for a frozen dataclass
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        from dataclasses import FrozenInstanceError
+
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        from dataclasses import FrozenInstanceError
+
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
 
-@pyd_dataclass(eq=True, frozen=True)
-class CommentedKey:
-    """This is a pydantic dataclass for validating data to be used a dictionary key with a comment
+
+class CommentedKey(_Frozen):
+    """This is a frozen data model for a dictionary key with a comment
 
     An object of CommentedKey can be used as a normal dictionary key but with a comment to describe what this key is
     for. Can be useful for complicated, nested dictionaries.
 
+    The hash is computed once, when the key is created, so the key must be hashable. The comment is only checked if
+    validate is True.
+
     Attributes:
         key (Hashable): An hashable object which will be the true dictionary key
         comment (str): A comment describing the purpose of the key
 
     """
 
-    key: Hashable
-    comment: Union[str, None] = None
+    __slots__ = ("key", "comment", "_hash")
 
+    key: Hashable
+    comment: Union[str, None]
+    _hash: int
 
-@pyd_dataclass(eq=True, frozen=True)
-class CommentedValue:
-    """This is a pydantic dataclass for validating data to be used a dictionary value with a comment
+    def __init__(
+        self, key: Hashable, comment: Union[str, None] = None, *, validate: bool = False
+    ):
+        """
+        Create the key
+        :param key: the true dictionary key
+        :type key: Hashable
+        :param comment: a comment describing the purpose of the key
+        :type comment: str or None
+        :param validate: True if the key should be checked to be hashable and the comment to be a string or None
+        :type validate: bool
+        """
+        if validate:
+            comment = _validate_comment(comment)
+        try:
+            key_hash = hash((key, comment))
+        except TypeError:
+            if validate:
+                raise ValueError(
+                    f"key should be hashable, not {type(key).__name__}"
+                ) from None
+            raise
+        object.__setattr__(self, "key", key)
+        object.__setattr__(self, "comment", comment)
+        object.__setattr__(self, "_hash", key_hash)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(key={self.key!r}, comment={self.comment!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self._hash == other._hash
+            and self.key == other.key
+            and self.comment == other.comment
+        )
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> Any:
+        return type(self), (self.key, self.comment)
+
+
+class CommentedValue(_Frozen):
+    """This is a frozen data model for a dictionary value with a comment
 
     An object of CommentedValue can be used as a normal dictionary value but with a comment to describe what this value
     is. Can be useful for complicated, nested dictionaries.
 
+    The value does not need to be hashable. If it is, the hash is computed the first time it is needed and then reused.
+    The comment is only checked if validate is True.
+
     Attributes:
         value (Any): An hashable object which will be the true dictionary value
         comment (str): A comment describing the purpose of the value
 
     """
 
+    __slots__ = ("value", "comment", "_hash")
+
     value: Any
-    comment: Union[str, None] = None
+    comment: Union[str, None]
+    _hash: Optional[int]
+
+    def __init__(
+        self, value: Any, comment: Union[str, None] = None, *, validate: bool = False
+    ):
+        """
+        Create the value
+        :param value: the true dictionary value
+        :type value: Any
+        :param comment: a comment describing the value
+        :type comment: str or None
+        :param validate: True if the comment should be checked to be a string or None
+        :type validate: bool
+        """
+        if validate:
+            comment = _validate_comment(comment)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "comment", comment)
+        object.__setattr__(self, "_hash", None)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(value={self.value!r}, comment={self.comment!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.value == other.value and self.comment == other.comment
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash((self.value, self.comment)))
+        return self._hash  # type: ignore[return-value]
+
+    def __reduce__(self) -> Any:
+        return type(self), (self.value, self.comment)
 
 
 class d_keys:
@@ -0,0 +1,172 @@
+"""Observers which receive events from DictionaryParser as it analyses the dictionaries and lists of a dictionary"""
+from typing import Dict, Hashable, List, Tuple
+
+# path element for the elements of a list, e.g. ("records", ELEMENTS, "id") is the id key of the records
+ELEMENTS = "[]"
+
+
+class ParserObserver:
+    """
+    Base class for observers of DictionaryParser. Subclasses override enter and exit, which do nothing by default
+
+    The parser calls enter when it starts to analyse a dictionary or list and exit when it has finished, including
+    the dictionaries and lists nested in it. Paths are tuples of keys from the analysed dictionary, with the key
+    attribute of CommentedKeys and ELEMENTS for the elements of a list. The root dictionary has the path ().
+    """
+
+    def enter(self, path: Tuple[Hashable, ...], kind: str, count: int) -> None:
+        """
+        Called when the analysis of a dictionary or list starts
+        :param path: the path of the dictionary or list
+        :type path: tuple
+        :param kind: MAPPING or SEQUENCE
+        :type kind: str
+        :param count: the number of items of the dictionary or elements of the list
+        :type count: int
+        :return: void
+        :rtype: void
+        """
+
+    def exit(
+        self,
+        path: Tuple[Hashable, ...],
+        kind: str,
+        count: int,
+        elapsed: float,
+        size: int,
+    ) -> None:
+        """
+        Called when the analysis of a dictionary or list has finished
+        :param path: the path of the dictionary or list
+        :type path: tuple
+        :param kind: MAPPING or SEQUENCE
+        :type kind: str
+        :param count: the number of items of the dictionary or elements of the list
+        :type count: int
+        :param elapsed: the seconds spent analysing the dictionary or list, including what is nested in it
+        :type elapsed: float
+        :param size: the number of characters of its description in the text format of getStructure
+        :type size: int
+        :return: void
+        :rtype: void
+        """
+
+
+class PathStats:
+    """
+    Totals of the events of one path, across every time it was analysed
+
+    Attributes:
+        path (tuple): the path
+        kind (str): MAPPING or SEQUENCE
+        calls (int): the number of times the path was analysed
+        count (int): the total number of items or elements
+        total (float): the total seconds, including what is nested in the path
+        own (float): the total seconds, excluding the dictionaries and lists nested in the path
+        size (int): the total number of characters of its description
+
+    """
+
+    __slots__ = ("path", "kind", "calls", "count", "total", "own", "size")
+
+    def __init__(self, path: Tuple[Hashable, ...], kind: str):
+        self.path = path
+        self.kind = kind
+        self.calls = 0
+        self.count = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.size = 0
+
+    def __repr__(self) -> str:
+        return f"PathStats(path={self.path!r}, calls={self.calls}, total={self.total:.6f}, own={self.own:.6f})"
+
+
+class ProfileObserver(ParserObserver):
+    """
+    Observer which totals the time spent on each path, to find the sub-trees which make an analysis slow
+
+    e.g.
+    profile = ProfileObserver()
+    DictionaryParser(observer=profile).getStructure(d)
+    print(profile.summary(top=10))
+
+    Attributes:
+        stats (dict): path -> PathStats
+
+    """
+
+    def __init__(self) -> None:
+        self.stats: Dict[Tuple[Hashable, ...], PathStats] = {}
+        # the seconds spent in the children of each path being analysed
+        self._nested: List[float] = []
+
+    def enter(self, path: Tuple[Hashable, ...], kind: str, count: int) -> None:
+        self._nested.append(0.0)
+
+    def exit(
+        self,
+        path: Tuple[Hashable, ...],
+        kind: str,
+        count: int,
+        elapsed: float,
+        size: int,
+    ) -> None:
+        nested = self._nested.pop()
+        if self._nested:
+            self._nested[-1] += elapsed
+        stats = self.stats.get(path)
+        if stats is None:
+            stats = self.stats[path] = PathStats(path, kind)
+        stats.calls += 1
+        stats.count += count
+        stats.total += elapsed
+        stats.own += elapsed - nested
+        stats.size += size
+
+    def top(self, n: int = 10, by: str = "own") -> List[PathStats]:
+        """
+        Get the most expensive paths
+        :param n: the number of paths
+        :type n: int
+        :param by: 'own' to rank by the time excluding nested dictionaries and lists, 'total' to include it or 'size'
+                   to rank by the size of the description
+        :type by: str
+        :return: the statistics of the paths, most expensive first
+        :rtype: list of PathStats
+        """
+        if by not in ("own", "total", "size"):
+            raise ValueError(f"by must be one of 'own', 'total' or 'size' : not {by}")
+        return sorted(self.stats.values(), key=lambda s: getattr(s, by), reverse=True)[
+            :n
+        ]
+
+    def summary(self, top: int = 10, by: str = "own") -> str:
+        """
+        Describe the most expensive paths as a table
+        :param top: the number of paths
+        :type top: int
+        :param by: how to rank the paths, see top
+        :type by: str
+        :return: the table
+        :rtype: str
+        """
+        lines = [
+            f"{'own ms':>10} {'total ms':>10} {'calls':>7} {'items':>9} {'chars':>10}  path"
+        ]
+        for stats in self.top(top, by):
+            path = "/".join(str(key) for key in stats.path) or "<root>"
+            lines.append(
+                f"{stats.own * 1000:10.3f} {stats.total * 1000:10.3f} {stats.calls:7d} {stats.count:9d} "
+                f"{stats.size:10d}  {path}"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """
+        Forget the statistics
+        :return: void
+        :rtype: void
+        """
+        self.stats.clear()
+        self._nested.clear()
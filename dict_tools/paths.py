@@ -0,0 +1,313 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Hashable, Iterator, List, Sequence, Tuple, Union
+
+from dict_tools.CommentedDict import CommentedDict
+from dict_tools.data_models import CommentedKey
+from dict_tools.utils import _PATH_CACHE_SIZE
+
+Path = Tuple[Hashable, ...]
+
+# marks a path which is not in the index
+_MISSING = object()
+
+
+def _items(mapping: Mapping) -> Any:
+    """
+    Get the items of a mapping. The items of a CommentedDict keep its CommentedKeys
+    :param mapping: the mapping
+    :type mapping: Mapping
+    :return: the (key, value) pairs
+    :rtype: iterable of tuples
+    """
+    if isinstance(mapping, CommentedDict):
+        return mapping.commented_items()
+    return mapping.items()
+
+
+def _inner(key: Hashable) -> Hashable:
+    """
+    Get the key which is used in paths - the key attribute of a CommentedKey or the key itself
+    :param key: the dictionary key
+    :type key: Hashable
+    :return: the key used in paths
+    :rtype: Hashable
+    """
+    return key.key if isinstance(key, CommentedKey) else key
+
+
+class PathIndex:
+    """
+    Index of every path in a nested dictionary, for constant time look ups of values at deep paths
+
+    The index is built by walking the dictionary once. Paths can be given as tuples or lists of keys, or as strings of
+    keys joined by path_sep if all the keys are strings. Keys are indexed by the key attribute of CommentedKeys, so a
+    value under a CommentedKey is found by the key it comments, as in CommentedDict. Only mappings are descended into,
+    not lists or CommentedValues.
+
+    The index does not see changes made to the dictionary directly. Values should be replaced through the index, e.g.
+    index["a/b"] = {"c": 1}, or the index should be told that the sub-tree at a path has changed with
+    index.invalidate("a/b"). Either way only the sub-tree at the path is walked again.
+
+    e.g.
+    index = PathIndex({"a": {"b": {"c": 1}}})
+    index["a/b/c"] -> 1
+    list(index.iter_prefix("a")) -> [(("a", "b"), {"c": 1}), (("a", "b", "c"), 1)]
+
+    Attributes:
+        data (Mapping): the indexed dictionary
+        path_sep (str): the separator of keys in paths given as strings
+
+    """
+
+    __slots__ = ("data", "path_sep", "_values", "_children", "_strings")
+
+    def __init__(self, data: Mapping, path_sep: str = "/"):
+        if not isinstance(data, Mapping):
+            raise TypeError(f"Please provide a dictionary to index, not a {type(data)}")
+        self.data = data
+        self.path_sep = path_sep
+        # path -> value, for every path including the root ()
+        self._values: Dict[Path, Any] = {}
+        # path of a mapping -> its keys used in paths -> its keys
+        self._children: Dict[Path, Dict[Hashable, Hashable]] = {}
+        # path given as a string -> its keys, emptied when it reaches _PATH_CACHE_SIZE paths
+        self._strings: Dict[str, Path] = {}
+        self._index(data, ())
+
+    def __repr__(self) -> str:
+        return f"PathIndex({len(self)} paths)"
+
+    def __len__(self) -> int:
+        return len(self._values) - 1
+
+    def __contains__(self, path: Union[str, Sequence[Hashable]]) -> bool:
+        return self._path(path) in self._values
+
+    def __getitem__(self, path: Union[str, Sequence[Hashable]]) -> Any:
+        """
+        Get the value at a path
+        :param path: string of concatenated keys or sequence of keys
+        :type path: str or sequence
+        :return: the value at the path
+        :rtype: Any
+        :raises KeyError
+        """
+        values = self._values
+        # most paths are tuples of plain keys, which need no conversion, or strings which have been split before
+        keys: Any = None
+        if path.__class__ is tuple:
+            keys = path
+        elif path.__class__ is str:
+            keys = self._strings.get(path)  # type: ignore[arg-type]
+        if keys is not None:
+            value = values.get(keys, _MISSING)
+            if value is not _MISSING:
+                return value
+        try:
+            return values[self._path(path)]
+        except KeyError:
+            raise KeyError(f"One of the keys in {path} is not in the dictionary!")
+
+    def get(self, path: Union[str, Sequence[Hashable]], default: Any = None) -> Any:
+        """
+        Get the value at a path, or default if the path is not in the dictionary
+        :param path: string of concatenated keys or sequence of keys
+        :type path: str or sequence
+        :param default: the value to return if the path is not in the dictionary
+        :type default: Any
+        :return: the value at the path
+        :rtype: Any
+        """
+        return self._values.get(self._path(path), default)
+
+    def __setitem__(self, path: Union[str, Sequence[Hashable]], value: Any) -> None:
+        """
+        Set the value at a path in the dictionary and index the new value in place of the sub-tree it replaces
+        :param path: string of concatenated keys or sequence of keys. All but the last key must be in the dictionary
+        :type path: str or sequence
+        :param value: the new value
+        :type value: Any
+        :return: void
+        :rtype: void
+        :raises KeyError, ValueError
+        """
+        keys = self._path(path)
+        if not keys:
+            raise ValueError(
+                "The root of the index cannot be replaced, index the new dictionary instead"
+            )
+        parent, key = keys[:-1], keys[-1]
+        children = self._children_of(parent, path)
+        # keep the CommentedKey of an existing value unless a new CommentedKey is given
+        last = path[-1] if not isinstance(path, str) else key
+        actual = last if isinstance(last, CommentedKey) else children.get(key, key)
+        container = self._values[parent]
+        if isinstance(container, CommentedDict) and actual in container.data:
+            # replace the value without moving the key to the end of the CommentedDict
+            container.data[actual] = value
+        else:
+            container[actual] = value
+        if key in children:
+            self._forget(keys)
+        children[key] = actual
+        self._index(value, keys)
+
+    def __delitem__(self, path: Union[str, Sequence[Hashable]]) -> None:
+        """
+        Delete the value at a path from the dictionary and its sub-tree from the index
+        :param path: string of concatenated keys or sequence of keys
+        :type path: str or sequence
+        :return: void
+        :rtype: void
+        :raises KeyError, ValueError
+        """
+        keys = self._path(path)
+        if not keys:
+            raise ValueError("The root of the index cannot be deleted")
+        children = self._children_of(keys[:-1], path)
+        if keys[-1] not in children:
+            raise KeyError(f"One of the keys in {path} is not in the dictionary!")
+        del self._values[keys[:-1]][children.pop(keys[-1])]
+        self._forget(keys)
+
+    def invalidate(self, path: Union[str, Sequence[Hashable]] = ()) -> None:
+        """
+        Index the sub-tree at a path again after the dictionary has been changed directly. If the path is no longer in
+        the dictionary, it is removed from the index. Invalidating the root indexes the whole dictionary again
+        :param path: string of concatenated keys or sequence of keys. All but the last key must be in the index
+        :type path: str or sequence
+        :return: void
+        :rtype: void
+        :raises KeyError
+        """
+        keys = self._path(path)
+        if not keys:
+            self._values.clear()
+            self._children.clear()
+            self._index(self.data, ())
+            return
+        parent, key = keys[:-1], keys[-1]
+        children = self._children_of(parent, path)
+        if keys in self._values:
+            self._forget(keys)
+        container = self._values[parent]
+        if isinstance(container, CommentedDict):
+            try:
+                children[key] = container.commented_key(key)
+            except KeyError:
+                children.pop(key, None)
+            else:
+                self._index(container[key], keys)
+            return
+        if key in container:
+            children[key] = key
+            self._index(container[key], keys)
+            return
+        # the key may be the key attribute of a CommentedKey
+        for actual, value in _items(container):
+            if _inner(actual) == key:
+                children[key] = actual
+                self._index(value, keys)
+                return
+        children.pop(key, None)
+
+    def iter_prefix(
+        self, prefix: Union[str, Sequence[Hashable]] = (), leaves: bool = False
+    ) -> Iterator[Tuple[Path, Any]]:
+        """
+        Generate the paths below a prefix, and their values, in the order of the dictionary
+        :param prefix: string of concatenated keys or sequence of keys. Defaults to the root
+        :type prefix: str or sequence
+        :param leaves: True if only the paths of values which are not mappings should be generated
+        :type leaves: bool
+        :return: generator of (path, value) pairs
+        :rtype: Iterator[tuple]
+        :raises KeyError
+        """
+        keys = self._path(prefix)
+        if keys not in self._values:
+            raise KeyError(f"One of the keys in {prefix} is not in the dictionary!")
+        stack: List[Path] = [
+            keys + (key,) for key in reversed(list(self._children.get(keys, ())))
+        ]
+        while stack:
+            path = stack.pop()
+            children = self._children.get(path)
+            if children is None or not leaves:
+                yield path, self._values[path]
+            if children:
+                stack.extend(path + (key,) for key in reversed(list(children)))
+
+    def _path(self, path: Union[str, Sequence[Hashable]]) -> Path:
+        """
+        Convert a path to the tuple of keys used in the index
+        :param path: string of concatenated keys or sequence of keys
+        :type path: str or sequence
+        :return: the keys
+        :rtype: tuple
+        """
+        if isinstance(path, str):
+            keys = self._strings.get(path)
+            if keys is None:
+                if len(self._strings) >= _PATH_CACHE_SIZE:
+                    self._strings.clear()
+                keys = self._strings[path] = tuple(path.split(self.path_sep))
+            return keys
+        return tuple(_inner(key) for key in path)
+
+    def _children_of(
+        self, keys: Path, path: Union[str, Sequence[Hashable]]
+    ) -> Dict[Hashable, Hashable]:
+        """
+        Get the keys of the mapping at a path
+        :param keys: the path of the mapping
+        :type keys: tuple
+        :param path: the path as given, used in errors
+        :type path: str or sequence
+        :return: the keys used in paths -> the keys
+        :rtype: dict
+        :raises KeyError
+        """
+        children = self._children.get(keys)
+        if children is None:
+            raise KeyError(f"One of the keys in {path} is not in the dictionary!")
+        return children
+
+    def _index(self, value: Any, path: Path) -> None:
+        """
+        Add a value and the sub-tree below it to the index
+        :param value: the value
+        :type value: Any
+        :param path: the path of the value
+        :type path: tuple
+        :return: void
+        :rtype: void
+        """
+        values = self._values
+        stack: List[Tuple[Path, Any]] = [(path, value)]
+        while stack:
+            path, value = stack.pop()
+            values[path] = value
+            if isinstance(value, Mapping):
+                children: Dict[Hashable, Hashable] = {}
+                for key, child in _items(value):
+                    inner = _inner(key)
+                    children[inner] = key
+                    stack.append((path + (inner,), child))
+                self._children[path] = children
+
+    def _forget(self, path: Path) -> None:
+        """
+        Remove a path and the sub-tree below it from the index
+        :param path: the path
+        :type path: tuple
+        :return: void
+        :rtype: void
+        """
+        stack = [path]
+        while stack:
+            path = stack.pop()
+            del self._values[path]
+            children = self._children.pop(path, None)
+            if children:
+                stack.extend(path + (key,) for key in children)
@@ -0,0 +1,521 @@
+"""Schema tree produced by DictionaryParser and the renderers which turn it into text"""
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+# kinds of SchemaNode
+MAPPING = "mapping"
+SEQUENCE = "sequence"
+VALUE = "value"
+ELIDED = "elided"
+UNION = "union"
+
+# number of lines buffered before a chunk of the response is yielded
+_CHUNK_LINES = 256
+
+
+class SchemaNode:
+    """
+    A node of the schema tree which describes the structure of a dictionary
+
+    There are five kinds of node:
+        1) mapping - a dictionary. The children are the entries of the dictionary
+        2) sequence - a list or tuple. If every element is a dictionary then the only child describes the elements
+        3) value - any other value
+        4) elided - the entries of a dictionary which were not analysed because of a limit of the parser. It is the
+           last child of the dictionary. Its length is the number of entries and its types are the 'key->value' type
+           pairs of the entries, or of the first sampled entries
+        5) union - the values of a key of merged dictionaries which have several structures. Its type name is the
+           union of their types and the children describe each structure of dictionary or list, keyed by the number of
+           dictionaries with that structure
+
+    A node which is the value of a dictionary entry has the description of the key as its key attribute. Nodes are
+    shared between trees when repeated structures are cached, so they should not be modified once built.
+
+    Attributes:
+        kind (str): one of 'mapping', 'sequence', 'value', 'elided' or 'union'
+        key (str): description of the key if the node is the value of a dictionary entry, else None
+        index (int): position of the entry in an ordered dictionary, else None
+        type_name (str): description of the type of the value
+        types (list): for a sequence, the sorted descriptions of the types of its elements
+        length (int or tuple): for a sequence, the number of elements or the (min, max) range of the number of
+            elements if the node describes several sequences. For elided entries, the number of entries
+        sampled (int): for a sequence or elided entries, the number of elements sampled to infer the types, else None
+        counts (list): for a sequence, the number of elements (or sampled elements) of each of its types, in the
+            order of types, if type counts are kept, else None
+        children (list): child nodes
+        wrapper (str): name of the type wrapping the value, e.g. 'CommentedValue', else None
+        comment (str): comment of the wrapper
+        example (str): for a sequence, an example element if examples are shown, else None
+        notes (list): for the root node, notes about the dictionary, e.g. 'OrderedDict'
+
+    """
+
+    __slots__ = (
+        "kind",
+        "key",
+        "index",
+        "type_name",
+        "types",
+        "length",
+        "sampled",
+        "counts",
+        "children",
+        "wrapper",
+        "comment",
+        "example",
+        "notes",
+    )
+
+    def __init__(
+        self,
+        kind: str,
+        type_name: str,
+        key: Optional[str] = None,
+        index: Optional[int] = None,
+        types: Optional[List[str]] = None,
+        length: Union[int, Tuple[int, int], None] = None,
+        sampled: Optional[int] = None,
+        children: Optional[List["SchemaNode"]] = None,
+        wrapper: Optional[str] = None,
+        comment: Optional[str] = None,
+        example: Optional[str] = None,
+        notes: Optional[List[str]] = None,
+        counts: Optional[List[int]] = None,
+    ):
+        self.kind = kind
+        self.type_name = type_name
+        self.key = key
+        self.index = index
+        self.types = types
+        self.length = length
+        self.sampled = sampled
+        self.counts = counts
+        self.children = [] if children is None else children
+        self.wrapper = wrapper
+        self.comment = comment
+        self.example = example
+        self.notes = notes
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for name in self.__slots__
+            if name != "children" and getattr(self, name) is not None
+        )
+        return f"SchemaNode({fields}, children={len(self.children)})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, SchemaNode):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def replace(self, **changes: Any) -> "SchemaNode":
+        """
+        Return a shallow copy of the node with some attributes changed. The children are shared with the copy
+        :param changes: the attributes to change
+        :type changes: Any
+        :return: the copy
+        :rtype: SchemaNode
+        """
+        node = SchemaNode.__new__(SchemaNode)
+        for name in self.__slots__:
+            setattr(node, name, changes.get(name, getattr(self, name)))
+        return node
+
+
+# attributes of a SchemaNode stored in a row by flatten
+_ROW_FIELDS = tuple(name for name in SchemaNode.__slots__ if name != "children")
+
+
+def flatten(nodes: List[SchemaNode]) -> List[Tuple[Any, ...]]:
+    """
+    Flatten trees into a list of rows of plain values, in depth first order. Each row holds the attributes of a node
+    followed by its number of children. The rows are much quicker to pickle than the nodes, e.g. to send a tree
+    between processes, and can be turned back into the trees with unflatten
+    :param nodes: the roots of the trees
+    :type nodes: list of SchemaNode
+    :return: the rows
+    :rtype: list of tuples
+    """
+    rows = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        rows.append(
+            tuple(getattr(node, name) for name in _ROW_FIELDS) + (len(node.children),)
+        )
+        stack.extend(reversed(node.children))
+    return rows
+
+
+def unflatten(rows: List[Tuple[Any, ...]]) -> List[SchemaNode]:
+    """
+    Build the trees from the rows made by flatten
+    :param rows: the rows
+    :type rows: list of tuples
+    :return: the roots of the trees
+    :rtype: list of SchemaNode
+    """
+    roots: List[SchemaNode] = []
+    # each entry is the list of children to add to and the number of children still to add
+    stack: List[List[Any]] = [[roots, len(rows)]]
+    for row in rows:
+        while stack[-1][1] == 0:
+            stack.pop()
+        node = SchemaNode.__new__(SchemaNode)
+        for name, value in zip(_ROW_FIELDS, row):
+            setattr(node, name, value)
+        node.children = []
+        stack[-1][0].append(node)
+        stack[-1][1] -= 1
+        if row[-1]:
+            stack.append([node.children, row[-1]])
+    return roots
+
+
+class SchemaRenderer:
+    """
+    Base class for renderers of a schema tree. Subclasses implement iter_render, which generates the output in chunks
+    """
+
+    def iter_render(self, node: SchemaNode, depth: int = 0) -> Iterator[str]:
+        """
+        Render a schema tree as a stream of string chunks
+        :param node: the root of the tree
+        :type node: SchemaNode
+        :param depth: the depth at which to render the tree
+        :type depth: int
+        :return: generator of chunks
+        :rtype: Iterator[str]
+        """
+        raise NotImplementedError
+
+    def render(self, node: SchemaNode, depth: int = 0) -> str:
+        """
+        Render a schema tree as a string
+        :param node: the root of the tree
+        :type node: SchemaNode
+        :param depth: the depth at which to render the tree
+        :type depth: int
+        :return: the rendered tree
+        :rtype: str
+        """
+        return "".join(self.iter_render(node, depth))
+
+    def write(self, node: SchemaNode, out: TextIO, depth: int = 0) -> int:
+        """
+        Write a schema tree to a file-like object as it is rendered
+        :param node: the root of the tree
+        :type node: SchemaNode
+        :param out: file-like object with a write method
+        :type out: TextIO
+        :param depth: the depth at which to render the tree
+        :type depth: int
+        :return: the number of characters written
+        :rtype: int
+        """
+        n = 0
+        for chunk in self.iter_render(node, depth):
+            n += out.write(chunk)
+        return n
+
+
+class TextRenderer(SchemaRenderer):
+    """
+    Render a schema tree in the text format of DictionaryParser.getStructure
+
+    Each entry of a dictionary is written on its own line, indented with one tab per level of nesting. The tree is
+    walked with an explicit stack so any depth of nesting is supported.
+    """
+
+    def __init__(self) -> None:
+        self._indents: List[str] = ["\t" * i for i in range(32)]
+
+    def indent(self, depth: int) -> str:
+        r"""
+        Return the indent string for a nesting depth. Indent strings are built once and then reused.
+        E.g. 2 -> '\t\t'
+        :param depth: the nesting depth
+        :type depth: int
+        :return: the indent string
+        :rtype: str
+        """
+        indents = self._indents
+        while len(indents) <= depth:
+            indents.append(indents[-1] + "\t")
+        return indents[depth]
+
+    def iter_render(self, node: SchemaNode, depth: int = 0) -> Iterator[str]:
+        """
+        Render a schema tree as a stream of string chunks
+
+        A node without a key is rendered on its own: a mapping as a braced block and a sequence as its description
+        without a trailing new line. A node with a key is rendered as a dictionary entry.
+        :param node: the root of the tree
+        :type node: SchemaNode
+        :param depth: the depth at which to render the tree
+        :type depth: int
+        :return: generator of chunks
+        :rtype: Iterator[str]
+        """
+        if node.notes:
+            yield "".join(f"\n{note}" for note in node.notes)
+        opener, close = self._parts(node, self.indent(depth))
+        yield opener
+        if node.kind == SEQUENCE and node.children:
+            yield from self._walk(node.children[0].children, depth + 1, close)
+        elif node.kind == MAPPING or node.kind == UNION:
+            yield from self._walk(node.children, depth + 1, close)
+        else:
+            yield close
+
+    def measure(
+        self,
+        node: SchemaNode,
+        depth: int = 0,
+        known: Optional[Dict[Tuple[int, int], int]] = None,
+    ) -> int:
+        """
+        Count the characters of the rendering of a schema tree, without its notes, without building the rendering
+        :param node: the root of the tree
+        :type node: SchemaNode
+        :param depth: the depth at which the tree is rendered
+        :type depth: int
+        :param known: the sizes of sub-trees which have already been measured, keyed by (id of node, depth). These
+                      sub-trees are not walked again
+        :type known: dict or None
+        :return: the number of characters
+        :rtype: int
+        """
+        total = 0
+        stack = [(node, depth)]
+        while stack:
+            current, depth = stack.pop()
+            if known is not None and current is not node:
+                size = known.get((id(current), depth))
+                if size is not None:
+                    total += size
+                    continue
+            opener, close = self._parts(current, self.indent(depth))
+            total += len(opener) + len(close)
+            if current.kind == SEQUENCE and current.children:
+                stack.extend(
+                    (child, depth + 1) for child in current.children[0].children
+                )
+            elif current.kind == MAPPING or current.kind == UNION:
+                stack.extend((child, depth + 1) for child in current.children)
+        return total
+
+    def _parts(self, node: SchemaNode, tabs: str) -> Tuple[str, str]:
+        """
+        Get the text which opens and closes a node. The entries of a dictionary, or of the elements of a list, are
+        rendered between the two. A node with a key is a dictionary entry, which opens with its key
+        :param node: the node
+        :type node: SchemaNode
+        :param tabs: the indent of the node
+        :type tabs: str
+        :return: the opening and closing text
+        :rtype: tuple
+        """
+        if node.kind == ELIDED:
+            return f"{tabs}{self._elision(node)}\n", ""
+        if node.key is not None:
+            opener, close = self._open(node, tabs)
+            return f"{tabs}{self._prefix(node)}{opener}", close
+        if node.kind == MAPPING:
+            return f"\n{tabs}{{\n", f"{tabs}}}\n"
+        if node.kind == SEQUENCE:
+            head, tail = self._sequence_parts(node, tabs)
+            if node.children:
+                return f"{head}\n{tabs}{{\n", f"{tabs}}}\n{tail}"
+            return head, tail
+        return node.type_name, ""
+
+    @staticmethod
+    def _prefix(node: SchemaNode) -> str:
+        """
+        Get the description of the key of a dictionary entry, including the index if the dictionary is ordered
+        :param node: the value of the entry
+        :type node: SchemaNode
+        :return: the key description followed by ' : '
+        :rtype: str
+        """
+        if node.index is None:
+            return f"{node.key} : "
+        return f"{node.index}-> {node.key} : "
+
+    def _open(self, node: SchemaNode, tabs: str) -> Tuple[str, str]:
+        """
+        Get the text which follows the key of a dictionary entry and the text which closes the entry. If the value has
+        children then they are rendered between the two
+        :param node: the value of the entry
+        :type node: SchemaNode
+        :param tabs: the indent of the entry
+        :type tabs: str
+        :return: the opening and closing text
+        :rtype: tuple
+        """
+        if node.kind == MAPPING:
+            if node.wrapper is not None:
+                return f"{node.wrapper} [{{\n", f"{tabs}}}] <{node.comment}>\n"
+            return "{\n", f"{tabs}}}\n"
+        if node.kind == SEQUENCE:
+            head, tail = self._sequence_parts(node, tabs)
+            if node.children:
+                return f"{head}\n{tabs}{{\n", f"{tabs}}}\n{tail}\n"
+            return f"{head}\n", ""
+        # the structures of a union are listed under its types
+        return f"{node.type_name}\n", ""
+
+    @staticmethod
+    def _sequence_parts(node: SchemaNode, tabs: str) -> Tuple[str, str]:
+        """
+        Split the description of a sequence into the text before and after the description of its elements. If the
+        elements are not described then all of the text is before
+        :param node: the sequence
+        :type node: SchemaNode
+        :param tabs: the indent of the line describing the sequence
+        :type tabs: str
+        :return: the text before and after the elements
+        :rtype: tuple
+        """
+        brackets = "[]" if node.type_name == "list" else "()"
+        if node.sampled is not None:
+            brackets = "~" + brackets
+            sampled = f" (sampled {node.sampled})"
+        else:
+            sampled = ""
+        if isinstance(node.length, tuple) and node.length[0] != node.length[1]:
+            length = f"{node.length[0]}..{node.length[1]}"
+        elif isinstance(node.length, tuple):
+            length = str(node.length[0])
+        else:
+            length = str(node.length)
+        if node.children:
+            head = f"{node.type_name} {brackets[:-1]}"
+            tail = f"{tabs}{brackets[-1]} n={length}{sampled}"
+        else:
+            types = TextRenderer._types(node)
+            head = f"{node.type_name} {brackets[:-1]}{types}{brackets[-1]} n={length}{sampled}"
+            tail = ""
+        if node.example is not None:
+            tail = tail + f" e.g. {node.example}"
+        if node.wrapper is not None:
+            head = f"{node.wrapper} [" + head
+            tail = tail + f"] <{node.comment}>"
+        if not node.children:
+            return head + tail, ""
+        return head, tail
+
+    @staticmethod
+    def _elision(node: SchemaNode) -> str:
+        """
+        Describe the entries of a dictionary which were not analysed
+        E.g. '... 499,990 more keys (types: str->int)'
+        :param node: the elided node
+        :type node: SchemaNode
+        :return: the description
+        :rtype: str
+        """
+        types = ", ".join(node.types or [])
+        keys = "key" if node.length == 1 else "keys"
+        if node.sampled is not None:
+            return f"... {node.length:,} more {keys} (types of the first {node.sampled}: {types})"
+        return f"... {node.length:,} more {keys} (types: {types})"
+
+    @staticmethod
+    def _types(node: SchemaNode) -> str:
+        """
+        Describe the types of the elements of a sequence, with the number and proportion of each if they are counted
+        E.g. 'NoneType 1 (0.1%), int 999 (99.9%)'
+        :param node: the sequence
+        :type node: SchemaNode
+        :return: the description
+        :rtype: str
+        """
+        if node.counts is None:
+            return ", ".join(node.types or [])
+        total = sum(node.counts)
+        return ", ".join(
+            f"{name} {count} ({TextRenderer._share(count, total)}%)"
+            for name, count in zip(node.types or [], node.counts)
+        )
+
+    @staticmethod
+    def _share(count: int, total: int) -> str:
+        """
+        Describe a count as a percentage of a total, to at most 4 decimal places. A share which is not the whole is
+        never rounded up to 100, and a share below 0.0001% is described as '<0.0001'
+        E.g. 3 of 1000003 -> '0.0003'
+        :param count: the count
+        :type count: int
+        :param total: the total
+        :type total: int
+        :return: the percentage, without the percent sign
+        :rtype: str
+        """
+        if count == total:
+            return "100"
+        share = f"{count / total * 100:.4f}".rstrip("0").rstrip(".")
+        if share == "100":
+            return "99.9999"
+        if share == "0":
+            return "<0.0001"
+        return share
+
+    def _walk(self, nodes: List[SchemaNode], depth: int, close: str) -> Iterator[str]:
+        """
+        Render the entries of a dictionary whose opening text has already been generated
+
+        Each entry of the stack is a dictionary which is part way through being rendered - the iterator over its
+        entries, their depth and the text which closes the dictionary.
+        :param nodes: the entries of the dictionary
+        :type nodes: list of SchemaNode
+        :param depth: the depth of the entries
+        :type depth: int
+        :param close: the text which closes the dictionary
+        :type close: str
+        :return: generator of chunks
+        :rtype: Iterator[str]
+        """
+        stack: List[Tuple[Iterator[SchemaNode], int, str]] = [
+            (iter(nodes), depth, close)
+        ]
+        # lines are buffered and yielded in batches to keep the per-line generator overhead low
+        buffer: List[str] = []
+        emit = buffer.append
+        while stack:
+            if len(buffer) >= _CHUNK_LINES:
+                yield "".join(buffer)
+                buffer.clear()
+            entries, depth, close = stack[-1]
+            tabs = self.indent(depth)
+            for node in entries:
+                if node.index is None:
+                    prefix = f"{tabs}{node.key} : "
+                else:
+                    prefix = f"{tabs}{node.index}-> {node.key} : "
+                if node.kind == VALUE:
+                    emit(f"{prefix}{node.type_name}\n")
+                elif node.kind == ELIDED:
+                    emit(f"{tabs}{self._elision(node)}\n")
+                else:
+                    opener, nested_close = self._open(node, tabs)
+                    emit(prefix + opener)
+                    if node.children:
+                        nested = (
+                            node.children[0].children
+                            if node.kind == SEQUENCE
+                            else node.children
+                        )
+                        stack.append((iter(nested), depth + 1, nested_close))
+                        break
+                    emit(nested_close)
+                if len(buffer) >= _CHUNK_LINES:
+                    yield "".join(buffer)
+                    buffer.clear()
+            else:
+                stack.pop()
+                emit(close)
+        yield "".join(buffer)
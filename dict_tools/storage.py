@@ -0,0 +1,516 @@
+"""Save CommentedDicts in a compact file with their comments, and read them back in full or through a memory map
+
+The file has a header, the items of the dictionary as a JSON array of records, a table of the position of each record,
+a hash table of the top level keys and the comment of the dictionary as JSON. Each record is a JSON array of the key,
+the value and, if the value has comments or keys which are not strings, a side table of them:
+
+    [key, value]
+    [key, value, side_table]
+    [[key, key_comment], value, side_table]   for a CommentedKey
+
+The value is written as JSON, with CommentedValues, CommentedKeys and CommentedDicts replaced by their plain
+contents. The side table lists what has to be restored, by the path of JSON keys and list indices from the value, in
+the order in which it has to be restored:
+
+    ["v", path, comment]                  the value at path is a CommentedValue
+    ["d", path, dict_comment, keys]       the mapping at path is a CommentedDict if dict_comment is not null. If keys
+                                          is not null, the mapping was written with the keys "0", "1", ... and keys
+                                          lists its actual keys in order, each as [key] or [key, key_comment]
+
+Loading the whole file decodes the array of records with a single call to json.loads. MappedCommentedDict instead
+finds one record through the hash table and decodes only that record, so opening the file takes the same time
+whatever its size.
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Mapping
+from typing import IO, Any, Hashable, Iterator, List, Optional, Tuple, Type, Union
+
+from dict_tools.CommentedDict import CommentedDict
+from dict_tools.data_models import CommentedKey, CommentedValue, d_keys
+
+Target = Union[str, "os.PathLike[str]", IO[bytes]]
+
+_MAGIC = b"DTCD"
+_VERSION = 1
+# magic, version, reserved, number of items, number of hash table slots, offsets of the item table, hash table and
+# comment, length of the comment
+_HEADER = struct.Struct("<4sHHQQQQQQ")
+# offset and length of a record, length of its key
+_ITEM = struct.Struct("<QQI")
+# crc32 of the key, item number + 1 or 0 for an empty slot
+_SLOT = struct.Struct("<II")
+_KEY_TYPES = (str, int, float, bool, type(None))
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _dumps(value: Any) -> bytes:
+    return _encoder.encode(value).encode("utf-8", "surrogatepass")
+
+
+def _loads(data: bytes) -> Any:
+    return json.loads(data.decode("utf-8", "surrogatepass"))
+
+
+def _check_key(key: Hashable) -> None:
+    """
+    Check that a key can be written as JSON and read back as the same key
+    :param key: the key, or the key attribute of a CommentedKey
+    :type key: Hashable
+    :return: void
+    :rtype: void
+    :raises TypeError
+    """
+    if not isinstance(key, _KEY_TYPES):
+        raise TypeError(
+            f"Only str, int, float, bool and None keys can be saved, not {type(key).__name__}"
+        )
+
+
+def _key_hash(key: Hashable) -> int:
+    """
+    Hash a key so that keys which are equal in a dictionary, like 1, 1.0 and True, have the same hash. Unlike hash,
+    the result does not change between processes
+    :param key: the key
+    :type key: Hashable
+    :return: the hash
+    :rtype: int
+    :raises TypeError
+    """
+    if isinstance(key, str):
+        return zlib.crc32(b"s" + key.encode("utf-8", "surrogatepass"))
+    if isinstance(key, float) and key.is_integer():
+        key = int(key)
+    if isinstance(key, int):
+        return zlib.crc32(b"i%d" % key)
+    if isinstance(key, float):
+        return zlib.crc32(b"f" + repr(key).encode())
+    if key is None:
+        return zlib.crc32(b"n")
+    raise TypeError(f"Keys of type {type(key).__name__} cannot be saved")
+
+
+def _encode(value: Any, path: List[Hashable], table: List[list]) -> Any:
+    """
+    Convert a value to JSON types and add what is lost in the conversion to the side table, children first
+    :param value: the value
+    :type value: Any
+    :param path: the path of JSON keys and list indices of the value, which is restored before returning
+    :type path: list
+    :param table: the side table
+    :type table: list
+    :return: the value as JSON types
+    :rtype: Any
+    """
+    if value.__class__ in _KEY_TYPES:
+        return value
+    if isinstance(value, CommentedValue):
+        encoded = _encode(value.value, path, table)
+        table.append(["v", list(path), value.comment])
+        return encoded
+    if isinstance(value, Mapping):
+        comment = value.comment if isinstance(value, CommentedDict) else None
+        items = (
+            value.commented_items()
+            if isinstance(value, CommentedDict)
+            else value.items()
+        )
+        encoded = {}
+        keys: Optional[List[list]] = None
+        if all(key.__class__ is str for key, _ in items):
+            for key, child in items:
+                path.append(key)
+                encoded[key] = _encode(child, path, table)
+                path.pop()
+        else:
+            keys = []
+            for i, (key, child) in enumerate(items):
+                if isinstance(key, CommentedKey):
+                    _check_key(key.key)
+                    keys.append([key.key, key.comment])
+                else:
+                    _check_key(key)
+                    keys.append([key])
+                path.append(str(i))
+                encoded[str(i)] = _encode(child, path, table)
+                path.pop()
+        if comment is not None or keys is not None:
+            table.append(["d", list(path), comment, keys])
+        return encoded
+    if isinstance(value, (list, tuple)):
+        encoded_list = []
+        for i, child in enumerate(value):
+            path.append(i)
+            encoded_list.append(_encode(child, path, table))
+            path.pop()
+        return encoded_list
+    return value
+
+
+def _decode(value: Any, table: List[list]) -> Any:
+    """
+    Restore the CommentedValues, CommentedKeys, CommentedDicts and keys listed in a side table
+    :param value: the value decoded from JSON
+    :type value: Any
+    :param table: the side table
+    :type table: list
+    :return: the restored value
+    :rtype: Any
+    """
+    for entry in table:
+        path = entry[1]
+        parent = None
+        node = value
+        for key in path:
+            parent, node = node, node[key]
+        if entry[0] == "v":
+            restored: Any = CommentedValue(node, entry[2])
+        else:
+            comment, keys = entry[2], entry[3]
+            items: Any = node.items()
+            if keys is not None:
+                items = zip(
+                    [
+                        CommentedKey(key[0], key[1]) if len(key) == 2 else key[0]
+                        for key in keys
+                    ],
+                    node.values(),
+                )
+            restored = (
+                dict(items)
+                if comment is None
+                else CommentedDict.from_pairs(items, comment=comment)
+            )
+        if parent is None:
+            value = restored
+        else:
+            parent[path[-1]] = restored
+    return value
+
+
+def _record(key: Hashable, value: Any) -> Tuple[bytes, int]:
+    """
+    Write an item of the dictionary as a record
+    :param key: the key
+    :type key: Hashable
+    :param value: the value
+    :type value: Any
+    :return: the record and the length of its key
+    :rtype: tuple
+    """
+    if isinstance(key, CommentedKey):
+        _check_key(key.key)
+        json_key: Any = [key.key, key.comment]
+    else:
+        _check_key(key)
+        json_key = key
+    table: List[list] = []
+    encoded = _encode(value, [], table)
+    record = _dumps([json_key, encoded, table] if table else [json_key, encoded])
+    return record, len(_dumps(json_key))
+
+
+def _from_record(record: list) -> Tuple[Hashable, Any]:
+    """
+    Read an item of the dictionary from a decoded record
+    :param record: the record
+    :type record: list
+    :return: the key and value
+    :rtype: tuple
+    """
+    key = record[0]
+    if key.__class__ is list:
+        key = CommentedKey(key[0], key[1])
+    if len(record) == 3:
+        return key, _decode(record[1], record[2])
+    return key, record[1]
+
+
+def dump(d: Mapping, target: Target) -> None:
+    """
+    Save a dictionary with its comments. The keys of the dictionary and the dictionaries in it must be str, int,
+    float, bool or None, or CommentedKeys of them. Values are saved as JSON, so tuples are loaded as lists and other
+    types which JSON cannot represent raise a TypeError
+    :param d: the dictionary, usually a CommentedDict
+    :type d: Mapping
+    :param target: path of the file or a binary file-like object which can seek
+    :type target: str, os.PathLike or file-like object
+    :return: void
+    :rtype: void
+    :raises TypeError
+    """
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "wb") as fp:
+            _dump(d, fp)
+    else:
+        _dump(d, target)
+
+
+def _dump(d: Mapping, fp: IO[bytes]) -> None:
+    """
+    Save a dictionary to a binary file-like object. Offsets in the file are relative to its current position
+    :param d: the dictionary
+    :type d: Mapping
+    :param fp: the file-like object
+    :type fp: IO[bytes]
+    :return: void
+    :rtype: void
+    """
+    start = fp.tell()
+    fp.write(bytes(_HEADER.size))
+    position = _HEADER.size
+    items = bytearray()
+    hashes = []
+    fp.write(b"[")
+    position += 1
+    for i, (key, value) in enumerate(
+        d.commented_items() if isinstance(d, CommentedDict) else d.items()
+    ):
+        if i:
+            fp.write(b",")
+            position += 1
+        record, key_length = _record(key, value)
+        fp.write(record)
+        items += _ITEM.pack(position, len(record), key_length)
+        hashes.append(_key_hash(key.key if isinstance(key, CommentedKey) else key))
+        position += len(record)
+    fp.write(b"]")
+    position += 1
+
+    # open addressing with linear probing, at most half full
+    slots = 8
+    while slots < 2 * len(hashes):
+        slots *= 2
+    table = bytearray(slots * _SLOT.size)
+    for i, key_hash in enumerate(hashes):
+        slot = key_hash & (slots - 1)
+        while _SLOT.unpack_from(table, slot * _SLOT.size)[1]:
+            slot = (slot + 1) & (slots - 1)
+        _SLOT.pack_into(table, slot * _SLOT.size, key_hash, i + 1)
+    meta = _dumps({"comment": getattr(d, "comment", "")})
+    fp.write(items)
+    fp.write(table)
+    fp.write(meta)
+    end = fp.tell()
+
+    items_offset = position
+    table_offset = items_offset + len(items)
+    meta_offset = table_offset + len(table)
+    fp.seek(start)
+    fp.write(
+        _HEADER.pack(
+            _MAGIC,
+            _VERSION,
+            0,
+            len(hashes),
+            slots,
+            items_offset,
+            table_offset,
+            meta_offset,
+            len(meta),
+        )
+    )
+    fp.seek(end)
+
+
+def _header(data: Any, name: Any) -> Tuple[int, ...]:
+    """
+    Read and check the header of a saved dictionary
+    :param data: the contents of the file
+    :type data: bytes or mmap
+    :param name: the name of the file, used in errors
+    :type name: Any
+    :return: the number of items, the number of slots, the offsets of the item table, hash table and comment, and the
+             length of the comment
+    :rtype: tuple
+    :raises ValueError
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{name} is not a dictionary saved by CommentedDict.dump")
+    magic, version, _, *fields = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError(f"{name} is not a dictionary saved by CommentedDict.dump")
+    if version != _VERSION:
+        raise ValueError(f"{name} has version {version}, only {_VERSION} is supported")
+    return tuple(fields)
+
+
+def load(source: Target, cls: Type[CommentedDict] = CommentedDict) -> CommentedDict:
+    """
+    Load a dictionary saved by dump, with its comments
+    :param source: path of the file or a binary file-like object
+    :type source: str, os.PathLike or file-like object
+    :param cls: the class of the loaded dictionary
+    :type cls: type
+    :return: the dictionary
+    :rtype: CommentedDict
+    :raises ValueError
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fp:
+            data = fp.read()
+    else:
+        data = source.read()
+    _, _, items_offset, _, meta_offset, meta_length = _header(data, source)
+    records = _loads(data[_HEADER.size : items_offset])
+    comment = _loads(data[meta_offset : meta_offset + meta_length])["comment"]
+    return cls.from_pairs([_from_record(record) for record in records], comment=comment)
+
+
+class MappedCommentedDict(Mapping):
+    """
+    Read-only view of a dictionary saved by CommentedDict.dump, which reads the file through a memory map
+
+    Opening the view only reads the header of the file. Looking up a key finds its record through the hash table in
+    the file and decodes just that record, so each look up decodes the value again and returns a new copy of it. As in
+    a CommentedDict, a value under a CommentedKey is found by the key it comments, and iterating the view gives the
+    keys with their CommentedKeys.
+
+    e.g.
+    d.dump("config.dtcd")
+    with MappedCommentedDict("config.dtcd") as view:
+        view["section"]
+
+    Attributes:
+        path (str or os.PathLike): the path of the file
+        comment (str): the comment of the dictionary
+
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]):
+        self.path = path
+        with open(path, "rb") as fp:
+            if not os.fstat(fp.fileno()).st_size:
+                raise ValueError(
+                    f"{path} is not a dictionary saved by CommentedDict.dump"
+                )
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            self._count,
+            self._slots,
+            self._items_offset,
+            self._table_offset,
+            meta_offset,
+            meta_length,
+        ) = _header(self._map, path)
+        self.comment = _loads(self._map[meta_offset : meta_offset + meta_length])[
+            "comment"
+        ]
+
+    def __repr__(self) -> str:
+        return f"MappedCommentedDict({self.path!r}, {self._count} items)"
+
+    def __enter__(self) -> "MappedCommentedDict":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the memory map. The view cannot be used afterwards
+        :return: void
+        :rtype: void
+        """
+        self._map.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for i in range(self._count):
+            yield self._key(i)[0]
+
+    def __contains__(self, key: object) -> bool:
+        # as in CommentedDict, a CommentedKey is only in the dictionary with its comment and a plain key without one,
+        # whereas __getitem__ finds the item of a CommentedKey by its plain key
+        i = self._find(key)
+        if i is None:
+            return False
+        found = self._key(i)[0]
+        if isinstance(key, CommentedKey):
+            return isinstance(found, CommentedKey) and found.comment == key.comment
+        return not isinstance(found, CommentedKey)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        """
+        Get the value of a key, decoded from its record
+        :param key: the key or a CommentedKey
+        :type key: Hashable
+        :return: the value
+        :rtype: Any
+        :raises KeyError
+        """
+        i = self._find(key)
+        if i is None:
+            raise KeyError(key)
+        offset, length, _ = _ITEM.unpack_from(
+            self._map, self._items_offset + i * _ITEM.size
+        )
+        return _from_record(_loads(self._map[offset : offset + length]))[1]
+
+    def keys(self) -> d_keys:  # type: ignore[override]
+        """
+        Return the keys of the dictionary, without the comments of CommentedKeys
+        :return: the keys
+        :rtype: d_keys
+        """
+        return d_keys(self)
+
+    def copy(self) -> CommentedDict:
+        """
+        Load the whole dictionary into a CommentedDict
+        :return: the dictionary
+        :rtype: CommentedDict
+        """
+        return load(self.path)
+
+    def _key(self, i: int) -> Tuple[Hashable, Hashable]:
+        """
+        Read the key of an item
+        :param i: the item number
+        :type i: int
+        :return: the key, which may be a CommentedKey, and the key used to find it
+        :rtype: tuple
+        """
+        offset, _, key_length = _ITEM.unpack_from(
+            self._map, self._items_offset + i * _ITEM.size
+        )
+        key = _loads(self._map[offset + 1 : offset + 1 + key_length])
+        if key.__class__ is list:
+            commented = CommentedKey(key[0], key[1])
+            return commented, commented.key
+        return key, key
+
+    def _find(self, key: Any) -> Optional[int]:
+        """
+        Find the item of a key through the hash table. A CommentedKey only finds an item with a CommentedKey
+        :param key: the key
+        :type key: Any
+        :return: the item number or None if the key is not in the dictionary
+        :rtype: int or None
+        """
+        inner = key.key if isinstance(key, CommentedKey) else key
+        try:
+            key_hash = _key_hash(inner)
+        except TypeError:
+            return None
+        mask = self._slots - 1
+        slot = key_hash & mask
+        while True:
+            slot_hash, item = _SLOT.unpack_from(
+                self._map, self._table_offset + slot * _SLOT.size
+            )
+            if not item:
+                return None
+            if slot_hash == key_hash:
+                found, found_inner = self._key(item - 1)
+                if found_inner == inner and (
+                    isinstance(found, CommentedKey) or not isinstance(key, CommentedKey)
+                ):
+                    return item - 1
+            slot = (slot + 1) & mask
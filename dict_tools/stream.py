@@ -0,0 +1,630 @@
+"""Summarise the structure of JSON documents without loading them into memory"""
+import io
+import json
+import os
+import re
+from typing import IO, Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from dict_tools.schema import ELIDED, MAPPING, SEQUENCE, VALUE, SchemaNode
+from dict_tools.structure import _ELIDED_SCAN, _NO_LIMIT, DictionaryParser
+
+# number of characters read from the source at a time
+_CHUNK_SIZE = 1 << 16
+
+_SPACE = re.compile(r"[ \t\n\r]*")
+_TOKEN = re.compile(
+    r"([{}\[\],:\"])|(-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?)|(true|false|null|NaN|-?Infinity)"
+)
+_WORD = re.compile(r"[-+.\w]*")
+_SKIP = re.compile(r"[^\"{}\[\]]*")
+_STRING_BODY = re.compile(r"(?:[^\"\\]+|\\.)*", re.DOTALL)
+# longest token which may be split between chunks, i.e. -Infinity
+_LONGEST_LITERAL = 9
+# number of characters of the first element of an array which are kept to describe it as an example
+_EXAMPLE_CHARS = 1000
+
+_LITERAL_TYPES = {
+    "true": "bool",
+    "false": "bool",
+    "null": "NoneType",
+    "NaN": "float",
+    "Infinity": "float",
+    "-Infinity": "float",
+}
+_LITERAL_REPRS = {
+    "true": "True",
+    "false": "False",
+    "null": "None",
+    "NaN": "nan",
+    "Infinity": "inf",
+    "-Infinity": "-inf",
+}
+
+JSONSource = Union[str, "os.PathLike[str]", IO[str], IO[bytes]]
+
+
+class _Tokenizer:
+    """
+    Split a JSON document read from a file-like object into tokens
+
+    Only a chunk of the document is held at a time. Strings are skipped without being decoded unless their value is
+    needed, so long strings are not held in memory either.
+    """
+
+    __slots__ = ("fp", "chunkSize", "buffer", "pos", "offset", "eof", "records")
+
+    def __init__(self, fp: IO[str], chunkSize: int):
+        self.fp = fp
+        self.chunkSize = chunkSize
+        self.buffer = ""
+        self.pos = 0
+        # number of characters discarded from the start of the buffer
+        self.offset = 0
+        self.eof = False
+        # the values whose text is recorded, innermost last - the recorded text, the start of the rest of the value
+        # in the buffer and the number of characters which may still be recorded
+        self.records: List[List[Any]] = []
+
+    def _read(self) -> bool:
+        """
+        Discard the consumed text from the buffer and read the next chunk
+        :return: whether any text was read
+        :rtype: bool
+        """
+        chunk = self.fp.read(self.chunkSize)
+        for record in self.records:
+            self._keep(record)
+            record[1] = 0
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def error(self, message: str) -> ValueError:
+        """
+        Create the error for invalid JSON at the current position
+        :param message: what is wrong
+        :type message: str
+        :return: the error
+        :rtype: ValueError
+        """
+        return ValueError(f"{message} at character {self.offset + self.pos}")
+
+    def next(self, keep: bool = False) -> Tuple[str, Optional[str]]:
+        """
+        Read the next token. The kind of token is one of '{', '}', '[', ']', ',', ':', 's' for a string, 'n' for a
+        number, 'l' for true, false, null, NaN or Infinity and '' at the end of the document
+        :param keep: whether to decode the value of a string
+        :type keep: bool
+        :return: the kind of token and its text, if it is a number, a literal or a kept string
+        :rtype: tuple
+        """
+        while True:
+            self.pos = _SPACE.match(self.buffer, self.pos).end()  # type: ignore[union-attr]
+            match = _TOKEN.match(self.buffer, self.pos)
+            remaining = len(self.buffer) - self.pos
+            # a number or literal at the end of the buffer may continue in the next chunk
+            if match is not None and (
+                self.eof
+                or match.group(1)
+                or _WORD.match(self.buffer, self.pos).end() < len(self.buffer)  # type: ignore[union-attr]
+            ):
+                break
+            if self.eof:
+                if remaining:
+                    raise self.error("Invalid JSON")
+                return "", None
+            if match is None and remaining >= _LONGEST_LITERAL:
+                raise self.error("Invalid JSON")
+            self._read()
+        self.pos = match.end()
+        if match.group(1):
+            if match.group(1) == '"':
+                return "s", self._string(keep)
+            return match.group(1), None
+        if match.group(2):
+            return "n", match.group(2)
+        return "l", match.group(3)
+
+    def _string(self, keep: bool) -> Optional[str]:
+        """
+        Read the rest of a string whose opening quote has been read
+        :param keep: whether to decode the value of the string
+        :type keep: bool
+        :return: the value of the string if it is kept
+        :rtype: str or None
+        """
+        pieces = []
+        while True:
+            end = _STRING_BODY.match(self.buffer, self.pos).end()  # type: ignore[union-attr]
+            if keep:
+                pieces.append(self.buffer[self.pos : end])
+            self.pos = end
+            if end < len(self.buffer) and self.buffer[end] == '"':
+                self.pos += 1
+                return json.loads(f'"{"".join(pieces)}"') if keep else None
+            # the string, or an escape sequence, continues in the next chunk
+            if not self._read():
+                raise self.error("Unterminated string")
+
+    def skip(self, kind: str) -> None:
+        """
+        Skip the rest of an object or array whose opening token has been read
+        :param kind: the opening token
+        :type kind: str
+        :return: void
+        :rtype: void
+        """
+        depth = 1
+        while depth:
+            # jump to the next bracket or string, which may contain brackets
+            self.pos = _SKIP.match(self.buffer, self.pos).end()  # type: ignore[union-attr]
+            if self.pos == len(self.buffer):
+                if not self._read():
+                    raise self.error("Unexpected end of document")
+                continue
+            char = self.buffer[self.pos]
+            self.pos += 1
+            if char == '"':
+                self._string(False)
+            elif char in "{[":
+                depth += 1
+            else:
+                depth -= 1
+
+    def start_record(self) -> None:
+        """
+        Start recording the text of the object or array whose opening token has just been read. Only its first
+        _EXAMPLE_CHARS characters are kept
+        :return: void
+        :rtype: void
+        """
+        self.records.append([[], self.pos - 1, _EXAMPLE_CHARS])
+
+    def stop_record(self) -> Tuple[str, bool]:
+        """
+        Stop the innermost recording, once the value has been read
+        :return: the recorded text and whether it is the whole value
+        :rtype: tuple
+        """
+        record = self.records.pop()
+        self._keep(record)
+        return "".join(record[0]), record[2] >= 0
+
+    def _keep(self, record: List[Any]) -> None:
+        """
+        Add the text of a recorded value which has been read since the recording was last updated
+        :param record: the recording
+        :type record: list
+        :return: void
+        :rtype: void
+        """
+        pieces, mark, remaining = record
+        if remaining > 0:
+            pieces.append(self.buffer[mark : min(self.pos, mark + remaining)])
+        record[2] = remaining - (self.pos - mark)
+
+
+def _type_name(kind: str, text: Optional[str]) -> str:
+    """
+    Get the type name of a scalar token, as json.load would decode it
+    :param kind: the kind of token
+    :type kind: str
+    :param text: the text of the token
+    :type text: str or None
+    :return: the type name
+    :rtype: str
+    """
+    if kind == "s":
+        return "str"
+    if kind == "n":
+        return "float" if any(c in text for c in ".eE") else "int"  # type: ignore[operator]
+    return _LITERAL_TYPES[text]  # type: ignore[index]
+
+
+def _elide(tokens: _Tokenizer, kind: str) -> SchemaNode:
+    """
+    Read the remaining entries of an object without analysing them and describe them by an elision marker, in the same
+    way as DictionaryParser describes the entries it does not analyse
+    :param tokens: the tokenizer
+    :type tokens: _Tokenizer
+    :param kind: the token read before the remaining entries - '{', ',' or 's' for the key of the first of them
+    :type kind: str
+    :return: the elided node
+    :rtype: SchemaNode
+    """
+    n = 0
+    types: Set[str] = set()
+    key: Optional[str] = kind
+    if kind == "{" or kind == ",":
+        key = tokens.next()[0]
+        if kind == "{" and key == "}":
+            # the object is empty
+            key = None
+    while key is not None:
+        if key != "s":
+            raise tokens.error("Expecting a key")
+        if tokens.next()[0] != ":":
+            raise tokens.error("Expecting ':'")
+        kind, text = tokens.next()
+        if kind == "{" or kind == "[":
+            tokens.skip(kind)
+            name = "dict" if kind == "{" else "list"
+        elif kind in ("s", "n", "l"):
+            name = _type_name(kind, text)
+        else:
+            raise tokens.error("Expecting a value")
+        if n < _ELIDED_SCAN:
+            types.add(f"str->{name}")
+        n += 1
+        kind = tokens.next()[0]
+        if kind == "}":
+            break
+        if kind != ",":
+            raise tokens.error("Expecting ','")
+        key = tokens.next()[0]
+    return SchemaNode(
+        ELIDED,
+        "dict",
+        types=sorted(types),
+        length=n,
+        sampled=_ELIDED_SCAN if n > _ELIDED_SCAN else None,
+    )
+
+
+def _example(value: Any) -> str:
+    """
+    Describe the first element of a list in the same way as DictionaryParser
+    :param value: the element
+    :type value: Any
+    :return: the description
+    :rtype: str
+    """
+    if isinstance(value, str) and len(value) > 10:
+        value = f"{value[:10]}..."
+    return f"{value}"
+
+
+def _example_text(text: str, complete: bool) -> str:
+    """
+    Describe the first element of a list, which is an object or an array, from its JSON text in the same way as
+    DictionaryParser describes the decoded element. The description is built from the tokens of the text, and ends
+    with '...' if the text is not the whole element
+    :param text: the JSON text of the element
+    :type text: str
+    :param complete: whether the text is the whole element
+    :type complete: bool
+    :return: the description
+    :rtype: str
+    """
+    tokens = _Tokenizer(io.StringIO(text), max(len(text), 1))
+    pieces = []
+    try:
+        kind, value = tokens.next(keep=True)
+        while kind:
+            if kind == "s":
+                pieces.append(repr(value))
+            elif kind == "n":
+                pieces.append(repr(json.loads(value)))  # type: ignore[arg-type]
+            elif kind == "l":
+                pieces.append(_LITERAL_REPRS[value])  # type: ignore[index]
+            else:
+                pieces.append(kind + " " if kind in ",:" else kind)
+            kind, value = tokens.next(keep=True)
+    except ValueError:
+        # the text was cut short in a string
+        pass
+    return "".join(pieces) if complete else f"{''.join(pieces)}..."
+
+
+def _streaming_parser(parser: Optional[DictionaryParser]) -> DictionaryParser:
+    """
+    Get the parser whose options are used to analyse a document while it is read, checking that they can be
+    :param parser: the parser, or None for a parser with the default options
+    :type parser: DictionaryParser or None
+    :return: the parser
+    :rtype: DictionaryParser
+    """
+    parser = DictionaryParser() if parser is None else parser
+    if parser.showVariables or parser.mergeSchemas:
+        raise ValueError(
+            "showVariables and mergeSchemas need the whole document and are not supported when streaming"
+        )
+    if parser.maxScan is not None or parser.maxOutputChars is not None:
+        raise ValueError(
+            "maxScan and maxOutputChars are not supported when streaming, as every element of a list is read and the "
+            "output is only measured once it is rendered"
+        )
+    return parser
+
+
+def getSchema_json(
+    source: JSONSource,
+    parser: Optional[DictionaryParser] = None,
+    chunkSize: int = _CHUNK_SIZE,
+) -> SchemaNode:
+    """
+    Analyse the structure of a JSON document into a schema tree without loading the document
+
+    The tree is the same as the tree which parser.getSchema builds for the decoded document, but the document is read
+    a chunk at a time and values are discarded as soon as their type is known. Only the tree, the current chunk and
+    one entry per level of nesting are held in memory. The entries of objects deeper than maxDepth, or after the first
+    maxKeysPerMapping entries of an object, are skipped and described by elision markers, so the tree is bounded
+    however large the document is. Every element of a list is scanned, so the types of lists are exact and maxScan is
+    not supported. If examples are shown then the example of a list is built from the first 1000 characters of its
+    first element. A document which is an array is described as a list.
+    :param source: path to the JSON file or a file-like object in text or binary mode
+    :type source: str, os.PathLike or file-like object
+    :param parser: the parser whose options are used. showVariables, mergeSchemas, maxScan and maxOutputChars are not
+                   supported
+    :type parser: DictionaryParser or None
+    :param chunkSize: the number of characters to read at a time
+    :type chunkSize: int
+    :return: the root node of the tree
+    :rtype: SchemaNode
+    """
+    parser = _streaming_parser(parser)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as fp:
+            return _analyse(fp, parser, chunkSize)
+    if isinstance(source.read(0), bytes):
+        wrapper = io.TextIOWrapper(source, encoding="utf-8")  # type: ignore[arg-type]
+        try:
+            return _analyse(wrapper, parser, chunkSize)
+        finally:
+            # the source belongs to the caller, so it is not closed with the wrapper
+            wrapper.detach()
+    return _analyse(source, parser, chunkSize)  # type: ignore[arg-type]
+
+
+def getStructure_json(
+    source: JSONSource,
+    parser: Optional[DictionaryParser] = None,
+    chunkSize: int = _CHUNK_SIZE,
+) -> str:
+    """
+    Summarise the structure of a JSON document without loading the document. See getSchema_json
+    :param source: path to the JSON file or a file-like object in text or binary mode
+    :type source: str, os.PathLike or file-like object
+    :param parser: the parser whose options and renderer are used
+    :type parser: DictionaryParser or None
+    :param chunkSize: the number of characters to read at a time
+    :type chunkSize: int
+    :return: response
+    :rtype: str
+    """
+    return "".join(iter_structure_json(source, parser, chunkSize))
+
+
+def iter_structure_json(
+    source: JSONSource,
+    parser: Optional[DictionaryParser] = None,
+    chunkSize: int = _CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Summarise the structure of a JSON document as a stream of string chunks. See getSchema_json
+    :param source: path to the JSON file or a file-like object in text or binary mode
+    :type source: str, os.PathLike or file-like object
+    :param parser: the parser whose options and renderer are used
+    :type parser: DictionaryParser or None
+    :param chunkSize: the number of characters to read at a time
+    :type chunkSize: int
+    :return: generator of response chunks
+    :rtype: Iterator[str]
+    """
+    parser = DictionaryParser() if parser is None else parser
+    yield from parser.renderer.iter_render(getSchema_json(source, parser, chunkSize))
+
+
+def getSchema_jsonl(
+    source: JSONSource, parser: Optional[DictionaryParser] = None
+) -> SchemaNode:
+    """
+    Analyse the structure of a JSON Lines document into a schema tree, reading one record at a time
+
+    The records are described as a list, in the same way as parser.getStructure_list describes the list of decoded
+    records. Blank lines are skipped. Only the current record and the first record are held in memory.
+    :param source: path to the JSON Lines file or a file-like object in text or binary mode
+    :type source: str, os.PathLike or file-like object
+    :param parser: the parser whose options are used. showVariables, mergeSchemas, maxScan and maxOutputChars are not
+                   supported
+    :type parser: DictionaryParser or None
+    :return: the root node of the tree
+    :rtype: SchemaNode
+    """
+    parser = _streaming_parser(parser)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as fp:
+            return _analyse_lines(fp, parser)
+    if isinstance(source.read(0), bytes):
+        wrapper = io.TextIOWrapper(source, encoding="utf-8")  # type: ignore[arg-type]
+        try:
+            return _analyse_lines(wrapper, parser)
+        finally:
+            wrapper.detach()
+    return _analyse_lines(source, parser)  # type: ignore[arg-type]
+
+
+def _analyse_lines(fp: IO[str], parser: DictionaryParser) -> SchemaNode:
+    """
+    Analyse the structure of a JSON Lines document read from a text file-like object
+    :param fp: the file-like object
+    :type fp: IO[str]
+    :param parser: the parser whose options are used
+    :type parser: DictionaryParser
+    :return: the root node of the tree
+    :rtype: SchemaNode
+    """
+    root = SchemaNode(SEQUENCE, "list")
+    types: Dict[str, int] = {}
+    n = 0
+    for line_number, line in enumerate(fp, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}") from e
+        name = type(record).__name__
+        types[name] = types.get(name, 0) + 1
+        if n == 0:
+            if parser.showExamples:
+                root.example = _example(record)
+            if isinstance(record, dict):
+                root.children.append(parser._analyse(record))
+        n += 1
+    root.length = n
+    _set_types(root, types, parser)
+    return root
+
+
+def _set_types(
+    node: SchemaNode, types: Dict[str, int], parser: DictionaryParser
+) -> None:
+    """
+    Set the types of the elements of an array from the number of elements of each type. The description of the
+    first element is removed unless every element is an object
+    :param node: the array
+    :type node: SchemaNode
+    :param types: type name -> number of elements
+    :type types: dict
+    :param parser: the parser whose options are used
+    :type parser: DictionaryParser
+    :return: void
+    :rtype: void
+    """
+    node.types = sorted(types)
+    if parser.typeCounts:
+        node.counts = [types[name] for name in node.types]
+    if node.length == 0 or types.keys() != {"dict"}:
+        node.children.clear()
+
+
+def _analyse(fp: IO[str], parser: DictionaryParser, chunkSize: int) -> SchemaNode:
+    """
+    Analyse the structure of a JSON document read from a text file-like object
+
+    Each entry of the stack is an object or array which is part way through being read - its node, the number of
+    entries read so far, for an array the number of its elements of each type, its level and, if it is the first
+    element of an array whose example is shown, the array. The level is the number of objects which the entries of an
+    object, or the elements of an array, are nested in, as DictionaryParser counts levels for maxDepth. The entries of
+    an object which would be deeper than maxDepth, and the entries of an object after its first maxKeysPerMapping
+    entries, are read by _elide.
+
+    The text of the first element of an array is recorded while it is read if examples are shown, so the element is
+    read once however large it is and only the start of its text is kept for the example.
+    :param fp: the file-like object
+    :type fp: IO[str]
+    :param parser: the parser whose options are used
+    :type parser: DictionaryParser
+    :param chunkSize: the number of characters to read at a time
+    :type chunkSize: int
+    :return: the root node of the tree
+    :rtype: SchemaNode
+    """
+    tokens = _Tokenizer(fp, chunkSize)
+    examples = parser.showExamples
+    maxDepth = _NO_LIMIT if parser.maxDepth is None else parser.maxDepth
+    maxKeys = (
+        _NO_LIMIT if parser.maxKeysPerMapping is None else parser.maxKeysPerMapping
+    )
+    kind, _ = tokens.next()
+    stack: List[List[Any]]
+    if kind == "{":
+        root = SchemaNode(MAPPING, "dict")
+        if maxDepth <= 0:
+            root.children.append(_elide(tokens, kind))
+            stack = []
+        else:
+            stack = [[root, 0, None, 1, None]]
+    elif kind == "[":
+        root = SchemaNode(SEQUENCE, "list")
+        stack = [[root, 0, {}, 0, None]]
+    else:
+        raise TypeError(
+            "Only JSON documents which are an object or an array can be described"
+        )
+    while stack:
+        frame = stack[-1]
+        node: SchemaNode = frame[0]
+        types: Optional[Dict[str, int]] = frame[2]
+        index: int = frame[1]
+        depth: int = frame[3]
+        kind, text = tokens.next(keep=examples and index == 0 and types is not None)
+        if kind == ("}" if types is None else "]"):
+            stack.pop()
+            if types is not None:
+                node.length = index
+                _set_types(node, types, parser)
+            if frame[4] is not None:
+                frame[4].example = _example_text(*tokens.stop_record())
+            continue
+        if types is None and index >= maxKeys:
+            node.children.append(_elide(tokens, kind))
+            stack.pop()
+            if frame[4] is not None:
+                frame[4].example = _example_text(*tokens.stop_record())
+            continue
+        if index > 0:
+            if kind != ",":
+                raise tokens.error("Expecting ','")
+            kind, text = tokens.next(keep=False)
+        frame[1] = index + 1
+
+        if types is None:
+            # an entry of an object
+            if kind != "s":
+                raise tokens.error("Expecting a key")
+            if tokens.next()[0] != ":":
+                raise tokens.error("Expecting ':'")
+            kind, text = tokens.next()
+            if kind == "{":
+                child = SchemaNode(MAPPING, "dict", key="str")
+                if depth >= maxDepth:
+                    child.children.append(_elide(tokens, kind))
+                else:
+                    stack.append([child, 0, None, depth + 1, None])
+            elif kind == "[":
+                child = SchemaNode(SEQUENCE, "list", key="str")
+                stack.append([child, 0, {}, depth, None])
+            elif kind in ("s", "n", "l"):
+                child = SchemaNode(VALUE, _type_name(kind, text), key="str")
+            else:
+                raise tokens.error("Expecting a value")
+            node.children.append(child)
+            continue
+
+        # an element of an array
+        if kind == "{" or kind == "[":
+            name = "dict" if kind == "{" else "list"
+            types[name] = types.get(name, 0) + 1
+            recording = index == 0 and examples
+            if recording:
+                tokens.start_record()
+            if index == 0 and kind == "{":
+                # the first element describes the elements if they are all objects
+                element = SchemaNode(MAPPING, "dict")
+                node.children.append(element)
+                if depth < maxDepth:
+                    # the example is set when the element has been read
+                    stack.append(
+                        [element, 0, None, depth + 1, node if recording else None]
+                    )
+                    continue
+                element.children.append(_elide(tokens, kind))
+            else:
+                tokens.skip(kind)
+            if recording:
+                node.example = _example_text(*tokens.stop_record())
+        elif kind in ("s", "n", "l"):
+            name = _type_name(kind, text)
+            types[name] = types.get(name, 0) + 1
+            if index == 0 and examples:
+                node.example = _example(text if kind == "s" else json.loads(text))  # type: ignore[arg-type]
+        else:
+            raise tokens.error("Expecting a value")
+    if tokens.next()[0] != "":
+        raise tokens.error("Extra data")
+    return root
@@ -1,13 +1,327 @@
 """Print the dict_tools of a dictionary"""
-import random
-from collections import OrderedDict, defaultdict
-from typing import Any, Hashable, List, Mapping, Tuple, Union
+import sys
+from collections import Counter, OrderedDict, defaultdict, deque
+from collections.abc import Collection
+from itertools import chain, islice
+from math import log, log1p
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 from dict_tools.CommentedDict import CommentedDict
 from dict_tools.data_models import CommentedKey, CommentedValue
-from dict_tools.utils import sort_mixed_list
+from dict_tools.observers import ELEMENTS
+from dict_tools.schema import (
+    ELIDED,
+    MAPPING,
+    SEQUENCE,
+    UNION,
+    VALUE,
+    SchemaNode,
+    SchemaRenderer,
+    TextRenderer,
+    flatten,
+    unflatten,
+)
 
-random.seed(10)
+if TYPE_CHECKING:
+    import random
+
+    from dict_tools.observers import ParserObserver
+
+# keys are described as text whichever renderer the parser uses
+_KEY_RENDERER = TextRenderer()
+
+# the top level items are split into more shards than workers to balance the load
+_SHARDS_PER_WORKER = 4
+
+# number of items analysed between checks of the deadline of an incremental analysis
+_DEADLINE_CHECK = 32
+_NO_LIMIT = float("inf")
+
+# number of entries of a dictionary which are not analysed whose types are described by the elision marker
+_ELIDED_SCAN = 64
+
+# common types which are known not to be iterable, so is_iterable can be skipped
+_SCALAR_TYPES = frozenset({str, int, float, bool, complex, type(None)})
+
+# collections which are shown whole rather than by examples when variables are shown
+_WHOLE_TYPES = (str, bytes, bytearray, memoryview, Mapping)
+
+# marks the end of an iterator
+_MISSING = object()
+
+# types which are known not to export the buffer protocol, so _buffer_summary can be skipped
+_PLAIN_TYPES = _SCALAR_TYPES | {list, tuple, dict}
+
+# whether the instances of a type export the buffer protocol, found by trying the first instance seen
+_BUFFER_TYPES: Dict[type, bool] = {}
+
+
+def _example_key(value: Any) -> Tuple[int, Any]:
+    """
+    Get the key which sorts examples - numbers in order, then strings in order, then other values by their repr. Values
+    are not converted, so examples of any types can be sorted together
+    :param value: the example
+    :type value: Any
+    :return: the sort key
+    :rtype: tuple
+    """
+    if isinstance(value, (int, float)):
+        return 0, value
+    if isinstance(value, str):
+        return 1, value
+    return 2, repr(value)
+
+
+class _Combine:
+    """Marker used by DictionaryParser.fingerprint to combine the fingerprints of the children of an object"""
+
+    __slots__ = ("label", "n", "ordered", "unique", "ident")
+
+    def __init__(self, label: str, n: int, ordered: bool, unique: bool, ident: int):
+        self.label = label
+        self.n = n
+        self.ordered = ordered
+        self.unique = unique
+        self.ident = ident
+
+
+class _MergedKey:
+    """A key of a merged schema, which is described along with the number of records it appeared in"""
+
+    __slots__ = ("key", "count", "total")
+
+    def __init__(self, key: Hashable, count: int, total: int):
+        self.key = key
+        self.count = count
+        self.total = total
+
+
+class _ShapeKey(_MergedKey):
+    """One structure of the values of a key in a merged schema, described by the number of records with it"""
+
+    __slots__ = ()
+
+
+class _TypeUnion:
+    """The types of the simple (non-iterable) values of a key in a merged schema"""
+
+    __slots__ = ("names",)
+
+    def __init__(self, names: List[str]):
+        self.names = names
+
+
+class _ListGroup:
+    """A representative of all lists of one structure in a merged schema, along with their range of lengths"""
+
+    __slots__ = ("value", "lengths")
+
+    def __init__(
+        self,
+        value: Union[List[Any], Tuple[Any, ...], CommentedValue],
+        lengths: Tuple[int, int],
+    ):
+        self.value = value
+        self.lengths = lengths
+
+    def __iter__(self) -> Iterator[Any]:
+        value = self.value
+        return iter(value.value if isinstance(value, CommentedValue) else value)
+
+
+class _Shapes:
+    """
+    The values of a key in a merged schema which have several structures - the union of their types and one
+    representative of each structure of dictionary or list, keyed by _ShapeKeys
+    """
+
+    __slots__ = ("names", "variants")
+
+    def __init__(self, names: List[str], variants: "_MergedRecords"):
+        self.names = names
+        self.variants = variants
+
+
+def _path_key(key: Hashable) -> Hashable:
+    """
+    Get the key which is used in the paths of observer events - the key attribute of CommentedKeys and merged keys
+    :param key: the dictionary key
+    :type key: Hashable
+    :return: the key used in paths
+    :rtype: Hashable
+    """
+    while isinstance(key, (CommentedKey, _MergedKey)):
+        key = key.key
+    return key
+
+
+def _count(value: Any) -> int:
+    """
+    Get the number of items of a dictionary or elements of a list, which may be wrapped in a CommentedValue
+    :param value: the dictionary or list
+    :type value: Any
+    :return: the number of items or elements
+    :rtype: int
+    """
+    if isinstance(value, _ListGroup):
+        value = value.value
+    elif isinstance(value, _Shapes):
+        value = value.variants
+    if isinstance(value, CommentedValue):
+        value = value.value
+    return len(value)
+
+
+def _shape_summary(name: str, item: str, shape: Tuple[int, ...], nbytes: int) -> str:
+    """
+    Describe an array from its metadata, e.g. 'array [d] n=1000 nbytes=8000' or 'ndarray [float64] shape=(100, 3)
+    nbytes=2400'. Arrays of single bytes are described by their length only, e.g. 'bytes n=4096'
+    :param name: the name of the type
+    :type name: str
+    :param item: the type of the items, a struct format or a NumPy dtype
+    :type item: str
+    :param shape: the shape
+    :type shape: tuple
+    :param nbytes: the size of the data in bytes
+    :type nbytes: int
+    :return: the description
+    :rtype: str
+    """
+    if len(shape) != 1:
+        return f"{name} [{item}] shape={shape} nbytes={nbytes}"
+    if item in ("B", "uint8") and nbytes == shape[0]:
+        return f"{name} n={nbytes}"
+    return f"{name} [{item}] n={shape[0]} nbytes={nbytes}"
+
+
+def _buffer_summary(obj: Any) -> Optional[str]:
+    """
+    Describe an object which exports the buffer protocol, e.g. bytes, bytearray, memoryview or array.array, or a NumPy
+    array, from its type, item type, shape and size. The elements are not read, so the cost does not depend on the
+    size of the object. NumPy is not imported - if it has not been imported then there are no NumPy arrays
+    :param obj: the object
+    :type obj: Any
+    :return: the description, the name of the type if the buffer cannot be exported, e.g. of a released memoryview or
+             a closed mmap, or None if the object is not an array with at least one dimension
+    :rtype: str or None
+    """
+    cls = type(obj)
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(obj, numpy.ndarray):
+        return _shape_summary(cls.__name__, str(obj.dtype), obj.shape, obj.nbytes)
+    if _BUFFER_TYPES.get(cls) is False:
+        return None
+    try:
+        view = memoryview(obj)
+    except TypeError:
+        _BUFFER_TYPES[cls] = False
+        return None
+    except ValueError:
+        return cls.__name__
+    _BUFFER_TYPES[cls] = True
+    with view:
+        if view.ndim == 0:
+            return None
+        return _shape_summary(cls.__name__, view.format, view.shape or (), view.nbytes)
+
+
+def _type_pair(key: Hashable, value: Any) -> str:
+    """
+    Describe the types of a dictionary entry which is not analysed, e.g. 'str->int'
+    :param key: the key
+    :type key: Hashable
+    :param value: the value
+    :type value: Any
+    :return: the description
+    :rtype: str
+    """
+    if isinstance(key, _MergedKey):
+        key = key.key
+    if isinstance(value, (_TypeUnion, _Shapes)):
+        return f"{type(key).__name__}->{' | '.join(value.names)}"
+    if isinstance(value, _ListGroup):
+        value = value.value
+    return f"{type(key).__name__}->{type(value).__name__}"
+
+
+class _MergedRecords(Mapping):
+    """
+    The union of the keys of a list of dictionaries, or the structures of the values of one key, in the order they
+    are first seen. items() returns the list of (key, value) pairs
+    """
+
+    def __init__(self, pairs: List[Tuple[_MergedKey, Any]]):
+        self._pairs = pairs
+
+    def __getitem__(self, key: Hashable) -> Any:
+        for k, v in self._pairs:
+            if k.key == key:
+                return v
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[_MergedKey]:
+        return (k for k, _ in self._pairs)
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def items(self) -> List[Tuple[_MergedKey, Any]]:  # type: ignore[override]
+        return self._pairs
+
+
+class _BuildState:
+    """
+    The state of the analysis of a dictionary by DictionaryParser._resume, which is kept between the steps of an
+    incremental analysis
+
+    Attributes:
+        stack (list): the dictionaries which are part way through being analysed, see DictionaryParser._resume
+        frames (list): the observer frames of the entries of the stack
+        sizes (dict): the sizes of the text descriptions of the observed nodes
+        memo (dict): fingerprints of the values of the current top level item
+        count (int): the number of items analysed
+        chars (int): the number of characters of the text description of the items analysed, if it is limited
+
+    """
+
+    __slots__ = ("stack", "frames", "sizes", "memo", "count", "chars")
+
+    def __init__(
+        self,
+        stack: List[
+            Tuple[
+                Iterator[Tuple[int, Tuple[Any, Any]]],
+                List[SchemaNode],
+                Optional[Tuple],
+                SchemaNode,
+                Mapping,
+            ]
+        ],
+        frames: List[
+            Tuple[Tuple[Hashable, ...], Tuple[Hashable, ...], str, int, float]
+        ],
+        sizes: Dict[Tuple[int, int], int],
+    ):
+        self.stack = stack
+        self.frames = frames
+        self.sizes = sizes
+        self.memo: Dict[int, bytes] = {}
+        self.count = 0
+        self.chars = 0
 
 
 class DictionaryParser:
@@ -28,6 +342,17 @@ class DictionaryParser:
         showVariables: bool = False,
         nExamples: int = 3,
         whereExamples: str = "random",
+        maxScan: Optional[int] = None,
+        mergeSchemas: bool = False,
+        cacheSize: int = 0,
+        renderer: Optional[SchemaRenderer] = None,
+        workers: int = 0,
+        observer: Optional["ParserObserver"] = None,
+        maxDepth: Optional[int] = None,
+        maxKeysPerMapping: Optional[int] = None,
+        maxOutputChars: Optional[int] = None,
+        seed: Optional[int] = 10,
+        typeCounts: bool = False,
     ):
         """
         Init the Dictionary parser class
@@ -44,7 +369,64 @@ class DictionaryParser:
         :param whereExamples: where to sample examples of an iterable from is showVariables is True. Should be
                             'random', 'first' or 'last'
         :type whereExamples: str
+        :param maxScan: the maximum number of elements of a list to inspect when inferring the types it contains. Longer
+                        lists are randomly sampled and their types are marked as approximate with '~'. If None then
+                        every element is inspected
+        :type maxScan: int or None
+        :param mergeSchemas: If True, a list of dictionaries is described by the union of the keys of all its
+                             dictionaries (or of the maxScan sampled dictionaries) rather than by its first dictionary.
+                             Each key is shown with the number of dictionaries it appears in
+        :type mergeSchemas: bool
+        :param cacheSize: the maximum number of analysed nested dictionaries (and lists of dictionaries) to keep in a
+                          least recently used cache keyed by their structural fingerprint. Repeated structures are then
+                          only analysed once, within and across calls. Not used if showExamples or showVariables is
+                          True, or if any of maxDepth, maxKeysPerMapping and maxOutputChars is set, as the fingerprint
+                          walks the whole value, or if maxScan is set, as the fingerprint would be computed from a
+                          different random sample to the one described. If 0 then there is no cache. If the cache is
+                          used, then workers is ignored so that the cache is shared by every dictionary analysed
+        :type cacheSize: int
+        :param renderer: the renderer which turns the schema tree into the response. Defaults to a TextRenderer
+        :type renderer: SchemaRenderer or None
+        :param workers: the number of processes across which the top level items of a dictionary are analysed. The items
+                        and values must be picklable. Not used if elements are sampled at random, i.e. if maxScan is set
+                        or random examples are shown, so the response is the same as the serial response. The dictionary
+                        is also analysed in this process if the cache is used (see cacheSize), as each worker would have
+                        its own empty cache. If 0 or 1 then the dictionary is analysed in this process
+        :type workers: int
+        :param observer: observer which is told when the analysis of each dictionary and list starts and finishes,
+                         e.g. a ProfileObserver to find the slowest paths. The dictionary is analysed in this process
+                         if there is an observer. If None then there is no overhead
+        :type observer: ParserObserver or None
+        :param maxDepth: the maximum number of levels of nested dictionaries to analyse, where the entries of the
+                         dictionary itself are level 1. The entries of deeper dictionaries are not walked and are
+                         described by an elision marker, e.g. '... 12 more keys (types: str->int)'. If None then
+                         every level is analysed
+        :type maxDepth: int or None
+        :param maxKeysPerMapping: the maximum number of entries of each dictionary to analyse. The remaining entries
+                                  are not walked and are described by an elision marker. If None then every entry is
+                                  analysed
+        :type maxKeysPerMapping: int or None
+        :param maxOutputChars: the number of characters of the text description after which the analysis stops. The
+                               entries which have not been analysed are described by elision markers, so the output
+                               can be slightly longer than the limit. The dictionary is analysed in this process if
+                               it is set. If None then the output is not limited
+        :type maxOutputChars: int or None
+        :param seed: the seed of the generator of the random examples and samples of the parser, so that descriptions
+                     are reproducible. Each parser has its own generator, so parsers do not change each other's
+                     examples or the state of the random module. If None then it is seeded from the operating system
+        :type seed: int or None
+        :param typeCounts: If True, the types of the elements of a list are shown with the number and proportion of
+                           the elements (or sampled elements) of each type, e.g. 'list [NoneType 1 (0.1%), int 999
+                           (99.9%)] n=1000'. Not shown for lists whose schemas are merged
+        :type typeCounts: bool
         """
+        for name, limit, least in (
+            ("maxDepth", maxDepth, 1),
+            ("maxKeysPerMapping", maxKeysPerMapping, 0),
+            ("maxOutputChars", maxOutputChars, 0),
+        ):
+            if limit is not None and limit < least:
+                raise ValueError(f"{name} must be at least {least} : not {limit}")
         self.dictionary: Union[dict, None] = None
         self.response: Union[dict, None] = None
         self.nTabs: int = 0
@@ -55,6 +437,22 @@ class DictionaryParser:
         self.showVariables = showVariables
         self.nExamples = nExamples
         self.whereExamples = whereExamples
+        self.maxScan = maxScan
+        self.mergeSchemas = mergeSchemas
+        self.cacheSize = cacheSize
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        self._cache: "OrderedDict[Tuple, SchemaNode]" = OrderedDict()
+        self.renderer = TextRenderer() if renderer is None else renderer
+        self.workers = workers
+        self.observer = observer
+        self.maxDepth = maxDepth
+        self.maxKeysPerMapping = maxKeysPerMapping
+        self.maxOutputChars = maxOutputChars
+        self.seed = seed
+        self.typeCounts = typeCounts
+        # created on first use so that random is only imported if needed
+        self._rng: Optional["random.Random"] = None
         self.is_ordered = False
 
     def incrementTab(self) -> None:
@@ -65,7 +463,7 @@ class DictionaryParser:
         :rtype: void
         """
         self.nTabs += 1
-        self.tabs = "".join(["\t"] * self.nTabs)
+        self.tabs = "\t" * self.nTabs
 
     def decrementTab(self) -> None:
         r"""
@@ -75,7 +473,7 @@ class DictionaryParser:
         :rtype: void
         """
         self.nTabs -= 1
-        self.tabs = "".join(["\t"] * self.nTabs)
+        self.tabs = "\t" * self.nTabs
 
     def getStructure(self, dictionary: Mapping) -> str:
         """
@@ -85,12 +483,84 @@ class DictionaryParser:
         :return: response
         :rtype: str
         """
-        response = """"""
-        response = self.check_default_dict(dictionary=dictionary, response=response)
-        response = self.check_ordered_dict(dictionary=dictionary, response=response)
-        response = self.check_commented_dict(dictionary=dictionary, response=response)
-        response = self.getStructure_dict(dictionary, response)
-        return response
+        return self.renderer.render(self.getSchema(dictionary))
+
+    def writeStructure(self, dictionary: Mapping, out: TextIO) -> int:
+        """
+        Write the structure of the dictionary to a file-like object as it is rendered, rather than building the
+        whole response in memory
+        :param dictionary: the dictionary object to parse
+        :type dictionary: Mapping
+        :param out: file-like object with a write method e.g. an open file, sys.stdout or io.StringIO
+        :type out: TextIO
+        :return: the number of characters written
+        :rtype: int
+        """
+        return self.renderer.write(self.getSchema(dictionary), out)
+
+    def iter_structure(self, dictionary: Mapping) -> Iterator[str]:
+        """
+        Generate the structure of the dictionary as a stream of string chunks. Joining the chunks gives the same
+        response as getStructure.
+        :param dictionary: the dictionary object to parse
+        :type dictionary: Mapping
+        :return: generator of response chunks
+        :rtype: Iterator[str]
+        """
+        yield from self.renderer.iter_render(self.getSchema(dictionary))
+
+    def getSchema(self, dictionary: Mapping) -> SchemaNode:
+        """
+        Analyse the structure of the dictionary into a schema tree. The tree can be inspected, compared and rendered
+        any number of times without walking the dictionary again
+        :param dictionary: the dictionary object to parse
+        :type dictionary: Mapping
+        :return: the root node of the tree
+        :rtype: SchemaNode
+        """
+        self.nTabs = 0
+        self.tabs = ""
+        notes = self._notes(dictionary)
+        if self.observer is not None:
+            root = self._analyse_observed(dictionary)
+        elif (
+            self.workers > 1
+            and not self._cached()
+            and self.maxScan is None
+            and self.maxOutputChars is None
+            and not (self.showVariables and self.whereExamples == "random")
+        ):
+            root = self._analyse_parallel(dictionary)
+        else:
+            root = self._analyse(dictionary)
+        root.notes = notes or None
+        return root
+
+    def incremental(self, dictionary: Mapping) -> "IncrementalAnalysis":
+        """
+        Start an analysis of the structure of the dictionary which runs in steps under a time or node budget and can
+        be resumed, e.g. to return a partial summary within a latency target. See IncrementalAnalysis
+        :param dictionary: the dictionary object to parse
+        :type dictionary: Mapping
+        :return: the analysis, which has not analysed any items yet
+        :rtype: IncrementalAnalysis
+        """
+        return IncrementalAnalysis(self, dictionary)
+
+    def _notes(self, dictionary: Mapping) -> List[str]:
+        """
+        Get the notes about the type of the dictionary which are shown in the summary. Sets is_ordered
+        :param dictionary: the dictionary
+        :type dictionary: Mapping
+        :return: the notes
+        :rtype: list of str
+        """
+        notes = [
+            self.check_default_dict(dictionary=dictionary, response=""),
+            self.check_ordered_dict(dictionary=dictionary, response=""),
+            self.check_commented_dict(dictionary=dictionary, response=""),
+        ]
+        return [note[1:] for note in notes if note]
 
     @staticmethod
     def check_commented_dict(dictionary: Mapping, response: str) -> str:
@@ -112,7 +582,7 @@ class DictionaryParser:
         """
         Check if the dictionary is an ordered dict and if so add a statement to say so
 
-        If ordered dict, then set self.is_ordered to True
+        self.is_ordered is set to True if the dictionary is an ordered dict, else False
         :param dictionary: the input dictionary
         :type dictionary: Mapping
         :param response: the response string so far
@@ -120,9 +590,9 @@ class DictionaryParser:
         :return: response
         :rtype: str
         """
-        if isinstance(dictionary, OrderedDict):
+        self.is_ordered = isinstance(dictionary, OrderedDict)
+        if self.is_ordered:
             response = response + "\nOrderedDict"
-            self.is_ordered = True
         return response
 
     @staticmethod
@@ -155,10 +625,7 @@ class DictionaryParser:
         """
         Summarise the structure of a dictionary
 
-        Iterate over the key : value pairs. If the value is not iterable (excluding strings) then the response is
-        appended with the key and value type. If the value is iterable (list, tuple, ...) then the iterable itself is
-        unpacked and described. If the value is another dictionary then the function becomes recursive as this function
-        is called again on the sub-dictionary.
+        See iter_structure_dict for details.
         :param dictionary: The dictionary to unpack and describe
         :type dictionary: dict
         :param response: the response string so far
@@ -170,66 +637,567 @@ class DictionaryParser:
         :return: the updated response
         :rtype: str
         """
-        is_commented_value = False
-        comment = None
-        if k is None:
-            response = response + f"\n{self.tabs}{{\n"
-        else:
-            if isinstance(dictionary, CommentedValue):
-                response = (
-                    response
-                    + f"{self.tabs}{idx}{self.gtnk(k)} : {type(dictionary).__name__} [{{\n"
-                )
-                comment = dictionary.comment
-                dictionary = dictionary.value
-                is_commented_value = True
-            else:
-                response = response + f"{self.tabs}{idx}{self.gtnk(k)} : {{\n"
-        if isinstance(dictionary, Mapping):
-            self.incrementTab()
-            for i, (key, value) in enumerate(dictionary.items()):
-                idx = f"{i+1}-> " if self.is_ordered else ""
-
-                if (
-                    not isinstance(value, CommentedValue)
-                    and not self.is_iterable(value)
-                ) or (
-                    isinstance(value, CommentedValue)
-                    and not self.is_iterable(value.value)
-                ):
-                    response = (
-                        response
-                        + f"{self.tabs}{idx}{self.gtnk(key)} : {self.gtn(value)}\n"
+        return response + "".join(self.iter_structure_dict(dictionary, k, idx))
+
+    def iter_structure_dict(
+        self,
+        dictionary: Union[Mapping, CommentedValue],
+        k: Hashable = None,
+        idx: str = "",
+    ) -> Iterator[str]:
+        """
+        Summarise the structure of a dictionary as a stream of string chunks
+
+        The dictionary is analysed into a schema tree which is then rendered at the current number of tabs.
+        :param dictionary: The dictionary to unpack and describe
+        :type dictionary: dict
+        :param k: if the input dictionary is a value, then k is the key
+        :type k: hashable object
+        :param idx: index of the key if the value is a dictionary, e.g. '2-> '
+        :type idx: str
+        :return: generator of response chunks
+        :rtype: Iterator[str]
+        """
+        index = int(idx.split("->")[0]) if idx else None
+        node = self._analyse(dictionary, None if k is None else self.gtnk(k), index)
+        yield from self.renderer.iter_render(node, self.nTabs)
+
+    def _analyse(
+        self,
+        dictionary: Union[Mapping, CommentedValue],
+        key: Optional[str] = None,
+        index: Optional[int] = None,
+    ) -> SchemaNode:
+        """
+        Analyse a dictionary into a schema tree
+        :param dictionary: the dictionary, which may be wrapped in a CommentedValue
+        :type dictionary: Mapping or CommentedValue
+        :param key: description of the key if the dictionary is a value
+        :type key: str or None
+        :param index: index of the key if the dictionary is a value of an ordered dictionary
+        :type index: int or None
+        :return: the node describing the dictionary
+        :rtype: SchemaNode
+        """
+        node, mapping = self._mapping_node(dictionary, key, index)
+        self._build(node, mapping)
+        return node
+
+    def _analyse_observed(self, dictionary: Mapping) -> SchemaNode:
+        """
+        Analyse a dictionary into a schema tree, telling the observer when the analysis of the dictionary and of each
+        dictionary and list nested in it starts and finishes
+        :param dictionary: the dictionary
+        :type dictionary: Mapping
+        :return: the node describing the dictionary
+        :rtype: SchemaNode
+        """
+        observer: Any = self.observer
+        start = perf_counter()
+        node, mapping = self._mapping_node(dictionary, None, None)
+        observer.enter((), MAPPING, len(mapping))
+        sizes: Dict[Tuple[int, int], int] = {}
+        self._build(node, mapping, sizes=sizes)
+        observer.exit(
+            (),
+            MAPPING,
+            len(mapping),
+            perf_counter() - start,
+            _KEY_RENDERER.measure(node, 0, sizes),
+        )
+        return node
+
+    def _analyse_parallel(self, dictionary: Mapping) -> SchemaNode:
+        """
+        Analyse a dictionary into a schema tree, with its top level items split into contiguous shards which are
+        analysed in a pool of worker processes. The nodes of the shards are joined in the order of the items, so the
+        tree is the same as the tree of the serial analysis
+        :param dictionary: the dictionary
+        :type dictionary: Mapping
+        :return: the node describing the dictionary
+        :rtype: SchemaNode
+        """
+        node, mapping = self._mapping_node(dictionary, None, None)
+        items = list(islice(mapping.items(), self.maxKeysPerMapping))
+        n_shards = min(len(items), self.workers * _SHARDS_PER_WORKER)
+        if n_shards < 2:
+            self._build(node, mapping)
+            return node
+        size = -(-len(items) // n_shards)
+        starts = range(0, len(items), size)
+        options = self.options()
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for children in executor.map(
+                _analyse_shard,
+                [options] * len(starts),
+                [self.is_ordered] * len(starts),
+                starts,
+                [items[start : start + size] for start in starts],
+            ):
+                node.children.extend(unflatten(children))
+        if len(items) < len(mapping):
+            node.children.append(self._elided(mapping, len(items)))
+        return node
+
+    def options(self) -> Dict[str, Any]:
+        """
+        Get the options of the parser which control the analysis, so that an equivalent parser can be created
+        :return: keyword arguments for DictionaryParser
+        :rtype: dict
+        """
+        return dict(
+            showExamples=self.showExamples,
+            showKeyComments=self.showKeyComments,
+            showValueComments=self.showValueComments,
+            showVariables=self.showVariables,
+            nExamples=self.nExamples,
+            whereExamples=self.whereExamples,
+            maxScan=self.maxScan,
+            mergeSchemas=self.mergeSchemas,
+            cacheSize=self.cacheSize,
+            maxDepth=self.maxDepth,
+            maxKeysPerMapping=self.maxKeysPerMapping,
+            maxOutputChars=self.maxOutputChars,
+            seed=self.seed,
+            typeCounts=self.typeCounts,
+        )
+
+    def _mapping_node(
+        self,
+        value: Union[Mapping, CommentedValue],
+        key: Optional[str],
+        index: Optional[int],
+    ) -> Tuple[SchemaNode, Mapping]:
+        """
+        Create the node for a dictionary, without its children
+        :param value: the dictionary, which may be wrapped in a CommentedValue
+        :type value: Mapping or CommentedValue
+        :param key: description of the key if the dictionary is a value
+        :type key: str or None
+        :param index: index of the key if the dictionary is a value of an ordered dictionary
+        :type index: int or None
+        :return: the node and the unwrapped dictionary
+        :rtype: tuple
+        """
+        mapping = value.value if isinstance(value, CommentedValue) else value
+        if not isinstance(mapping, Mapping):
+            raise TypeError(
+                f"Only objects of type Mapping should be passed here. Not objects of type {type(value)}"
+            )
+        node = SchemaNode(MAPPING, type(mapping).__name__, key=key, index=index)
+        if isinstance(value, CommentedValue):
+            node.wrapper = type(value).__name__
+            node.comment = value.comment
+        return node, mapping
+
+    def _build(
+        self,
+        node: SchemaNode,
+        mapping: Mapping,
+        path: Tuple[Hashable, ...] = (),
+        sizes: Optional[Dict[Tuple[int, int], int]] = None,
+    ) -> None:
+        """
+        Add the nodes describing the items of a dictionary to its node
+        :param node: the node of the dictionary
+        :type node: SchemaNode
+        :param mapping: the dictionary
+        :type mapping: Mapping
+        :param path: the path of the items of the dictionary, used in observer events
+        :type path: tuple
+        :param sizes: the sizes of the text descriptions of the nodes which have been observed, keyed by (id of node,
+                      depth), so that each node is only measured once
+        :type sizes: dict or None
+        :return: void
+        :rtype: void
+        """
+        self._resume(self._start_build(node, mapping, path, sizes))
+
+    def _start_build(
+        self,
+        node: SchemaNode,
+        mapping: Mapping,
+        path: Tuple[Hashable, ...] = (),
+        sizes: Optional[Dict[Tuple[int, int], int]] = None,
+    ) -> "_BuildState":
+        """
+        Prepare to add the nodes describing the items of a dictionary to its node. See _resume
+        :param node: the node of the dictionary
+        :type node: SchemaNode
+        :param mapping: the dictionary
+        :type mapping: Mapping
+        :param path: the path of the items of the dictionary, used in observer events
+        :type path: tuple
+        :param sizes: the sizes of the text descriptions of the nodes which have been observed
+        :type sizes: dict or None
+        :return: the state of the analysis
+        :rtype: _BuildState
+        """
+        return _BuildState(
+            [(self._items(mapping), node.children, None, node, mapping)],
+            [(path, path, MAPPING, len(mapping), 0.0)],
+            {} if sizes is None else sizes,
+        )
+
+    def _resume(
+        self,
+        state: "_BuildState",
+        maxNodes: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ) -> bool:
+        """
+        Add the nodes describing the items of a dictionary to its node, until they have all been added or a budget
+        runs out
+
+        Each entry of the stack is a dictionary which is part way through being analysed - the iterator over its
+        items, the list of child nodes to add to, the cache key of the node, the node and the dictionary. When a nested
+        dictionary is found, the current dictionary is suspended and the nested one is pushed on to the stack, so the
+        nesting depth is not limited by the interpreter recursion limit.
+
+        Each item adds one child node, so when a dictionary is popped from the stack with fewer children than items,
+        its remaining items were not analysed because of maxKeysPerMapping or maxOutputChars and an elision marker is
+        added. The dictionaries nested deeper than maxDepth are not pushed, only described by an elision marker.
+
+        If the parser has an observer, a frame is kept alongside each entry of the stack with the path of its items
+        and what is needed for the event when its analysis finishes.
+
+        The budget is counted in items, each of which adds one node. When it runs out, the next item is put back in
+        front of its iterator, so the analysis can be resumed with the same state. The deadline is checked before the
+        first item and then every _DEADLINE_CHECK items, and a single list is always analysed in one go.
+        :param state: the state of the analysis
+        :type state: _BuildState
+        :param maxNodes: the number of items to analyse, or None for no limit
+        :type maxNodes: int or None
+        :param deadline: the perf_counter time by which to stop, or None for no limit
+        :type deadline: float or None
+        :return: True if the analysis has finished
+        :rtype: bool
+        """
+        observer = self.observer
+        frames, sizes, memo, stack = state.frames, state.sizes, state.memo, state.stack
+        start = 0.0
+        maxDepth = _NO_LIMIT if self.maxDepth is None else self.maxDepth
+        sized = self.maxOutputChars is not None
+        cache = self._cached()
+        count = state.count
+        stop = _NO_LIMIT if maxNodes is None else count + maxNodes
+        # with a deadline, it is checked before the first item so that a step which starts late does no work
+        limit = stop if deadline is None else count
+        # the unions of a merged schema group the structures of a key, so they are not counted in the depth
+        unions = sum(1 for entry in stack if entry[3].kind == UNION)
+        while stack:
+            if len(stack) == 1:
+                memo.clear()
+            items, children = stack[-1][:2]
+            for i, (key, value) in items:
+                if count >= limit:
+                    if count >= stop or perf_counter() >= deadline:  # type: ignore[operator]
+                        stack[-1] = (chain([(i, (key, value))], items),) + stack[-1][1:]
+                        state.count = count
+                        return False
+                    limit = min(stop, count + _DEADLINE_CHECK)
+                count += 1
+                index = i if self.is_ordered else None
+                inner = value.value if isinstance(value, CommentedValue) else value
+
+                if type(inner) in _SCALAR_TYPES:
+                    children.append(
+                        SchemaNode(
+                            VALUE, self.gtn(value), key=self.gtnk(key), index=index
+                        )
+                    )
+                    if sized and self._spend(state, children[-1]):
+                        break
+                    continue
+                if not isinstance(inner, (list, tuple, _ListGroup, dict, _Shapes)):
+                    # other values, including sets and buffers, are described by gtn without being walked
+                    children.append(
+                        SchemaNode(
+                            VALUE, self.gtn(value), key=self.gtnk(key), index=index
+                        )
+                    )
+                    if sized and self._spend(state, children[-1]):
+                        break
+                    continue
+                if observer is not None:
+                    start = perf_counter()
+                label = self.gtnk(key)
+                cache_key: Optional[Tuple] = None
+                if cache and (
+                    isinstance(inner, dict)
+                    or (
+                        isinstance(inner, (list, tuple))
+                        and len(inner) > 0
+                        and type(inner[0]) is dict
                     )
-                elif isinstance(value, (list, tuple)) or (
-                    isinstance(value, CommentedValue)
-                    and isinstance(value.value, (list, tuple))
-                ):
-                    r = self.getStructure_list(value)
-                    response = response + f"{self.tabs}{idx}{self.gtnk(key)} : {r}\n"
-                elif isinstance(value, dict) or (
-                    isinstance(value, CommentedValue) and isinstance(value.value, dict)
                 ):
-                    response = self.getStructure_dict(value, response, key, idx)
+                    cache_key = (
+                        self._fingerprint(value, exact=True, memo=memo),
+                        self.is_ordered,
+                        self.mergeSchemas,
+                        self.maxScan,
+                        self.typeCounts,
+                    )
+                    cached = self._cache_get(cache_key)
+                    if cached is not None:
+                        children.append(cached.replace(key=label, index=index))
+                        if observer is not None:
+                            self._observe_leaf(
+                                frames,
+                                key,
+                                inner,
+                                children[-1],
+                                start,
+                                len(stack),
+                                sizes,
+                            )
+                        continue
+                nested: Optional[Mapping]
+                if isinstance(inner, dict):
+                    child, nested = self._mapping_node(value, label, index)
+                    target = child
+                elif isinstance(inner, _Shapes):
+                    child = SchemaNode(
+                        UNION, " | ".join(inner.names), key=label, index=index
+                    )
+                    nested, target = inner.variants, child
                 else:
-                    print(f"Unknown object of type {type(value)}")
-                    response = (
-                        response
-                        + f"{self.tabs}{idx}{self.gtnk(key)} : {self.gtn(value)}\n"
+                    child, nested = self._sequence_node(value, label, index)
+                    target = child.children[0] if child.children else child
+                children.append(child)
+                spent = sized and self._spend(state, child)
+                if nested is not None and (
+                    spent
+                    or (len(stack) - unions >= maxDepth and child.kind != UNION)
+                ):
+                    target.children.append(self._elided(nested, 0))
+                    nested = None
+                if nested is not None:
+                    if child.kind == UNION:
+                        unions += 1
+                    stack.append(
+                        (
+                            self._items(nested),
+                            target.children,
+                            cache_key,
+                            child,
+                            nested,
+                        )
                     )
-            self.decrementTab()
-            if is_commented_value:
-                response = response + f"{self.tabs}}}] <{comment}>\n"
+                    if observer is not None:
+                        child_path = frames[-1][0] + (_path_key(key),)
+                        if child.kind == MAPPING:
+                            items_path = child_path
+                        elif child.kind == UNION:
+                            # the paths of the structures of a union are the path of its key
+                            items_path = frames[-1][0]
+                        else:
+                            items_path = child_path + (ELEMENTS,)
+                        frames.append(
+                            (items_path, child_path, child.kind, _count(inner), start)
+                        )
+                        if child.kind != UNION:
+                            observer.enter(child_path, child.kind, frames[-1][3])
+                    break
+                if observer is not None:
+                    self._observe_leaf(
+                        frames, key, inner, child, start, len(stack), sizes
+                    )
+                if cache_key is not None:
+                    self._cache_put(cache_key, child)
+                if spent:
+                    break
             else:
-                response = response + f"{self.tabs}}}\n"
-            return response
-        raise TypeError(
-            f"Only objects of type Mapping should be passed here. Not objects of type {type(dictionary)}"
+                _, children, cache_key, child, mapping = stack.pop()
+                if child.kind == UNION:
+                    unions -= 1
+                if len(children) < len(mapping):
+                    children.append(self._elided(mapping, len(children)))
+                if cache_key is not None:
+                    self._cache_put(cache_key, child)
+                if observer is not None:
+                    _, child_path, kind, n, started = frames.pop()
+                    if stack and kind != UNION:
+                        # the depth of the node is the number of dictionaries it is nested in
+                        size = sizes[(id(child), len(stack))] = _KEY_RENDERER.measure(
+                            child, len(stack), sizes
+                        )
+                        observer.exit(
+                            child_path, kind, n, perf_counter() - started, size
+                        )
+        state.count = count
+        return True
+
+    def _items(self, mapping: Mapping) -> Iterator[Tuple[int, Tuple[Any, Any]]]:
+        """
+        Get the numbered items of a dictionary which should be analysed, i.e. the first maxKeysPerMapping items
+        :param mapping: the dictionary
+        :type mapping: Mapping
+        :return: iterator of (position, (key, value)), with positions from 1
+        :rtype: Iterator
+        """
+        if self.maxKeysPerMapping is None:
+            return enumerate(mapping.items(), 1)
+        return enumerate(islice(mapping.items(), self.maxKeysPerMapping), 1)
+
+    def _elided(self, mapping: Mapping, shown: int) -> SchemaNode:
+        """
+        Describe the items of a dictionary which are not analysed, from the types of the first _ELIDED_SCAN of them
+        :param mapping: the dictionary
+        :type mapping: Mapping
+        :param shown: the number of items which were analysed, which come before the elided items
+        :type shown: int
+        :return: the elided node
+        :rtype: SchemaNode
+        """
+        n = len(mapping) - shown
+        types = sorted(
+            {
+                _type_pair(key, value)
+                for key, value in islice(mapping.items(), shown, shown + _ELIDED_SCAN)
+            }
+        )
+        return SchemaNode(
+            ELIDED,
+            type(mapping).__name__,
+            types=types,
+            length=n,
+            sampled=_ELIDED_SCAN if n > _ELIDED_SCAN else None,
+        )
+
+    def _spend(self, state: "_BuildState", node: SchemaNode) -> bool:
+        """
+        Add the size of the text description of a node which has just been added to the size of the output. If the
+        output is then longer than maxOutputChars, the analysis stops - the iterators of the items of the dictionaries
+        on the stack are emptied, so that they are popped with elision markers for their remaining items
+        :param state: the state of the analysis
+        :type state: _BuildState
+        :param node: the node, without its children
+        :type node: SchemaNode
+        :return: True if the analysis stops
+        :rtype: bool
+        """
+        stack = state.stack
+        state.chars += _KEY_RENDERER.measure(node, len(stack))
+        if state.chars <= self.maxOutputChars:  # type: ignore[operator]
+            return False
+        stack[:] = [(iter(()),) + entry[1:] for entry in stack]  # type: ignore[misc]
+        return True
+
+    def _observe_leaf(
+        self,
+        frames: List[
+            Tuple[Tuple[Hashable, ...], Tuple[Hashable, ...], str, int, float]
+        ],
+        key: Hashable,
+        value: Any,
+        node: SchemaNode,
+        start: float,
+        depth: int,
+        sizes: Dict[Tuple[int, int], int],
+    ) -> None:
+        """
+        Tell the observer about a dictionary or list whose analysis started and finished without nesting, i.e. a list
+        which does not contain dictionaries or a node from the cache
+        :param frames: the frames of the dictionaries being analysed
+        :type frames: list
+        :param key: the key of the dictionary or list
+        :type key: Hashable
+        :param value: the dictionary or list
+        :type value: Any
+        :param node: the node describing it
+        :type node: SchemaNode
+        :param start: when its analysis started
+        :type start: float
+        :param depth: the depth of the node
+        :type depth: int
+        :param sizes: the sizes of the text descriptions of the observed nodes
+        :type sizes: dict
+        :return: void
+        :rtype: void
+        """
+        observer: Any = self.observer
+        path = frames[-1][0] + (_path_key(key),)
+        count = _count(value)
+        observer.enter(path, node.kind, count)
+        size = sizes[(id(node), depth)] = _KEY_RENDERER.measure(node, depth, sizes)
+        observer.exit(path, node.kind, count, perf_counter() - start, size)
+
+    def _cached(self) -> bool:
+        """
+        Whether analysed dictionaries are cached with the current options, see cacheSize
+        :return: True if the cache is used
+        :rtype: bool
+        """
+        return self.cacheSize > 0 and not (
+            self.showExamples
+            or self.showVariables
+            or self.maxScan is not None
+            or self.maxDepth is not None
+            or self.maxKeysPerMapping is not None
+            or self.maxOutputChars is not None
+        )
+
+    def _cache_get(self, key: Tuple) -> Optional[SchemaNode]:
+        """
+        Get a cached node and mark it as most recently used
+        :param key: the cache key, which includes the exact fingerprint of the value
+        :type key: tuple
+        :return: the node or None if it is not cached
+        :rtype: SchemaNode or None
+        """
+        cached = self._cache.get(key)
+        if cached is None:
+            self.cacheMisses += 1
+        else:
+            self.cacheHits += 1
+            self._cache.move_to_end(key)
+        return cached
+
+    def _cache_put(self, key: Tuple, node: SchemaNode) -> None:
+        """
+        Cache a node, evicting the least recently used node if the cache is full
+        :param key: the cache key, which includes the exact fingerprint of the value
+        :type key: tuple
+        :param node: the node describing the value
+        :type node: SchemaNode
+        :return: void
+        :rtype: void
+        """
+        self._cache[key] = node
+        if len(self._cache) > self.cacheSize:
+            self._cache.popitem(last=False)
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Get the statistics of the cache of analysed repeated structures
+        :return: the number of hits and misses, the maximum size and the current size of the cache
+        :rtype: dict
+        """
+        return dict(
+            hits=self.cacheHits,
+            misses=self.cacheMisses,
+            maxsize=self.cacheSize,
+            currsize=len(self._cache),
         )
 
+    def clear_cache(self) -> None:
+        """
+        Empty the cache of analysed repeated structures and reset its statistics
+        :return: void
+        :rtype: void
+        """
+        self._cache.clear()
+        self.cacheHits = 0
+        self.cacheMisses = 0
+
     def gtn(self, obj: Any, blockVariable: bool = False) -> str:
         """
         gtn -> short for getTypeName
+        Buffers and NumPy arrays are described by their item type, shape and size unless blockVariable is True, e.g.
+        'ndarray [float64] shape=(100, 3) nbytes=2400'
         :param obj: object to get the type of as a string
         :type obj: Any
         :param blockVariable: If True, then showVariable class parameter is blocked
@@ -237,14 +1205,18 @@ class DictionaryParser:
         :return: type
         :rtype: str
         """
+        if isinstance(obj, _TypeUnion):
+            return " | ".join(obj.names)
         if self.showVariables and not blockVariable:
             return self.gtn_with_variable(obj=obj)
         if isinstance(obj, CommentedValue):
             response = f"{type(obj).__name__} [{self.gtn(obj.value)}]"
             if self.showValueComments:
                 response = response + f" <{obj.comment}>"
-        else:
+        elif blockVariable or type(obj) in _PLAIN_TYPES:
             response = type(obj).__name__
+        else:
+            response = _buffer_summary(obj) or type(obj).__name__
         return response
 
     def gtn_with_variable(self, obj: Any) -> str:
@@ -255,32 +1227,103 @@ class DictionaryParser:
         :return: type
         :rtype: str
         """
+        # the elements of buffers are not shown, as they are often large binary data
+        summary = None if type(obj) in _PLAIN_TYPES else _buffer_summary(obj)
         if isinstance(obj, CommentedValue):
             response = f"{type(obj).__name__} [{self.gtn(obj.value)}]"
             if self.showValueComments:
                 response = response + f" <{obj.comment}>"
+        elif summary is not None:
+            response = summary
+        elif isinstance(obj, Collection) and not isinstance(obj, _WHOLE_TYPES):
+            response = f"{type(obj).__name__} <{self.sample_examples(obj)}>"
         else:
-            if isinstance(obj, (tuple, list)):
-                items: Union[Tuple[Any, ...], List[Any]] = (
-                    () if isinstance(obj, tuple) else []
-                )  # for mypy
-                if self.whereExamples == "random":
-                    items = random.sample(obj, k=self.nExamples)
-                    items.sort(key=sort_mixed_list)
-                elif self.whereExamples == "first":
-                    items = obj[: self.nExamples]
-                elif self.whereExamples == "last":
-                    items = obj[self.nExamples * -1 :]
-                else:
-                    raise ValueError(
-                        f"self.whereExamples must be one of 'random', 'first' or 'last' : "
-                        f"not {self.whereExamples}"
-                    )
-                response = f"{type(obj).__name__} <{items}>"
-            else:
-                response = f"{type(obj).__name__} <{obj}>"
+            response = f"{type(obj).__name__} <{obj!s}>"
         return response
 
+    def sample_examples(self, obj: Collection) -> Union[List[Any], Tuple[Any, ...]]:
+        """
+        Get nExamples elements of a collection to show as examples, from the place given by whereExamples. Random
+        examples are sorted, numbers first
+
+        Sequences which can be indexed in constant time, e.g. lists, tuples, ranges and arrays, are sampled by index,
+        which costs O(nExamples) whatever their length. The first or last elements of a list or tuple are a slice of
+        it. Other collections, e.g. sets, dictionary views and deques, whose middle elements take O(n) to index, are
+        sampled in one pass over their elements, with reservoir sampling for random examples. The first or last
+        elements of a deque are read from its ends.
+        :param obj: the collection
+        :type obj: Collection
+        :return: the examples
+        :rtype: list or tuple
+        """
+        k = max(min(self.nExamples, len(obj)), 0)
+        where = self.whereExamples
+        if where not in ("random", "first", "last"):
+            raise ValueError(
+                f"self.whereExamples must be one of 'random', 'first' or 'last' : "
+                f"not {self.whereExamples}"
+            )
+        if isinstance(obj, (list, tuple)) and where != "random":
+            return obj[:k] if where == "first" else obj[len(obj) - k :]
+        if hasattr(obj, "__getitem__") and not isinstance(obj, deque):
+            n = len(obj)
+            if where == "random":
+                indices: Iterable[int] = self._random().sample(range(n), k)
+            else:
+                indices = range(k) if where == "first" else range(n - k, n)
+            items = [obj[i] for i in indices]  # type: ignore[index]
+        elif where == "random":
+            items = self._reservoir(obj, k)
+        elif where == "first":
+            items = list(islice(obj, k))
+        elif isinstance(obj, deque):
+            items = list(islice(reversed(obj), k))[::-1]
+        else:
+            items = list(deque(obj, maxlen=k))
+        if where == "random":
+            items.sort(key=_example_key)
+        return items
+
+    def _reservoir(self, iterable: Iterable[Any], k: int) -> List[Any]:
+        """
+        Sample k elements of an iterable at random in one pass, with Algorithm L of reservoir sampling. The number of
+        random numbers drawn grows with log(n / k) rather than with n, and the elements which are skipped are skipped
+        by islice
+        :param iterable: the iterable
+        :type iterable: Iterable
+        :param k: the number of elements to sample
+        :type k: int
+        :return: the sampled elements, in no particular order
+        :rtype: list
+        """
+        it = iter(iterable)
+        sample = list(islice(it, k))
+        if k == 0 or len(sample) < k:
+            return sample
+        rng = self._random()
+        w = 1.0
+        while True:
+            w *= (1.0 - rng.random()) ** (1 / k)
+            if w >= 1.0:
+                continue
+            skip = int(log(1.0 - rng.random()) / log1p(-w))
+            value = next(islice(it, skip, None), _MISSING)
+            if value is _MISSING:
+                return sample
+            sample[rng.randrange(k)] = value
+
+    def _random(self) -> "random.Random":
+        """
+        Get the generator of the random examples and samples of the parser, seeded with seed
+        :return: the generator
+        :rtype: random.Random
+        """
+        if self._rng is None:
+            import random
+
+            self._rng = random.Random(self.seed)
+        return self._rng
+
     def gtnk(self, obj: Any) -> str:
         """
         gtnk -> short for getTypeNameKey
@@ -291,6 +1334,10 @@ class DictionaryParser:
         :return: type
         :rtype: str
         """
+        if isinstance(obj, _ShapeKey):
+            return f"({obj.count}/{obj.total})"
+        if isinstance(obj, _MergedKey):
+            return f"{self.gtnk(obj.key)} ({obj.count}/{obj.total})"
         if self.showVariables:
             return self.gtnk_with_variable(obj=obj)
         if isinstance(obj, CommentedKey):
@@ -298,7 +1345,7 @@ class DictionaryParser:
             if self.showKeyComments:
                 response = response + f" <{obj.comment}>"
         elif isinstance(obj, tuple):
-            response = self.getStructure_list(obj)
+            response = _KEY_RENDERER.render(self._analyse_list(obj), self.nTabs)
         else:
             response = type(obj).__name__
         return response
@@ -318,7 +1365,7 @@ class DictionaryParser:
             if self.showKeyComments:
                 response = response + f" <{obj.comment}>"
         elif isinstance(obj, tuple):
-            response = self.getStructure_list(obj)
+            response = _KEY_RENDERER.render(self._analyse_list(obj), self.nTabs)
         else:
             response = f"{type(obj).__name__} <{obj}>"
         return response
@@ -334,45 +1381,345 @@ class DictionaryParser:
         :return: response
         :rtype: str
         """
-        is_commented_value: bool = False
+        return "".join(self.iter_structure_list(my_list))
+
+    def iter_structure_list(
+        self, my_list: Union[List[Any], Tuple[Any, ...], CommentedValue]
+    ) -> Iterator[str]:
+        """
+        Get the dict_tools of a list element as a stream of string chunks. If every element of the list is a
+        dictionary then the structure of the first element is described.
+        :param my_list: the list to be investigated
+        :type my_list: list of any type
+        :return: generator of response chunks
+        :rtype: Iterator[str]
+        """
+        yield from self.renderer.iter_render(self._analyse_list(my_list), self.nTabs)
+
+    def _analyse_list(
+        self, my_list: Union[List[Any], Tuple[Any, ...], CommentedValue]
+    ) -> SchemaNode:
+        """
+        Analyse a list into a schema tree
+        :param my_list: the list to be investigated
+        :type my_list: list of any type
+        :return: the node describing the list
+        :rtype: SchemaNode
+        """
+        node, nested = self._sequence_node(my_list, None, None)
+        if nested is not None:
+            self._build(node.children[0], nested, path=(ELEMENTS,))
+        return node
+
+    def _sequence_node(
+        self,
+        my_list: Union[List[Any], Tuple[Any, ...], CommentedValue, _ListGroup],
+        key: Optional[str],
+        index: Optional[int],
+    ) -> Tuple[SchemaNode, Optional[Mapping]]:
+        """
+        Create the node for a list. If every element of the list is a dictionary then the node has a single child for
+        the elements, whose children still need to be added from the returned dictionary. This is the first element,
+        or the merged elements if schemas are merged.
+        :param my_list: the list to be investigated
+        :type my_list: list of any type
+        :param key: description of the key if the list is a value
+        :type key: str or None
+        :param index: index of the key if the list is a value of an ordered dictionary
+        :type index: int or None
+        :return: the node and the dictionary describing the elements or None
+        :rtype: tuple
+        """
+        lengths: Optional[Tuple[int, int]] = None
+        if isinstance(my_list, _ListGroup):
+            lengths = my_list.lengths
+            my_list = my_list.value
+        wrapper = comment = None
         if isinstance(my_list, CommentedValue):
-            is_commented_value = True
-            name = type(my_list).__name__
+            wrapper = type(my_list).__name__
             comment = my_list.comment
             my_list = my_list.value
-        else:
-            name = None
-            comment = None
 
         assert isinstance(
             my_list, (tuple, list)
         ), f"Got {type(my_list)} instead of tuple or list!"
         n = len(my_list)
-        types = list({self.gtn(x, blockVariable=True) for x in my_list})
-        types.sort()
-        l_type = self.gtn(my_list)
-        if all(x == "dict" for x in types):
-            r = self.getStructure_dict(my_list[0], "")
-        else:
-            r = None
-        if l_type == "list":
-            if r is None:
-                response = f"{l_type} [{', '.join(types)}] n={n}"
+        elements = self.sample_elements(my_list)
+        histogram = self.type_histogram(elements)
+        types = list(histogram)
+        example: Optional[str] = None
+        if self.showExamples and n > 0:
+            first_element = my_list[0]
+            if isinstance(first_element, str) and len(first_element) > 10:
+                first_element = f"{first_element[:10]}..."
+            example = f"{first_element}"
+        node = SchemaNode(
+            SEQUENCE,
+            self.gtn(my_list),
+            key=key,
+            index=index,
+            types=types,
+            length=n if lengths is None else lengths,
+            sampled=len(elements) if len(elements) < n else None,
+            wrapper=wrapper,
+            comment=comment,
+            example=example,
+            counts=list(histogram.values())
+            if self.typeCounts and lengths is None
+            else None,
+        )
+        nested: Optional[Mapping] = None
+        if n > 0 and all(x == "dict" for x in types):
+            if self.mergeSchemas:
+                nested = self.merge_records(elements)
             else:
-                response = f"{l_type} [{r}{self.tabs}] n={n}"
-        else:
-            if r is None:
-                response = f"{l_type} ({', '.join(types)}) n={n}"
+                nested = my_list[0] if type(my_list[0]) is dict else elements[0]
+            node.children.append(SchemaNode(MAPPING, "dict"))
+        return node, nested
+
+    def type_histogram(
+        self, my_list: Union[List[Any], Tuple[Any, ...]]
+    ) -> Dict[str, int]:
+        """
+        Count the elements of a list by the description of their type, e.g. {'NoneType': 1, 'int': 999}
+
+        The elements are counted by their type with a Counter over map(type, ...), which runs in C without building a
+        string per element. Only the elements whose description depends on their value, i.e. CommentedValues, are
+        described one by one.
+        :param my_list: the elements
+        :type my_list: list or tuple
+        :return: the number of elements of each type, sorted by the description of the type
+        :rtype: dict
+        """
+        counts: Dict[str, int] = {}
+        for cls, n in Counter(map(type, my_list)).items():
+            if issubclass(cls, (CommentedValue, _TypeUnion)):
+                for name, m in Counter(
+                    self.gtn(x, blockVariable=True) for x in my_list if type(x) is cls
+                ).items():
+                    counts[name] = counts.get(name, 0) + m
             else:
-                response = f"{l_type} ({r}{self.tabs}) n={n}"
-        if self.showExamples and len(my_list) > 0:
-            example = my_list[0]
-            if isinstance(example, str):
-                example = f"{example[:10]}..." if len(example) > 10 else example
-            response = response + f" e.g. {example}"
-        if is_commented_value:
-            response = f"{name} [" + response + f"] <{comment}>"
-        return response
+                counts[cls.__name__] = counts.get(cls.__name__, 0) + n
+        return {name: counts[name] for name in sorted(counts)}
+
+    def sample_elements(
+        self, my_list: Union[List[Any], Tuple[Any, ...]]
+    ) -> Union[List[Any], Tuple[Any, ...]]:
+        """
+        Return the elements of a list which should be used to infer the types it contains
+
+        If maxScan is None or the list has no more than maxScan elements then the whole list is returned and the types
+        are exact. Otherwise, maxScan elements are sampled at random, which costs O(maxScan) rather than O(n).
+        :param my_list: the list to be investigated
+        :type my_list: list or tuple
+        :return: the elements to inspect
+        :rtype: list or tuple
+        """
+        n = len(my_list)
+        if self.maxScan is None or n <= self.maxScan:
+            return my_list
+        return [
+            my_list[i] for i in sorted(self._random().sample(range(n), k=self.maxScan))
+        ]
+
+    def merge_records(
+        self, records: Union[List[Mapping], Tuple[Mapping, ...]]
+    ) -> _MergedRecords:
+        """
+        Merge a list of dictionaries into a single schema in one pass over the records
+
+        The schema has the union of the keys of the records, in the order they are first seen, each with the number of
+        records it appears in. The simple values of a key are described by the set of their types. Nested dictionaries
+        and lists are grouped by their structural fingerprint and one representative of each structure is described,
+        so records which share a structure cost one description between them. The lengths of grouped lists are
+        reported as a range. If the values of a key have more than one structure then the key is described by the
+        union of their types, and each structure of dictionary or list is listed under it with the number of records
+        which have it.
+        :param records: the dictionaries to merge
+        :type records: list of dictionaries
+        :return: the merged schema
+        :rtype: _MergedRecords
+        """
+        # key -> (type name -> count for simple values, fingerprint -> [representative, count, min length,
+        # max length] for nested values)
+        stats: Dict[Hashable, Tuple[Dict[str, int], Dict[bytes, List[Any]]]] = {}
+        for record in records:
+            for key, value in record.items():
+                key_stats = stats.get(key)
+                if key_stats is None:
+                    key_stats = stats[key] = ({}, {})
+                inner = value.value if isinstance(value, CommentedValue) else value
+                if not isinstance(inner, (list, tuple, dict)):
+                    name = self.gtn(value, blockVariable=True)
+                    key_stats[0][name] = key_stats[0].get(name, 0) + 1
+                    continue
+                fp = self.fingerprint(value)
+                n = len(inner) if isinstance(inner, (list, tuple)) else 0
+                group = key_stats[1].get(fp)
+                if group is None:
+                    key_stats[1][fp] = [value, 1, n, n]
+                else:
+                    group[1] += 1
+                    group[2] = min(group[2], n)
+                    group[3] = max(group[3], n)
+
+        total = len(records)
+        pairs: List[Tuple[_MergedKey, Any]] = []
+        for key, (names, groups) in stats.items():
+            shapes: List[Tuple[_MergedKey, Any]] = []
+            for value, count, min_n, max_n in groups.values():
+                if not isinstance(value, dict) and not isinstance(
+                    getattr(value, "value", None), dict
+                ):
+                    value = _ListGroup(value, (min_n, max_n))
+                shapes.append((_ShapeKey(key, count, total), value))
+            present = sum(names.values()) + sum(k.count for k, _ in shapes)
+            if not shapes:
+                pairs.append(
+                    (_MergedKey(key, present, total), _TypeUnion(sorted(names)))
+                )
+            elif len(shapes) == 1 and not names:
+                pairs.append((_MergedKey(key, present, total), shapes[0][1]))
+            else:
+                for _, value in shapes:
+                    value = value.value if isinstance(value, _ListGroup) else value
+                    name = self.gtn(value, blockVariable=True)
+                    names[name] = names.get(name, 0) + 1
+                pairs.append(
+                    (
+                        _MergedKey(key, present, total),
+                        _Shapes(sorted(names), _MergedRecords(shapes)),
+                    )
+                )
+        return _MergedRecords(pairs)
+
+    def fingerprint(self, obj: Any) -> bytes:
+        """
+        Compute a structural fingerprint of an object
+
+        The fingerprint depends on the key types, the value types and the nesting of the object, but not on the values
+        themselves or the lengths of lists. Objects with the same fingerprint are described the same way, apart from
+        the lengths of their lists. The object is walked with an explicit stack so any depth of nesting is supported.
+        :param obj: the object to fingerprint
+        :type obj: Any
+        :return: a 16 byte digest
+        :rtype: bytes
+        """
+        return self._fingerprint(obj, exact=False)
+
+    def _fingerprint(
+        self, obj: Any, exact: bool, memo: Optional[Dict[int, bytes]] = None
+    ) -> bytes:
+        """
+        Compute the fingerprint of an object
+
+        If exact is True, then the fingerprint also depends on everything else which changes the description of the
+        object - the lengths of lists, the structure of their first elements and, if schemas are merged or types are
+        counted, how many elements of each structure they contain. If schemas are merged, the order of the elements
+        matters too, as the keys are listed in the order they are first seen. Objects with the same exact fingerprint
+        have the same description.
+        :param obj: the object to fingerprint
+        :type obj: Any
+        :param exact: True if the fingerprint should identify the description of the object
+        :type exact: bool
+        :param memo: fingerprints of lists and dictionaries already computed, by id. Fingerprints of nested lists and
+                     dictionaries are added to it
+        :type memo: dict or None
+        :return: a 16 byte digest
+        :rtype: bytes
+        """
+        if memo is None:
+            memo = {}
+        elif id(obj) in memo:
+            return memo[id(obj)]
+        import hashlib
+
+        # a stack entry is either an object still to be fingerprinted or, once its children have been pushed,
+        # a _Combine marker describing how to combine the fingerprints of its children
+        stack: List[Any] = [obj]
+        done: List[bytes] = []
+        # the description of simple values and keys only depends on their type unless variables are shown
+        by_type = not self.showVariables
+        leaves: Dict[type, bytes] = {}
+        while stack:
+            item = stack.pop()
+            item_type = type(item)
+            if by_type and item_type in _SCALAR_TYPES:
+                digest = leaves.get(item_type)
+                if digest is None:
+                    digest = leaves[item_type] = hashlib.blake2b(
+                        item_type.__name__.encode(), digest_size=16
+                    ).digest()
+                done.append(digest)
+                continue
+            if item_type is _Combine:
+                children = done[len(done) - item.n :]
+                del done[len(done) - item.n :]
+                if not item.ordered:
+                    # lists are described by the set of their element types, so order does not matter, but an
+                    # exact fingerprint keeps the first element which is described for a list of dictionaries
+                    first = children[:1] if exact else []
+                    rest = children[1:] if exact else children
+                    children = first + sorted(set(rest) if item.unique else rest)
+                h = hashlib.blake2b(item.label.encode(), digest_size=16)
+                for child in children:
+                    h.update(child)
+                done.append(h.digest())
+                memo[item.ident] = done[-1]
+                continue
+            ident = id(item)
+            if ident in memo:
+                done.append(memo[ident])
+                continue
+            if isinstance(item, CommentedValue):
+                label = f"{type(item).__name__} <{item.comment}> "
+                inner = item.value
+            else:
+                label = ""
+                inner = item
+            if isinstance(inner, dict):
+                keys = "\0".join(
+                    type(k).__name__
+                    if by_type and type(k) in _SCALAR_TYPES
+                    else self.gtnk(k)
+                    for k in inner
+                )
+                stack.append(
+                    _Combine(
+                        f"{label}{type(inner).__name__}{{{keys}",
+                        len(inner),
+                        True,
+                        True,
+                        ident,
+                    )
+                )
+                stack.extend(reversed(list(inner.values())))
+            elif isinstance(inner, (list, tuple)):
+                if exact:
+                    elements = self.sample_elements(inner)
+                    children = [inner[0]] + list(elements) if inner else []
+                    label = f"{label}{type(inner).__name__}[{len(inner)}"
+                else:
+                    children = list(inner)
+                    label = f"{label}{type(inner).__name__}["
+                stack.append(
+                    _Combine(
+                        label,
+                        len(children),
+                        # merged schemas list the keys in the order the dictionaries are first seen
+                        exact and self.mergeSchemas,
+                        not (exact and (self.mergeSchemas or self.typeCounts)),
+                        ident,
+                    )
+                )
+                stack.extend(reversed(children))
+            else:
+                name = self.gtn(inner, blockVariable=True)
+                if exact:
+                    name = _buffer_summary(inner) or name
+                name = label + name
+                done.append(hashlib.blake2b(name.encode(), digest_size=16).digest())
+        return done[0]
 
     @staticmethod
     def is_iterable(obj: Any) -> bool:
@@ -393,3 +1740,158 @@ class DictionaryParser:
             return False
         else:
             return True
+
+
+class IncrementalAnalysis:
+    """
+    Analysis of the structure of a dictionary which runs in steps under a budget and can be resumed
+
+    Each call of run analyses items of the dictionary until all of them have been analysed or the budget of the call
+    runs out - a number of items, each of which adds one node to the schema, or a time limit. The schema can be
+    rendered between steps. Until the analysis is done it describes the items analysed so far and its notes say that
+    it is truncated. The result of a finished analysis is the same as DictionaryParser.getSchema, except that the
+    dictionary is always analysed in this process.
+
+    e.g.
+    analysis = parser.incremental(payload)
+    analysis.run(timeout=0.05)
+    preview = analysis.getStructure()  # partial if analysis.done is False
+    ...
+    analysis.run()  # finish later
+
+    In an asyncio event loop, run_async analyses a chunk of items at a time and yields to the loop between chunks.
+
+    The dictionary should not be changed until the analysis is done. The time limit is checked every few items and a
+    list is always analysed in one step, so a step can overrun by the time taken by one list. If the parser has an
+    observer, the times it is told include the time between steps.
+
+    Attributes:
+        parser (DictionaryParser): the parser whose options are used
+        schema (SchemaNode): the root node of the schema, complete once the analysis is done
+        done (bool): whether every item has been analysed
+        nodes (int): the number of items analysed
+
+    """
+
+    def __init__(self, parser: DictionaryParser, dictionary: Mapping):
+        self.parser = parser
+        self._notes = parser._notes(dictionary)
+        self._is_ordered = parser.is_ordered
+        self.schema, mapping = parser._mapping_node(dictionary, None, None)
+        self._count = len(mapping)
+        self._state = parser._start_build(self.schema, mapping)
+        self._started = perf_counter()
+        if parser.observer is not None:
+            parser.observer.enter((), MAPPING, self._count)
+        self.done = False
+        self._update_notes()
+
+    def __repr__(self) -> str:
+        return f"IncrementalAnalysis(nodes={self.nodes}, done={self.done})"
+
+    @property
+    def nodes(self) -> int:
+        return self._state.count
+
+    def run(
+        self, maxNodes: Optional[int] = None, timeout: Optional[float] = None
+    ) -> SchemaNode:
+        """
+        Analyse items of the dictionary until the analysis is done or the budget runs out
+        :param maxNodes: the maximum number of items to analyse in this step, or None for no limit
+        :type maxNodes: int or None
+        :param timeout: the number of seconds after which to stop, or None for no limit
+        :type timeout: float or None
+        :return: the schema, which is partial if the analysis is not done
+        :rtype: SchemaNode
+        """
+        if self.done:
+            return self.schema
+        parser = self.parser
+        parser.is_ordered = self._is_ordered
+        deadline = None if timeout is None else perf_counter() + timeout
+        self.done = parser._resume(self._state, maxNodes, deadline)
+        if self.done and parser.observer is not None:
+            parser.observer.exit(
+                (),
+                MAPPING,
+                self._count,
+                perf_counter() - self._started,
+                _KEY_RENDERER.measure(self.schema, 0, self._state.sizes),
+            )
+        self._update_notes()
+        return self.schema
+
+    async def run_async(
+        self, chunkNodes: int = 1000, timeout: Optional[float] = None
+    ) -> SchemaNode:
+        """
+        Analyse the dictionary a chunk of items at a time, yielding to the asyncio event loop between chunks, until
+        the analysis is done or the time limit is reached
+        :param chunkNodes: the number of items to analyse between yields
+        :type chunkNodes: int
+        :param timeout: the number of seconds after which to stop, or None for no limit
+        :type timeout: float or None
+        :return: the schema, which is partial if the analysis is not done
+        :rtype: SchemaNode
+        """
+        import asyncio
+
+        deadline = None if timeout is None else perf_counter() + timeout
+        while not self.done:
+            remaining = None if deadline is None else deadline - perf_counter()
+            if remaining is not None and remaining <= 0:
+                break
+            self.run(chunkNodes, remaining)
+            await asyncio.sleep(0)
+        return self.schema
+
+    def getStructure(self) -> str:
+        """
+        Render the schema analysed so far with the renderer of the parser
+        :return: response
+        :rtype: str
+        """
+        return self.parser.renderer.render(self.schema)
+
+    def _update_notes(self) -> None:
+        """
+        Set the notes of the schema, with a note that it is truncated if the analysis is not done
+        :return: void
+        :rtype: void
+        """
+        notes = list(self._notes)
+        if not self.done:
+            notes.append(
+                f"Truncated after {self.nodes} items, the analysis can be resumed"
+            )
+        self.schema.notes = notes or None
+
+
+def _analyse_shard(
+    options: Dict[str, Any],
+    is_ordered: bool,
+    start: int,
+    items: List[Tuple[Any, Any]],
+) -> List[Tuple[Any, ...]]:
+    """
+    Analyse a shard of the top level items of a dictionary in a worker process
+    :param options: the options of the parser
+    :type options: dict
+    :param is_ordered: whether the dictionary is ordered
+    :type is_ordered: bool
+    :param start: the position of the first item of the shard in the dictionary
+    :type start: int
+    :param items: the items of the shard
+    :type items: list of tuples
+    :return: the nodes describing the items, flattened to be quick to send back
+    :rtype: list of tuples
+    """
+    parser = DictionaryParser(**options)
+    parser.is_ordered = is_ordered
+    node = SchemaNode(MAPPING, "dict")
+    parser._build(node, dict(items))
+    for child in node.children:
+        if child.index is not None:
+            child.index += start
+    return flatten(node.children)
@@ -1,5 +1,23 @@
-from functools import reduce
-from typing import Hashable, List, Optional, Tuple, Union
+from functools import lru_cache
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+# the maximum number of compiled paths and tries of paths which are cached
+_PATH_CACHE_SIZE = 1024
+
+# marks that no default value was given
+_MISSING = object()
 
 
 def prettyType(obj: object) -> str:
@@ -34,6 +52,77 @@ def sort_mixed_list(
         return 1, num, ""
 
 
+class CompiledPath:
+    """
+    A reusable getter for a value in a nested dictionary
+
+    Created by compile_path. Calling the getter with a dictionary walks the keys of the path from the root.
+
+    Attributes:
+        keys (tuple): the keys of the path, in order of appearance in the dictionary
+        label (str): description of the path used in errors
+
+    """
+
+    __slots__ = ("keys", "label")
+
+    def __init__(self, keys: Tuple[Hashable, ...], label: str):
+        self.keys = keys
+        self.label = label
+
+    def __call__(self, data: Mapping) -> Any:
+        """
+        Get the value at the path
+        :param data: the nested dictionary
+        :type data: Mapping
+        :return: the value after moving through the nested dictionary via the keys
+        :rtype: Any
+        :raises KeyError
+        """
+        value: Any = data
+        try:
+            for key in self.keys:
+                value = value[key]
+        except KeyError:
+            raise KeyError(f"One of the keys in {self.label} is not in the dictionary!")
+        return value
+
+    def __repr__(self) -> str:
+        return f"CompiledPath({self.keys!r})"
+
+
+@lru_cache(maxsize=_PATH_CACHE_SIZE)
+def _compile_string(path: str, path_sep: str) -> CompiledPath:
+    return CompiledPath(tuple(path.split(path_sep)), path)
+
+
+@lru_cache(maxsize=_PATH_CACHE_SIZE)
+def _compile_keys(keys: Tuple[Hashable, ...]) -> CompiledPath:
+    return CompiledPath(keys, str(list(keys)))
+
+
+def compile_path(
+    path: Union[str, Sequence[Hashable]], path_sep: str = "/"
+) -> CompiledPath:
+    """
+    Compile a path into a reusable getter for values in nested dictionaries
+
+    The path can be provided as a string of keys joined by path_sep, if all the keys are strings, or as a sequence of
+    keys. Compiled paths are kept in a least recently used cache, so compiling the same path again is cheap.
+    e.g. compile_path("a/b")({"a": {"b": 1}}) -> 1
+
+    :param path: string of concatenated keys or sequence of keys
+    :type path: str or sequence
+    :param path_sep: the separator to use if keys provided as a string
+    :type path_sep: str
+    :return: the getter
+    :rtype: CompiledPath
+    """
+    if isinstance(path, str):
+        return _compile_string(path, path_sep)
+    return _compile_keys(tuple(path))
+
+
 def extract_nested_dict(
     data: dict,
     path: Optional[str] = None,
@@ -46,7 +135,8 @@ def extract_nested_dict(
     The keys for the nested structure can be provided as a string or a list. Providing as a string can only work
     if all the keys are strings. The path parameter will be split by the path_sep parameter t0 generate a list of keys.
     If the expected keys are not strings, then supply the keys as a list to the keys parameter. The list of keys
-    should be in order of appearance in the dictionary.
+    should be in order of appearance in the dictionary. The path is compiled with compile_path, so repeated paths are
+    only parsed once.
 
     :param data: the nested dictionary
     :type data: dict
@@ -70,59 +160,316 @@ def extract_nested_dict(
             raise TypeError(
                 f"Please provide the path parameter as a string, not a {type(path)}"
             )
-        try:
-            value = reduce(lambda d, k: d[k], path.split(path_sep), data)
-        except KeyError:
-            raise KeyError(f"One of the keys in {path} is not in the dictionary!")
-    else:
-        if not isinstance(keys, list):
-            raise TypeError(
-                f"Please provide the keys parameter as a list, not a {type(keys)}"
-            )
-        try:
-            value = reduce(lambda d, k: d[k], keys, data)
-        except KeyError:
-            raise KeyError(f"One of the keys in {keys} is not in the dictionary!")
+        return compile_path(path, path_sep)(data)
+    if not isinstance(keys, list):
+        raise TypeError(
+            f"Please provide the keys parameter as a list, not a {type(keys)}"
+        )
+    return compile_path(keys)(data)
+
+
+class _TrieNode:
+    """
+    A node of the prefix trie of paths built by _compile_many. Chains of nodes with a single child and no paths are
+    merged, so each node is reached from its parent by a segment of one or more keys
+    """
+
+    __slots__ = ("segment", "children", "paths")
 
-    return value
+    def __init__(self, segment: Tuple[Hashable, ...] = ()) -> None:
+        self.segment = segment
+        self.children: List[_TrieNode] = []
+        # the positions of the paths which end at this node
+        self.paths: List[int] = []
 
 
-def order_keys(data: dict, keys: List[Hashable]) -> List[Hashable]:
+@lru_cache(maxsize=_PATH_CACHE_SIZE)
+def _compile_many(paths: Tuple[Hashable, ...], path_sep: str) -> _TrieNode:
+    """
+    Build the prefix trie of paths
+    :param paths: the paths, as strings or tuples of keys
+    :type paths: tuple
+    :param path_sep: the separator to use for paths provided as strings
+    :type path_sep: str
+    :return: the root of the trie
+    :rtype: _TrieNode
+    """
+    # build a trie with one key per node, as nested dictionaries of key -> (child, positions of paths)
+    Trie = Dict[Hashable, Tuple[Any, List[int]]]
+    root_paths: List[int] = []
+    trie: Trie = {}
+    for i, path in enumerate(paths):
+        keys = compile_path(path, path_sep).keys  # type: ignore[arg-type]
+        if not keys:
+            root_paths.append(i)
+            continue
+        level = trie
+        for key in keys[:-1]:
+            level = level.setdefault(key, ({}, []))[0]
+        level.setdefault(keys[-1], ({}, []))[1].append(i)
+
+    root = _TrieNode()
+    root.paths = root_paths
+    stack: List[Tuple[_TrieNode, Trie]] = [(root, trie)]
+    while stack:
+        node, level = stack.pop()
+        for key, (children, positions) in level.items():
+            segment = [key]
+            # merge the chain of nodes with a single child and no paths
+            while not positions and len(children) == 1:
+                ((key, (children, positions)),) = children.items()
+                segment.append(key)
+            child = _TrieNode(tuple(segment))
+            child.paths = positions
+            node.children.append(child)
+            stack.append((child, children))
+    return root
+
+
+def _paths_tuple(
+    paths: Iterable[Union[str, Sequence[Hashable]]]
+) -> Tuple[Hashable, ...]:
+    """
+    Convert paths to a tuple which can be used as a key of the cache of tries. Paths given as lists become tuples
+    :param paths: strings of concatenated keys or sequences of keys
+    :type paths: iterable
+    :return: the paths
+    :rtype: tuple
+    """
+    keys = tuple(paths)
+    try:
+        hash(keys)
+    except TypeError:
+        return tuple(p if isinstance(p, (str, tuple)) else tuple(p) for p in keys)
+    return keys
+
+
+def _missing(node: _TrieNode, paths: Tuple[Hashable, ...]) -> KeyError:
+    """
+    Create the error for a key of the trie which is not in the dictionary
+    :param node: the node of the missing key
+    :type node: _TrieNode
+    :param paths: the paths of the trie
+    :type paths: tuple
+    :return: the error, naming one of the paths which contain the key
+    :rtype: KeyError
+    """
+    while not node.paths:
+        node = node.children[0]
+    return KeyError(
+        f"One of the keys in {paths[node.paths[0]]} is not in the dictionary!"
+    )
+
+
+def iter_extract_many(
+    data: Mapping,
+    paths: Iterable[Union[str, Sequence[Hashable]]],
+    path_sep: str = "/",
+    default: Any = _MISSING,
+) -> Iterator[Tuple[Hashable, Any]]:
+    """
+    Extract the values at many paths from a nested dictionary as a stream of (path, value) pairs
+
+    The paths are combined into a prefix trie so that a prefix shared by several paths is only walked once. Tries are
+    kept in a least recently used cache, so extracting the same paths from many dictionaries only builds the trie
+    once. The pairs are generated in the order of the walk, not in the order of the paths. Paths given as lists are
+    returned as tuples.
+
+    :param data: the nested dictionary
+    :type data: Mapping
+    :param paths: strings of concatenated keys or sequences of keys
+    :type paths: iterable
+    :param path_sep: the separator to use for paths provided as strings
+    :type path_sep: str
+    :param default: the value for paths which are not in the dictionary. If not given, KeyError is raised
+    :type default: Any
+    :return: generator of (path, value) pairs
+    :rtype: Iterator[tuple]
+    :raises KeyError
+    """
+    keys = _paths_tuple(paths)
+    stack: List[Tuple[_TrieNode, Any]] = [(_compile_many(keys, path_sep), data)]
+    while stack:
+        node, value = stack.pop()
+        for i in node.paths:
+            yield keys[i], value
+        for child in node.children:
+            try:
+                nested = value
+                for key in child.segment:
+                    nested = nested[key]
+            except KeyError:
+                if default is _MISSING:
+                    raise _missing(child, keys)
+                missing = [child]
+                while missing:
+                    below = missing.pop()
+                    for i in below.paths:
+                        yield keys[i], default
+                    missing.extend(below.children)
+                continue
+            stack.append((child, nested))
+
+
+def extract_many(
+    data: Mapping,
+    paths: Iterable[Union[str, Sequence[Hashable]]],
+    path_sep: str = "/",
+    default: Any = _MISSING,
+) -> Dict[Hashable, Any]:
+    """
+    Extract the values at many paths from a nested dictionary
+
+    See iter_extract_many. The values are returned in the order of the paths.
+    e.g. extract_many({"a": {"b": 1, "c": 2}}, ["a/b", "a/c"]) -> {"a/b": 1, "a/c": 2}
+
+    :param data: the nested dictionary
+    :type data: Mapping
+    :param paths: strings of concatenated keys or sequences of keys
+    :type paths: iterable
+    :param path_sep: the separator to use for paths provided as strings
+    :type path_sep: str
+    :param default: the value for paths which are not in the dictionary. If not given, KeyError is raised
+    :type default: Any
+    :return: dictionary of path -> value
+    :rtype: dict
+    :raises KeyError
+    """
+    keys = _paths_tuple(paths)
+    values = [default] * len(keys)
+    stack: List[Tuple[_TrieNode, Any]] = [(_compile_many(keys, path_sep), data)]
+    while stack:
+        node, value = stack.pop()
+        for i in node.paths:
+            values[i] = value
+        for child in node.children:
+            try:
+                nested = value
+                for key in child.segment:
+                    nested = nested[key]
+            except KeyError:
+                # the paths below the child keep the default value
+                if default is _MISSING:
+                    raise _missing(child, keys)
+                continue
+            if child.children:
+                stack.append((child, nested))
+            else:
+                for i in child.paths:
+                    values[i] = nested
+    return dict(zip(keys, values))
+
+
+class KeyIndex:
+    """
+    Index of where each key appears in a nested dictionary, for ordering many lists of keys against the same dictionary
+
+    Every dictionary in the nested dictionary is numbered, the root being 0. Each key maps to its locations as
+    (depth, number of the dictionary containing the key, number of the dictionary under the key or -1 if the value is
+    not a dictionary). The index is not updated when the dictionary changes, so it should be rebuilt after changes.
+
+    Attributes:
+        locations (dict): key -> list of (depth, parent, node) tuples
+
+    """
+
+    __slots__ = ("locations",)
+
+    def __init__(self, data: dict):
+        locations: Dict[Hashable, List[Tuple[int, int, int]]] = {}
+        count = 1
+        stack: List[Tuple[dict, int, int]] = [(data, 0, 0)]
+        while stack:
+            sub, parent, depth = stack.pop()
+            for key, value in sub.items():
+                node = -1
+                if isinstance(value, dict):
+                    node = count
+                    count += 1
+                    stack.append((value, node, depth + 1))
+                locations.setdefault(key, []).append((depth, parent, node))
+        self.locations = locations
+
+    def __repr__(self) -> str:
+        return f"KeyIndex({len(self.locations)} keys)"
+
+
+def order_keys(
+    data: dict, keys: List[Hashable], index: Optional[KeyIndex] = None
+) -> List[Hashable]:
     """
     Order a list of dictionary keys so that the order of keys reflects the order in which the keys appear in the
     nested dictionary
 
+    The dictionary is descended once, choosing at each level the first of the remaining keys which is in the
+    dictionary at that level. If an index of the dictionary is given, the keys are ordered from the index alone in
+    time linear in the number of keys and their locations.
+
     :param data: input nested dictionary
     :type data: dict
     :param keys: list of keys which are not in the right order
     :type keys: List[Hashable]
+    :param index: prebuilt index of the keys of data
+    :type index: KeyIndex
     :return: list of Hashables in correct order
     :rtype: List[Hashable]
     :raises: KeyError
     """
-    remaining_keys = keys.copy()
+    if index is not None:
+        return _order_keys_indexed(index, keys)
+    remaining_keys = list(keys)
     ordered_keys: List[Hashable] = []
-    while len(remaining_keys) > 0:
-        if len(ordered_keys) > 0:
-            sub = extract_nested_dict(data, keys=ordered_keys)
-        else:
-            sub = data.copy()
-
-        if isinstance(sub, dict):
-            added_key = False
-            for i in remaining_keys:
-                value = sub.get(i, None)
-                if value is not None:
-                    added_key = True
-                    ordered_keys.append(i)
-                    remaining_keys.remove(i)
-                    break
-            if not added_key:
+    sub: Any = data
+    while remaining_keys and isinstance(sub, dict):
+        for i, key in enumerate(remaining_keys):
+            if key in sub:
                 break
         else:
             break
+        ordered_keys.append(key)
+        del remaining_keys[i]
+        sub = sub[key]
     if len(remaining_keys) != 0:
         raise KeyError(
             f"Keys could not be ordered due to incorrect keys! The following keys remained {remaining_keys}"
         )
     return ordered_keys
+
+
+def _order_keys_indexed(index: KeyIndex, keys: List[Hashable]) -> List[Hashable]:
+    """
+    Order a list of keys using an index of the nested dictionary
+    :param index: index of the keys of the nested dictionary
+    :type index: KeyIndex
+    :param keys: list of keys which are not in the right order
+    :type keys: List[Hashable]
+    :return: list of Hashables in correct order
+    :rtype: List[Hashable]
+    :raises: KeyError
+    """
+    n = len(keys)
+    # number of a dictionary -> (position in keys, number of the dictionary under the key) for the keys it contains,
+    # in order of the keys so that the first remaining key is chosen as when descending the dictionary
+    candidates: Dict[int, List[Tuple[int, int]]] = {}
+    for position, key in enumerate(keys):
+        for depth, parent, node in index.locations.get(key, ()):
+            if depth < n:
+                candidates.setdefault(parent, []).append((position, node))
+    used = [False] * n
+    ordered_keys: List[Hashable] = []
+    current = 0
+    while len(ordered_keys) < n:
+        for position, node in candidates.get(current, ()):
+            if not used[position]:
+                break
+        else:
+            break
+        used[position] = True
+        ordered_keys.append(keys[position])
+        current = node
+    if len(ordered_keys) != n:
+        remaining_keys = [key for key, done in zip(keys, used) if not done]
+        raise KeyError(
+            f"Keys could not be ordered due to incorrect keys! The following keys remained {remaining_keys}"
+        )
+    return ordered_keys
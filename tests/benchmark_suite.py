@@ -0,0 +1,300 @@
+"""Benchmark suite with scaling curves, saved results and a regression check
+
+    python tests/benchmark_suite.py run [-o results.json] [--quick] [-k PATTERN]
+    python tests/benchmark_suite.py compare BASELINE CURRENT [--threshold 0.25] [-k PATTERN]
+
+run times each benchmark at several sizes and saves the best time per operation of each metric as JSON. compare
+reads two saved runs, made on the same machine, and exits with status 1 if any metric matching the patterns is slower
+than the baseline by more than the threshold.
+"""
+import argparse
+import fnmatch
+import json
+import platform
+import sys
+import time
+import timeit
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from dict_tools.CommentedDict import CommentedDict
+from dict_tools.data_models import CommentedKey
+from dict_tools.structure import DictionaryParser
+from dict_tools.utils import KeyIndex, extract_nested_dict, order_keys
+
+# metric name -> (function to time, number of operations per call)
+Benchmarks = Iterator[Tuple[str, Callable[[], Any], int]]
+
+SIZES = (10**2, 10**3, 10**4, 10**5, 10**6)
+QUICK_SIZES = (10**2, 10**3, 10**4)
+
+
+def deep_dict(depth: int) -> dict:
+    d: dict = {"leaf": [1, 2, 3]}
+    for i in range(depth):
+        d = {"nested": d, i: "value"}
+    return d
+
+
+def wide_dict(width: int, depth: int = 2) -> dict:
+    if depth == 0:
+        return {"a": 1, "b": [1.0, "x"]}
+    return {f"key{i}": wide_dict(width, depth - 1) for i in range(width)}
+
+
+def list_heavy_dict(n: int, length: int = 100) -> dict:
+    return {
+        f"key{i}": [
+            {"id": j, "tags": ["a", "b"], "score": j / 2} for j in range(length)
+        ]
+        for i in range(n)
+    }
+
+
+def commented_dict(width: int) -> CommentedDict:
+    # the structure of nested CommentedDicts is not analysed, so the nested dictionaries are dicts with CommentedKeys
+    d = CommentedDict(comment="generated")
+    for i in range(width):
+        d[CommentedKey(key=f"key{i}", comment=f"comment {i}")] = {
+            CommentedKey(key=f"key{j}", comment=f"comment {j}"): [j, str(j)]
+            for j in range(width)
+        }
+    return d
+
+
+def _fill(d: Any, keys: List[Hashable]) -> Any:
+    for key in keys:
+        d[key] = 0
+    return d
+
+
+def _fill_new(cls: type, keys: List[Hashable]) -> Any:
+    return _fill(cls(), keys)
+
+
+def _get(d: Any, keys: List[Hashable]) -> None:
+    for key in keys:
+        _ = d[key]
+
+
+def commented_dict_benchmarks(sizes: Tuple[int, ...]) -> Benchmarks:
+    for n in sizes:
+        keys: List[Hashable] = [f"key{i}" for i in range(n)]
+        commented: List[Hashable] = [
+            CommentedKey(key=k, comment="comment") for k in keys
+        ]
+        for name, cls, set_keys, get_keys in (
+            ("dict", dict, keys, keys),
+            ("CommentedDict", CommentedDict, keys, keys),
+            ("CommentedDict[CommentedKey]", CommentedDict, commented, keys),
+        ):
+            full = _fill(cls(), set_keys)
+            yield f"commented_dict/set/{name}/n={n}", partial(
+                _fill_new, cls, set_keys
+            ), n
+            yield f"commented_dict/get/{name}/n={n}", partial(_get, full, get_keys), n
+            yield f"commented_dict/replace/{name}/n={n}", partial(
+                _fill, full, set_keys
+            ), n
+
+
+def structure_benchmarks(sizes: Tuple[int, ...]) -> Benchmarks:
+    parser = DictionaryParser()
+    for n in sizes:
+        if n > 10**4:
+            # the shapes below grow faster than n, so larger sizes only add run time
+            continue
+        width = max(int(n**0.5), 2)
+        for name, d in (
+            ("wide", wide_dict(width)),
+            ("deep", deep_dict(n)),
+            ("list-heavy", list_heavy_dict(width)),
+            ("commented", commented_dict(width)),
+        ):
+            yield f"structure/getStructure/{name}/n={n}", partial(
+                parser.getStructure, d
+            ), 1
+
+
+def utils_benchmarks(sizes: Tuple[int, ...]) -> Benchmarks:
+    for depth in (10, 100, 500):
+        data = deep_dict(depth)
+        keys: List[Hashable] = ["nested"] * depth + ["leaf"]
+        yield f"utils/extract_nested_dict/depth={depth}", partial(
+            extract_nested_dict, data, keys=keys
+        ), 1
+        path = "/".join(keys)
+        yield f"utils/extract_nested_dict_path/depth={depth}", partial(
+            extract_nested_dict, data, path=path
+        ), 1
+
+        # distinct keys at every level, given in reverse order
+        ordered: Dict[Hashable, Any] = {"leaf": 0}
+        for level in reversed(range(depth)):
+            ordered = {(level, 0): ordered, (level, 1): 1}
+        unordered: List[Hashable] = [(level, 0) for level in reversed(range(depth))]
+        index = KeyIndex(ordered)
+        yield f"utils/order_keys/depth={depth}", partial(
+            order_keys, ordered, unordered
+        ), 1
+        yield f"utils/order_keys_indexed/depth={depth}", partial(
+            order_keys, ordered, unordered, index=index
+        ), 1
+
+
+GROUPS: Tuple[Callable[[Tuple[int, ...]], Benchmarks], ...] = (
+    commented_dict_benchmarks,
+    structure_benchmarks,
+    utils_benchmarks,
+)
+
+
+def measure(fn: Callable[[], Any], operations: int, repeat: int) -> float:
+    """
+    Time a function, calling it enough times per repeat to take at least 0.2 seconds
+    :param fn: the function to time
+    :type fn: Callable
+    :param operations: the number of operations done by one call of the function
+    :type operations: int
+    :param repeat: the number of times to repeat the timing
+    :type repeat: int
+    :return: the best time per operation in seconds
+    :rtype: float
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number / operations
+
+
+def run(sizes: Tuple[int, ...], repeat: int, patterns: List[str]) -> Dict[str, Any]:
+    """
+    Run the benchmarks whose metric names match any of the patterns
+    :param sizes: the sizes of the generated data
+    :type sizes: tuple
+    :param repeat: the number of times to repeat each timing
+    :type repeat: int
+    :param patterns: fnmatch patterns of the metrics to run
+    :type patterns: list
+    :return: the results, with the seconds per operation of each metric
+    :rtype: dict
+    """
+    metrics: Dict[str, float] = {}
+    for group in GROUPS:
+        for name, fn, operations in group(sizes):
+            if not any(fnmatch.fnmatchcase(name, p) for p in patterns):
+                continue
+            metrics[name] = measure(fn, operations, repeat)
+            print(f"{name:<64} {metrics[name] * 1e6:12.3f} us/op", flush=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": list(sizes),
+            "repeat": repeat,
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float,
+    patterns: List[str],
+) -> List[str]:
+    """
+    Compare two runs and find the tracked metrics which regressed
+    :param baseline: the results of the baseline run
+    :type baseline: dict
+    :param current: the results of the current run
+    :type current: dict
+    :param threshold: the relative slow down above which a metric has regressed, e.g. 0.25 for 25% slower
+    :type threshold: float
+    :param patterns: fnmatch patterns of the tracked metrics
+    :type patterns: list
+    :return: the names of the metrics which regressed
+    :rtype: list
+    """
+    regressions = []
+    before, after = baseline["metrics"], current["metrics"]
+    for name in sorted(set(before) | set(after)):
+        if not any(fnmatch.fnmatchcase(name, p) for p in patterns):
+            continue
+        if name not in before or name not in after:
+            print(f"{name:<64} only in {'current' if name in after else 'baseline'}")
+            continue
+        change = after[name] / before[name] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<64} {before[name] * 1e6:12.3f} -> {after[name] * 1e6:12.3f} us/op {change:+8.1%}{flag}"
+        )
+    return regressions
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path) as fp:
+        return json.load(fp)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark dict_tools and check for regressions."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser(
+        "run", help="run the benchmarks and save the results as JSON"
+    )
+    run_parser.add_argument(
+        "-o",
+        "--output",
+        default="benchmark_results.json",
+        help="where to save the results",
+    )
+    run_parser.add_argument(
+        "--quick", action="store_true", help=f"only use sizes up to {QUICK_SIZES[-1]}"
+    )
+    run_parser.add_argument(
+        "--repeat", type=int, default=5, help="number of times to repeat each timing"
+    )
+    compare_parser = commands.add_parser("compare", help="compare two saved runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="relative slow down which fails the comparison",
+    )
+    for sub in (run_parser, compare_parser):
+        sub.add_argument(
+            "-k",
+            dest="patterns",
+            action="append",
+            help="fnmatch pattern of the metrics to use. Defaults to all",
+        )
+    args = parser.parse_args(argv)
+    patterns = args.patterns or ["*"]
+
+    if args.command == "run":
+        results = run(QUICK_SIZES if args.quick else SIZES, args.repeat, patterns)
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+        print(f"saved {len(results['metrics'])} metrics to {args.output}")
+        return 0
+
+    regressions = compare(
+        _load(args.baseline), _load(args.current), args.threshold, patterns
+    )
+    if regressions:
+        print(f"{len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
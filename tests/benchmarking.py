@@ -1,9 +1,34 @@
-from typing import Union
-
+import array
+import json
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from functools import reduce
+from typing import Any, Dict, Hashable, List, Tuple, Union
+
+from benchmark_suite import deep_dict, wide_dict
 from line_profiler import LineProfiler
-
-from dict_tools.CommentedDict import CommentedDict
-from dict_tools.data_models import CommentedKey
+from pydantic.dataclasses import dataclass as pyd_dataclass
+
+from dict_tools.CommentedDict import CommentedDict, CompactCommentedDict
+from dict_tools.data_models import CommentedKey, CommentedValue
+from dict_tools.observers import ProfileObserver
+from dict_tools.paths import PathIndex
+from dict_tools.storage import MappedCommentedDict
+from dict_tools.structure import DictionaryParser
+from dict_tools.utils import (
+    KeyIndex,
+    compile_path,
+    extract_many,
+    extract_nested_dict,
+    order_keys,
+    sort_mixed_list,
+)
 
 basic_dict: dict[Union[int, str, CommentedKey], Union[int, str]] = {"mykey": 10}
 commentedDict: CommentedDict = CommentedDict()
@@ -60,6 +85,471 @@ def get_commentedKey_with_str() -> None:
     _ = commentedDict_withCommentedKey["myCommentedKey"]
 
 
+class LinearScanCommentedDict(CommentedDict):
+    """CommentedDict which scans every key on each set - the behaviour before the inner-key index was added"""
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        if CommentedKey in self.keys_types():
+            _ = [k for k in self.data if isinstance(k, CommentedKey) and k.key == key]
+        super().__setitem__(key, value)
+
+
+def fill(d: Union[dict, CommentedDict], n: int) -> None:
+    d[commentedKey] = 0
+    for i in range(n):
+        d[i] = i
+
+
+def fill_scaling(sizes: tuple = (500, 1_000, 2_000, 4_000)) -> None:
+    for n in sizes:
+        for cls in (dict, CommentedDict, LinearScanCommentedDict):
+            t = timeit.timeit(lambda: fill(cls(), n), number=1)
+            print(f"fill {cls.__name__:<24} n={n:<6} {t * 1000:.2f} ms")
+
+
+def bulk_timing(n: int = 100_000, repeat: int = 3) -> None:
+    plain = [(f"key{i}", i) for i in range(n)]
+    commented = [(CommentedKey(f"key{i}", "comment"), i) for i in range(n)]
+    for name, pairs in (("plain", plain), ("CommentedKey", commented)):
+        per_item = min(
+            timeit.repeat(
+                lambda: _fill_pairs(CommentedDict(), pairs), number=1, repeat=repeat
+            )
+        )
+        bulk = min(
+            timeit.repeat(
+                lambda: CommentedDict.from_pairs(pairs), number=1, repeat=repeat
+            )
+        )
+        # every key of the update collides with a key of the other kind
+        other = plain if pairs is commented else commented
+        collide = min(
+            timeit.repeat(
+                lambda: CommentedDict(other).update(pairs), number=1, repeat=repeat
+            )
+        )
+        print(
+            f"{name:<14} n={n} per item {per_item * 1000:.1f} ms, from_pairs {bulk * 1000:.1f} ms, "
+            f"colliding update {collide * 1000:.1f} ms"
+        )
+
+
+def _fill_pairs(d: CommentedDict, pairs: List[Tuple[Hashable, Any]]) -> None:
+    for key, value in pairs:
+        d[key] = value
+
+
+def allocated(build: Any) -> int:
+    """
+    Measure the memory allocated by a function which builds an object, while the object is alive
+    :param build: the function
+    :type build: Callable
+    :return: the bytes allocated
+    :rtype: int
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        obj = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del obj
+    return after - before
+
+
+def comment_storage_memory(n: int = 100_000, repeat: int = 3) -> None:
+    # the keys, values and comments exist before the dictionaries are built, so only what the dictionary keeps alive is
+    # measured, including the CommentedKeys kept by a CommentedDict
+    keys = [f"key{i}" for i in range(n)]
+    comments = [f"comment {i}" for i in range(n)]
+    values = list(range(n))
+    for cls in (CommentedDict, CompactCommentedDict):
+        for name, pairs in (
+            ("plain keys", lambda: zip(keys, values)),
+            ("commented keys", lambda: zip(map(CommentedKey, keys, comments), values)),
+        ):
+            size = allocated(lambda: cls.from_pairs(pairs()))
+            d = cls.from_pairs(pairs())
+            get = min(
+                timeit.repeat(lambda: [d[k] for k in keys], number=1, repeat=repeat)
+            )
+            iterate = min(timeit.repeat(lambda: list(d), number=1, repeat=repeat))
+            print(
+                f"{cls.__name__:<22} {name:<15} {size / n:6.1f} bytes per entry, get {get / n * 1e9:.0f} ns, "
+                f"iterate {iterate / n * 1e9:.0f} ns per key"
+            )
+
+
+def structure_timing(repeat: int = 3) -> None:
+    for cacheSize in (0, 128):
+        parser = DictionaryParser(cacheSize=cacheSize)
+        for name, d in (
+            ("deep(500)", deep_dict(500)),
+            ("wide(300x300)", wide_dict(300)),
+        ):
+            t = min(
+                timeit.repeat(lambda: parser.getStructure(d), number=1, repeat=repeat)
+            )
+            print(f"getStructure {name:<16} cacheSize={cacheSize:<4} {t * 1000:.2f} ms")
+
+
+def observer_timing(repeat: int = 5) -> None:
+    for name, d in (("deep(500)", deep_dict(500)), ("wide(150x150)", wide_dict(150))):
+        for label, observer in (
+            ("no observer", None),
+            ("ProfileObserver", ProfileObserver()),
+        ):
+            parser = DictionaryParser(observer=observer)
+            t = min(timeit.repeat(lambda: parser.getSchema(d), number=1, repeat=repeat))
+            print(f"getSchema {name:<16} {label:<16} {t * 1000:.2f} ms")
+
+
+def incremental_timing(repeat: int = 3) -> None:
+    d = wide_dict(300)
+    parser = DictionaryParser()
+    t = min(timeit.repeat(lambda: parser.getSchema(d), number=1, repeat=repeat))
+    print(f"getSchema   wide(300x300)                  {t * 1000:.2f} ms")
+    for label, budget in (
+        ("one step", {}),
+        ("steps of 1000 nodes", {"maxNodes": 1_000}),
+        ("steps of 1 ms", {"timeout": 0.001}),
+    ):
+
+        def run() -> None:
+            analysis = parser.incremental(d)
+            while not analysis.done:
+                analysis.run(**budget)
+
+        t = min(timeit.repeat(run, number=1, repeat=repeat))
+        print(f"incremental wide(300x300) {label:<20} {t * 1000:.2f} ms")
+    analysis = parser.incremental(d)
+    t = min(timeit.repeat(lambda: analysis.run(timeout=0.01), number=1, repeat=1))
+    print(f"first step of 10 ms: {analysis.nodes} nodes in {t * 1000:.2f} ms")
+
+
+def limits_timing(n: int = 100_000, repeat: int = 3) -> None:
+    d = {f"key{i}": {"a": i, "b": [{"c": str(i)}]} for i in range(n)}
+    for label, options in (
+        ("no limits", {}),
+        ("maxKeysPerMapping=100", {"maxKeysPerMapping": 100}),
+        ("maxDepth=1", {"maxDepth": 1}),
+        ("maxOutputChars=10000", {"maxOutputChars": 10_000}),
+    ):
+        parser = DictionaryParser(**options)
+        t = min(timeit.repeat(lambda: parser.getStructure(d), number=1, repeat=repeat))
+        size = len(parser.getStructure(d))
+        print(f"getStructure {n} keys {label:<24} {t * 1000:10.2f} ms {size:>10} chars")
+
+
+def examples_timing(n: int = 1_000_000, number: int = 100) -> None:
+    numbers = list(range(n))
+    rng = random.Random(10)
+    t = timeit.timeit(
+        lambda: sorted(rng.sample(numbers, k=3), key=sort_mixed_list), number=number
+    )
+    print(f"random.sample(list) of {n}        {t / number * 1e6:10.2f} us")
+    parser = DictionaryParser(showVariables=True)
+    for name, collection in (
+        ("list", numbers),
+        ("range", range(n)),
+        ("set", set(numbers)),
+    ):
+        t = timeit.timeit(lambda: parser.sample_examples(collection), number=number)
+        print(f"sample_examples({name}) of {n} {t / number * 1e6:10.2f} us")
+
+
+def buffer_timing(n: int = 10, size: int = 10 * 2**20, repeat: int = 3) -> None:
+    d = {
+        **{f"blob{i}": bytes(size) for i in range(n)},
+        **{f"array{i}": array.array("d", bytes(size)) for i in range(n)},
+    }
+    for showVariables in (False, True):
+        parser = DictionaryParser(showVariables=showVariables)
+        t = min(timeit.repeat(lambda: parser.getStructure(d), number=1, repeat=repeat))
+        print(
+            f"getStructure {2 * n} buffers of {size} bytes showVariables={showVariables!s:<5} {t * 1e6:10.2f} us"
+        )
+
+
+def type_histogram_timing(n: int = 5_000_000, repeat: int = 3) -> None:
+    elements = [None if i % 1000 == 0 else i for i in range(n)]
+    parser = DictionaryParser()
+    cases = (
+        (
+            "gtn per element",
+            lambda: sorted({parser.gtn(x, blockVariable=True) for x in elements}),
+        ),
+        ("type_histogram", lambda: parser.type_histogram(elements)),
+    )
+    for name, case in cases:
+        t = min(timeit.repeat(case, number=1, repeat=repeat))
+        print(f"{name:<16} n={n} {t * 1000:.1f} ms")
+
+
+def parallel_timing(workers: Tuple[int, ...] = (0, 2, 4), repeat: int = 3) -> None:
+    d = wide_dict(300)
+    for n in workers:
+        parser = DictionaryParser(workers=n)
+        t = min(timeit.repeat(lambda: parser.getStructure(d), number=1, repeat=repeat))
+        print(f"getStructure wide(300x300)    workers={n:<4} {t * 1000:.2f} ms")
+
+
+@pyd_dataclass(eq=True, frozen=True)
+class PydanticCommentedKey:
+    """The previous pydantic implementation of CommentedKey, for comparison"""
+
+    key: Hashable
+    comment: Union[str, None] = None
+
+
+@pyd_dataclass(eq=True, frozen=True)
+class PydanticCommentedValue:
+    """The previous pydantic implementation of CommentedValue, for comparison"""
+
+    value: Any
+    comment: Union[str, None] = None
+
+
+def commented_models_timing(n: int = 100_000, repeat: int = 3) -> None:
+    keys = [f"key{i}" for i in range(n)]
+    for name, key_type, value_type, kwargs in (
+        ("pydantic", PydanticCommentedKey, PydanticCommentedValue, {}),
+        ("slots", CommentedKey, CommentedValue, {}),
+        ("slots validated", CommentedKey, CommentedValue, {"validate": True}),
+    ):
+        construct = min(
+            timeit.repeat(
+                lambda: [key_type(k, "comment", **kwargs) for k in keys],
+                number=1,
+                repeat=repeat,
+            )
+        )
+        construct_values = min(
+            timeit.repeat(
+                lambda: [value_type(k, "comment", **kwargs) for k in keys],
+                number=1,
+                repeat=repeat,
+            )
+        )
+        commented = [key_type(k, "comment") for k in keys]
+        hashing = min(
+            timeit.repeat(lambda: [hash(k) for k in commented], number=1, repeat=repeat)
+        )
+        lookup_dict = dict.fromkeys(commented, 0)
+        probes = [key_type(k, "comment") for k in keys]
+        lookup = min(
+            timeit.repeat(
+                lambda: [lookup_dict[k] for k in probes], number=1, repeat=repeat
+            )
+        )
+        print(
+            f"{name:<16} n={n} construct keys {construct * 1000:.1f} ms, values {construct_values * 1000:.1f} ms, "
+            f"hash {hashing * 1000:.1f} ms, dict lookup {lookup * 1000:.1f} ms"
+        )
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """
+    Import a module in a new interpreter with python -X importtime
+    :param module: the module to import
+    :type module: str
+    :return: the cumulative import time of each module imported, in microseconds
+    :rtype: dict
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def import_timing(
+    modules: Tuple[str, ...] = (
+        "dict_tools",
+        "dict_tools.structure",
+        "dict_tools.stream",
+        "dict_tools.cli",
+    ),
+    repeat: int = 5,
+    top: int = 5,
+) -> None:
+    for module in modules:
+        runs = [import_times(module) for _ in range(repeat)]
+        best = min(runs, key=lambda times: times[module])
+        slowest = sorted(
+            ((t, name) for name, t in best.items() if name != module), reverse=True
+        )[:top]
+        print(
+            f"import {module:<22} {best[module] / 1000:.1f} ms, slowest: "
+            + ", ".join(f"{name} {t / 1000:.1f} ms" for t, name in slowest)
+        )
+
+
+def path_timing(number: int = 1_000, depth: int = 6) -> None:
+    # overlapping paths which share long prefixes, as when many fields are extracted from one payload
+    payload: Dict[str, Any] = {f"k{m}": m for m in range(10)}
+    for _ in range(depth):
+        payload = {f"k{j}": payload for j in range(4)}
+    prefixes = ["/".join(f"k{j}" for j in (i, 0, 1, 2, 3, 0)[:depth]) for i in range(4)]
+    paths = [f"{prefix}/k{m}" for prefix in prefixes for m in range(10)]
+    getters = [compile_path(p) for p in paths]
+    cases = (
+        (
+            "reduce",
+            lambda: [reduce(lambda d, k: d[k], p.split("/"), payload) for p in paths],
+        ),
+        (
+            "extract_nested_dict",
+            lambda: [extract_nested_dict(payload, path=p) for p in paths],
+        ),
+        ("compiled getters", lambda: [g(payload) for g in getters]),
+        ("extract_many", lambda: extract_many(payload, paths)),
+    )
+    for name, case in cases:
+        t = min(timeit.repeat(case, number=number, repeat=3))
+        print(f"{name:<20} {len(paths)} paths {t / number * 1e6:.1f} us")
+
+
+def path_index_timing(number: int = 10_000, depth: int = 8) -> None:
+    # a large configuration with one deep branch per level
+    config: Dict[str, Any] = {f"k{m}": m for m in range(10)}
+    for _ in range(depth):
+        config = {
+            "k1": config,
+            **{f"k{j}": {f"v{m}": m for m in range(100)} for j in range(2, 10)},
+        }
+    path = "/".join(["k1"] * depth + ["k5"])
+    keys = path.split("/")
+    key_tuple = tuple(keys)
+    t = min(timeit.repeat(lambda: PathIndex(config), number=1, repeat=3))
+    print(f"{'building PathIndex':<20} {t * 1e3:.1f} ms")
+    index = PathIndex(config)
+    getter = compile_path(path)
+    cases = (
+        ("extract_nested_dict", lambda: extract_nested_dict(config, keys=keys)),
+        ("compiled getter", lambda: getter(config)),
+        ("PathIndex string", lambda: index[path]),
+        ("PathIndex tuple", lambda: index[key_tuple]),
+    )
+    for name, case in cases:
+        t = min(timeit.repeat(case, number=number, repeat=3))
+        print(f"{name:<20} depth {depth + 1} {t / number * 1e9:.0f} ns")
+
+
+def commented_config(n: int, comments: bool = True) -> Dict[Hashable, Any]:
+    d: Dict[Hashable, Any] = CommentedDict(comment="a large config") if comments else {}
+    for i in range(n):
+        section = {
+            "enabled": i % 2 == 0,
+            "limits": {"min": i, "max": 2 * i, "names": ["a", "b"]},
+            "note": f"note {i}",
+        }
+        if comments:
+            section = CommentedDict(
+                {
+                    CommentedKey("enabled", "whether it is used"): section["enabled"],
+                    "limits": section["limits"],
+                    "note": CommentedValue(section["note"], "free text"),
+                },
+                comment=f"settings of section {i}",
+            )
+        d[
+            CommentedKey(f"section{i}", f"section {i}") if comments else f"section{i}"
+        ] = section
+    return d
+
+
+def storage_timing(sizes: Tuple[int, ...] = (1_000, 100_000), repeat: int = 3) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.dtcd")
+        for n in sizes:
+            d = commented_config(n)
+            assert isinstance(d, CommentedDict)
+            dump = min(timeit.repeat(lambda: d.dump(path), number=1, repeat=repeat))
+            size = os.path.getsize(path)
+            load = min(
+                timeit.repeat(lambda: CommentedDict.load(path), number=1, repeat=repeat)
+            )
+            pickled = pickle.dumps(d)
+            unpickle = min(
+                timeit.repeat(lambda: pickle.loads(pickled), number=1, repeat=repeat)
+            )
+            # plain JSON loses the comments and the CommentedKeys
+            text = json.dumps(commented_config(n, comments=False))
+            json_load = min(
+                timeit.repeat(lambda: json.loads(text), number=1, repeat=repeat)
+            )
+            mapped = min(
+                timeit.repeat(
+                    lambda: MappedCommentedDict(path).close(), number=10, repeat=repeat
+                )
+            )
+            with MappedCommentedDict(path) as view:
+                lookup = min(
+                    timeit.repeat(
+                        lambda: view[f"section{n // 2}"], number=1000, repeat=repeat
+                    )
+                )
+            print(
+                f"n={n:<7} dump {dump * 1000:.1f} ms, {size / 1e6:.2f} MB (pickle {len(pickled) / 1e6:.2f} MB), "
+                f"load {load * 1000:.1f} ms, unpickle {unpickle * 1000:.1f} ms, json {json_load * 1000:.1f} ms, "
+                f"open mapped {mapped / 10 * 1e6:.0f} us, mapped look up {lookup / 1000 * 1e6:.1f} us"
+            )
+
+
+def rewalking_order_keys(data: dict, keys: List[Hashable]) -> List[Hashable]:
+    # the previous implementation of order_keys, which walks from the root for every key
+    remaining_keys = keys.copy()
+    ordered_keys: List[Hashable] = []
+    while len(remaining_keys) > 0:
+        if len(ordered_keys) > 0:
+            sub = extract_nested_dict(data, keys=ordered_keys)
+        else:
+            sub = data.copy()
+        if not isinstance(sub, dict):
+            break
+        for i in remaining_keys:
+            if sub.get(i, None) is not None:
+                ordered_keys.append(i)
+                remaining_keys.remove(i)
+                break
+        else:
+            break
+    return ordered_keys
+
+
+def order_keys_timing(
+    depths: Tuple[int, ...] = (10, 50, 200), number: int = 20
+) -> None:
+    for depth in depths:
+        # a deep dictionary with a few siblings at every level
+        data: Dict[Hashable, Any] = {"leaf": 0}
+        for level in reversed(range(depth)):
+            data = {**{(level, j): j for j in range(1, 8)}, (level, 0): data}
+        keys: List[Hashable] = [(level, 0) for level in range(depth)]
+        keys = keys[1::2] + keys[::2]
+        index = KeyIndex(data)
+        cases = (
+            ("re-walking", lambda: rewalking_order_keys(data, keys)),
+            ("order_keys", lambda: order_keys(data, keys)),
+            ("order_keys indexed", lambda: order_keys(data, keys, index=index)),
+        )
+        for name, case in cases:
+            t = min(timeit.repeat(case, number=number, repeat=3))
+            print(f"{name:<20} depth {depth:<4} {t / number * 1e6:.1f} us")
+        t = min(timeit.repeat(lambda: KeyIndex(data), number=number, repeat=3))
+        print(f"{'building KeyIndex':<20} depth {depth:<4} {t / number * 1e6:.1f} us")
+
+
 def main() -> None:
     basic_set()
     commented_set()
@@ -85,3 +575,21 @@ if __name__ == "__main__":
     lp_wrapper()
 
     lprofiler.print_stats()
+
+    fill_scaling()
+    bulk_timing()
+    comment_storage_memory()
+    structure_timing()
+    parallel_timing()
+    incremental_timing()
+    limits_timing()
+    examples_timing()
+    buffer_timing()
+    type_histogram_timing()
+    observer_timing()
+    commented_models_timing()
+    import_timing()
+    path_timing()
+    order_keys_timing()
+    path_index_timing()
+    storage_timing()
@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from benchmark_suite import compare, main
+
+
+class BenchmarkSuiteTestCase(unittest.TestCase):
+    def test_compare(self) -> None:
+        baseline = {
+            "metrics": {"a/fast": 1.0, "a/slow": 1.0, "b/slow": 1.0, "old": 1.0}
+        }
+        current = {"metrics": {"a/fast": 0.5, "a/slow": 1.3, "b/slow": 2.0, "new": 1.0}}
+        with redirect_stdout(StringIO()) as out:
+            self.assertEqual(
+                ["a/slow", "b/slow"], compare(baseline, current, 0.25, ["*"])
+            )
+            self.assertEqual(["b/slow"], compare(baseline, current, 0.5, ["*"]))
+            self.assertEqual(["a/slow"], compare(baseline, current, 0.25, ["a/*"]))
+        self.assertIn("only in baseline", out.getvalue())
+        self.assertIn("only in current", out.getvalue())
+
+    def test_run_and_compare(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, "baseline.json")
+            current = os.path.join(directory, "current.json")
+            with redirect_stdout(StringIO()):
+                pattern = [
+                    "-k",
+                    "utils/extract_nested_dict/depth=10",
+                    "--quick",
+                    "--repeat",
+                    "1",
+                ]
+                self.assertEqual(0, main(["run", "-o", baseline] + pattern))
+                with open(baseline) as fp:
+                    results = json.load(fp)
+                self.assertEqual(
+                    ["utils/extract_nested_dict/depth=10"], list(results["metrics"])
+                )
+
+                results["metrics"]["utils/extract_nested_dict/depth=10"] *= 2
+                with open(current, "w") as fp:
+                    json.dump(results, fp)
+                self.assertEqual(1, main(["compare", baseline, current]))
+                self.assertEqual(0, main(["compare", current, baseline]))
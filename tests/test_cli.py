@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from typing import List, Tuple
+
+from dict_tools.cli import main
+from dict_tools.structure import DictionaryParser
+
+
+class CliTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.document = {"a": [1, 2], "b": {"c": "hello world!"}}
+        self.records = [{"a": 1}, {"a": 2, "b": None}]
+        self.json_path = os.path.join(self.directory.name, "document.json")
+        with open(self.json_path, "w", encoding="utf-8") as fp:
+            json.dump(self.document, fp)
+        self.jsonl_path = os.path.join(self.directory.name, "records.jsonl")
+        with open(self.jsonl_path, "w", encoding="utf-8") as fp:
+            fp.write("\n".join(json.dumps(record) for record in self.records))
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    @staticmethod
+    def run_main(argv: List[str]) -> Tuple[int, str, str]:
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            status = main(argv)
+        return status, out.getvalue(), err.getvalue()
+
+    def test_json(self) -> None:
+        status, out, err = self.run_main([self.json_path])
+        self.assertEqual(0, status)
+        self.assertEqual(DictionaryParser().getStructure(self.document), out)
+        self.assertEqual("", err)
+
+        parser = DictionaryParser(showExamples=True)
+        self.assertEqual(
+            parser.getStructure(self.document), self.run_main(["-e", self.json_path])[1]
+        )
+
+    def test_json_lines(self) -> None:
+        expected = DictionaryParser().getStructure_list(self.records) + "\n"
+        self.assertEqual(expected, self.run_main([self.jsonl_path])[1])
+        self.assertEqual(expected, self.run_main(["--lines", self.jsonl_path])[1])
+        expected = DictionaryParser(typeCounts=True).getStructure_list(self.records)
+        self.assertEqual(expected + "\n", self.run_main(["-c", self.jsonl_path])[1])
+
+    def test_show_variables(self) -> None:
+        parser = DictionaryParser(
+            showVariables=True, whereExamples="first", nExamples=1
+        )
+        status, out, _ = self.run_main(["-v", "-w", "first", "-n", "1", self.json_path])
+        self.assertEqual(0, status)
+        self.assertEqual(parser.getStructure(self.document), out)
+
+    def test_time_and_errors(self) -> None:
+        missing = os.path.join(self.directory.name, "missing.json")
+        status, out, err = self.run_main(["--time", self.json_path, missing])
+        self.assertEqual(1, status)
+        self.assertTrue(out.startswith(f"==> {self.json_path} <==\n"))
+        self.assertIn(f"dict-tools: {self.json_path}: analysed in", err)
+        self.assertIn(f"dict-tools: {missing}: ", err)
+        self.assertIn("total", err)
+
+    def test_stdin_without_pydantic(self) -> None:
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, runpy; runpy.run_module('dict_tools', run_name='__main__')",
+            ],
+            input=json.dumps(self.document).encode(),
+            capture_output=True,
+            check=False,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        )
+        self.assertEqual(0, result.returncode)
+        self.assertEqual(
+            DictionaryParser().getStructure(self.document), result.stdout.decode()
+        )
+
+        check = "import sys; from dict_tools.cli import main; main(sys.argv[1:]); assert 'pydantic' not in sys.modules"
+        result = subprocess.run(
+            [sys.executable, "-c", check, self.json_path],
+            capture_output=True,
+            check=False,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        )
+        self.assertEqual(0, result.returncode, result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,14 @@
 import unittest
 
-from dict_tools.CommentedDict import CommentedDict
+from dict_tools.CommentedDict import CommentedDict, CompactCommentedDict
 from dict_tools.data_models import CommentedKey
 
 
 class CommentedDictTestCase(unittest.TestCase):
+    cls = CommentedDict
+
     def setUp(self) -> None:
-        self.dictionary = CommentedDict(
+        self.dictionary = self.cls(
             numbers=[1, 2, 3],
             letters=["a", "b", "c"],
             comment="This is a dictionary for numbers and letters",
@@ -78,3 +80,113 @@ class CommentedDictTestCase(unittest.TestCase):
         ck = CommentedKey("mykey", "a commented key")
         self.dictionary[ck] = 100
         self.assertEqual(self.dictionary["mykey"], 100)
+
+    def test_pop_CommentedKey_with_key(self) -> None:
+        ck = CommentedKey("mykey", "a commented key")
+        self.dictionary[ck] = 100
+        self.assertEqual(self.dictionary.pop("mykey"), 100)
+        self.assertNotIn(ck, self.dictionary)
+        self.dictionary["mykey"] = 1
+        self.assertListEqual(["numbers", "letters", "mykey"], list(self.dictionary))
+
+    def test_del_CommentedKey(self) -> None:
+        ck = CommentedKey("mykey", "a commented key")
+        self.dictionary[ck] = 100
+        del self.dictionary[ck]
+        self.assertRaises(KeyError, self.dictionary.__getitem__, "mykey")
+        self.dictionary[ck] = 100
+        del self.dictionary["mykey"]
+        self.assertRaises(KeyError, self.dictionary.__getitem__, ck)
+        self.assertRaises(KeyError, self.dictionary.__delitem__, "mykey")
+
+    def test_clear(self) -> None:
+        self.dictionary[CommentedKey("mykey", "a commented key")] = 100
+        self.dictionary.clear()
+        self.assertEqual(len(self.dictionary), 0)
+        self.assertRaises(KeyError, self.dictionary.__getitem__, "mykey")
+
+    def test_update_with_CommentedKey(self) -> None:
+        ck = CommentedKey("numbers", "some numbers")
+        self.dictionary.update({ck: [4, 5, 6]})
+        self.assertListEqual(self.dictionary["numbers"], [4, 5, 6])
+        self.dictionary |= {"numbers": [7]}
+        self.assertListEqual(self.dictionary["numbers"], [7])
+        self.assertRaises(KeyError, self.dictionary.__getitem__, ck)
+
+    def test_copy(self) -> None:
+        ck = CommentedKey("mykey", "a commented key")
+        self.dictionary[ck] = 100
+        copied = self.dictionary.copy()
+        self.assertIsInstance(copied, CommentedDict)
+        self.assertEqual(copied.comment, self.dictionary.comment)
+        copied["mykey"] = 1
+        self.assertEqual(self.dictionary[ck], 100)
+        self.assertEqual(copied["mykey"], 1)
+        self.assertRaises(KeyError, copied.__getitem__, ck)
+
+    def test_bulk_update(self) -> None:
+        ck = CommentedKey("a", "a commented key")
+        self.dictionary["b"] = 0
+        self.dictionary.update([("a", 1), ("b", 2), (ck, 3), ("c", 4)], d=5)
+        self.assertListEqual(
+            list(self.dictionary), ["numbers", "letters", "b", ck, "c", "d"]
+        )
+        self.assertEqual(self.dictionary["a"], 3)
+        self.dictionary.update({"a": 6, CommentedKey("c", "another"): 7})
+        self.assertListEqual(
+            list(self.dictionary),
+            ["numbers", "letters", "b", "d", "a", CommentedKey("c", "another")],
+        )
+        self.assertRaises(KeyError, self.dictionary.__getitem__, ck)
+        self.assertEqual(self.dictionary[CommentedKey("c", "another")], 7)
+
+    def test_bulk_update_single_warning(self) -> None:
+        self.dictionary.update({f"key{i}": i for i in range(10)})
+        with self.assertLogs(level="WARNING") as logs:
+            self.dictionary.update(
+                {CommentedKey(f"key{i}", "commented"): i for i in range(10)}
+            )
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("10 keys were replaced", logs.output[0])
+        self.assertEqual(len(self.dictionary), 12)
+
+    def test_from_pairs(self) -> None:
+        ck = CommentedKey("a", "a commented key")
+        d = self.cls.from_pairs([(ck, 1), ("b", 2)], comment="pairs")
+        self.assertEqual(d.comment, "pairs")
+        self.assertEqual(d[ck], 1)
+        self.assertEqual(d["a"], 1)
+        self.assertDictEqual(dict(self.cls([("a", 1)], b=2)), {"a": 1, "b": 2})
+
+    def test_fromkeys(self) -> None:
+        ck = CommentedKey("a", "a commented key")
+        d = self.cls.fromkeys([ck, "b", "a"], 0)
+        self.assertIsInstance(d, CommentedDict)
+        self.assertListEqual(list(d), ["b", "a"])
+        self.assertRaises(KeyError, d.__getitem__, ck)
+
+
+class CompactCommentedDictTestCase(CommentedDictTestCase):
+    cls = CompactCommentedDict
+
+    def test_side_table(self) -> None:
+        ck = CommentedKey("mykey", "a commented key")
+        self.dictionary[ck] = 100
+        self.assertListEqual(
+            ["numbers", "letters", "mykey"], list(self.dictionary.data)
+        )
+        self.assertDictEqual({"mykey": "a commented key"}, self.dictionary._comments)
+        self.assertListEqual(["numbers", "letters", ck], list(self.dictionary))
+        self.assertIn(ck, self.dictionary)
+        self.assertNotIn("mykey", self.dictionary)
+        self.assertEqual(ck, self.dictionary.commented_key("mykey"))
+        self.assertEqual(
+            repr(self.dictionary),
+            repr(
+                CommentedDict(
+                    self.dictionary.commented_items(), comment=self.dictionary.comment
+                )
+            ),
+        )
+        self.dictionary["mykey"] = 1
+        self.assertDictEqual({}, self.dictionary._comments)
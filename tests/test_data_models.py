@@ -0,0 +1,48 @@
+import copy
+import pickle
+import unittest
+from dataclasses import FrozenInstanceError
+
+from dict_tools.data_models import CommentedKey, CommentedValue
+
+
+class DataModelsTestCase(unittest.TestCase):
+    def test_commentedKey(self) -> None:
+        key = CommentedKey("a", "comment")
+        self.assertEqual("CommentedKey(key='a', comment='comment')", repr(key))
+        self.assertEqual(key, CommentedKey(key="a", comment="comment"))
+        self.assertNotEqual(key, CommentedKey("a"))
+        self.assertNotEqual(key, CommentedValue("a", "comment"))
+        self.assertNotEqual(key, ("a", "comment"))
+        self.assertEqual(hash(("a", "comment")), hash(key))
+        self.assertEqual(1, {key: 1}[CommentedKey("a", "comment")])
+        self.assertRaises(TypeError, CommentedKey, ["a"])
+
+    def test_commentedValue(self) -> None:
+        value = CommentedValue([1, 2], "comment")
+        self.assertEqual("CommentedValue(value=[1, 2], comment='comment')", repr(value))
+        self.assertEqual(value, CommentedValue([1, 2], "comment"))
+        self.assertNotEqual(value, CommentedValue([1, 2]))
+        self.assertRaises(TypeError, hash, value)
+        self.assertEqual(hash((1, None)), hash(CommentedValue(1)))
+
+    def test_frozen(self) -> None:
+        for obj in (CommentedKey("a", "comment"), CommentedValue("a", "comment")):
+            with self.assertRaises(FrozenInstanceError):
+                obj.comment = "changed"  # type: ignore[misc]
+            with self.assertRaises(FrozenInstanceError):
+                del obj.comment  # type: ignore[misc]
+            self.assertEqual(obj, pickle.loads(pickle.dumps(obj)))
+            self.assertEqual(obj, copy.deepcopy(obj))
+
+    def test_validate(self) -> None:
+        self.assertEqual("1", CommentedKey("a", 1, validate=True).comment)  # type: ignore[arg-type]
+        self.assertEqual("2.5", CommentedValue("a", 2.5, validate=True).comment)  # type: ignore[arg-type]
+        self.assertEqual(1, CommentedKey("a", 1).comment)  # type: ignore[arg-type]
+        self.assertRaises(ValueError, CommentedKey, ["a"], validate=True)
+        self.assertRaises(ValueError, CommentedKey, "a", ["comment"], validate=True)
+        self.assertRaises(ValueError, CommentedValue, "a", {"comment"}, validate=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
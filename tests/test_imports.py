@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+import unittest
+from typing import List
+
+# modules which are slow to import and are only needed by some features
+HEAVY_MODULES = [
+    "concurrent.futures",
+    "dataclasses",
+    "decimal",
+    "hashlib",
+    "logging",
+    "pydantic",
+    "random",
+]
+
+
+def imported_modules(code: str) -> List[str]:
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint('\\n'.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    return result.stdout.split()
+
+
+class ImportsTestCase(unittest.TestCase):
+    def test_package_is_lazy(self) -> None:
+        modules = imported_modules("import dict_tools")
+        self.assertEqual(
+            ["dict_tools"], [m for m in modules if m.startswith("dict_tools")]
+        )
+
+        modules = imported_modules("from dict_tools import CommentedKey")
+        self.assertIn("dict_tools.data_models", modules)
+        self.assertNotIn("dict_tools.structure", modules)
+
+    def test_no_heavy_imports(self) -> None:
+        for code in (
+            "import dict_tools.structure",
+            "import dict_tools.stream",
+            "import dict_tools.cli",
+            "from dict_tools.CommentedDict import CommentedDict",
+        ):
+            modules = imported_modules(code)
+            for module in HEAVY_MODULES:
+                self.assertNotIn(module, modules, f"{code} imports {module}")
+
+    def test_no_global_random_seed(self) -> None:
+        code = (
+            "import random\nrandom.seed(1)\nstate = random.getstate()\nimport dict_tools.structure\n"
+            "assert random.getstate() == state"
+        )
+        imported_modules(code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from dict_tools.CommentedDict import CommentedDict
+from dict_tools.data_models import CommentedKey
+from dict_tools.paths import PathIndex
+
+
+class PathIndexTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dictionary = {
+            "a": {"b": {"c": 1, "d": [1, 2]}, "e": None},
+            1: {(2, 3): "value"},
+        }
+        self.index = PathIndex(self.dictionary)
+
+    def test_lookup(self) -> None:
+        self.assertEqual(1, self.index["a/b/c"])
+        self.assertEqual(1, self.index[("a", "b", "c")])
+        self.assertEqual([1, 2], self.index[["a", "b", "d"]])
+        self.assertIsNone(self.index["a/e"])
+        self.assertEqual("value", self.index[(1, (2, 3))])
+        self.assertIs(self.dictionary["a"], self.index["a"])
+        self.assertIn("a/b", self.index)
+        self.assertNotIn("a/x", self.index)
+        self.assertEqual(7, len(self.index))
+        self.assertEqual("default", self.index.get("a/x/y", "default"))
+        with self.assertRaisesRegex(KeyError, "a/x"):
+            _ = self.index["a/x"]
+
+    def test_iter_prefix(self) -> None:
+        self.assertEqual(
+            [
+                (("a", "b"), {"c": 1, "d": [1, 2]}),
+                (("a", "b", "c"), 1),
+                (("a", "b", "d"), [1, 2]),
+                (("a", "e"), None),
+            ],
+            list(self.index.iter_prefix("a")),
+        )
+        self.assertEqual(
+            [("a", "b", "c"), ("a", "b", "d"), ("a", "e"), (1, (2, 3))],
+            [path for path, _ in self.index.iter_prefix(leaves=True)],
+        )
+        with self.assertRaises(KeyError):
+            list(self.index.iter_prefix("x"))
+
+    def test_updates(self) -> None:
+        self.index["a/b"] = {"f": 2}
+        self.assertEqual({"f": 2}, self.dictionary["a"]["b"])
+        self.assertEqual(2, self.index["a/b/f"])
+        self.assertNotIn("a/b/c", self.index)
+        self.assertEqual(["b", "e"], list(self.dictionary["a"]))
+
+        del self.index["a/b"]
+        self.assertNotIn("b", self.dictionary["a"])
+        self.assertNotIn("a/b/f", self.index)
+
+        self.dictionary["a"]["e"] = {"g": 3}
+        self.assertIsNone(self.index["a/e"])
+        self.index.invalidate("a/e")
+        self.assertEqual(3, self.index["a/e/g"])
+
+        del self.dictionary[1]
+        self.index.invalidate([1])
+        self.assertNotIn([1, (2, 3)], self.index)
+
+        with self.assertRaises(KeyError):
+            self.index["x/y"] = 1
+
+    def test_commented_dict(self) -> None:
+        inner = CommentedDict(comment="inner")
+        inner[CommentedKey(key="b", comment="the b key")] = 1
+        inner["c"] = 2
+        d = CommentedDict()
+        d["a"] = inner
+        index = PathIndex(d)
+        self.assertEqual(1, index["a/b"])
+        self.assertEqual(1, index[("a", CommentedKey(key="b", comment="the b key"))])
+
+        index["a/b"] = 10
+        self.assertEqual(10, inner["b"])
+        self.assertEqual(
+            [CommentedKey(key="b", comment="the b key"), "c"], list(inner.data)
+        )
+        self.assertEqual(10, index["a/b"])
@@ -0,0 +1,99 @@
+import io
+import os
+import tempfile
+import unittest
+
+from dict_tools.CommentedDict import CommentedDict
+from dict_tools.data_models import CommentedKey, CommentedValue
+from dict_tools.storage import MappedCommentedDict, dump, load
+
+
+class StorageTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        inner = CommentedDict(comment="inner")
+        inner[CommentedKey(2, "an int key")] = CommentedValue([1, 2], "a list")
+        inner[None] = (3, {"x": CommentedValue(None, None)})
+        self.dictionary = CommentedDict(comment="a config")
+        self.dictionary[CommentedKey("section", "a section")] = inner
+        self.dictionary["plain"] = {"a": [1.5, "b", True], 1: {"c": None}}
+        self.dictionary[3] = CommentedValue({"d": "e"}, "a value")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "config.dtcd")
+        self.dictionary.dump(self.path)
+
+    def test_round_trip(self) -> None:
+        loaded = CommentedDict.load(self.path)
+        self.assertEqual("a config", loaded.comment)
+        self.assertListEqual(list(self.dictionary.data), list(loaded.data))
+        section = loaded[CommentedKey("section", "a section")]
+        self.assertIsInstance(section, CommentedDict)
+        self.assertEqual("inner", section.comment)
+        self.assertListEqual([CommentedKey(2, "an int key"), None], list(section.data))
+        self.assertEqual(CommentedValue([1, 2], "a list"), section[2])
+        # tuples are loaded as lists
+        self.assertEqual([3, {"x": CommentedValue(None, None)}], section[None])
+        self.assertEqual({"a": [1.5, "b", True], 1: {"c": None}}, loaded["plain"])
+        self.assertEqual(CommentedValue({"d": "e"}, "a value"), loaded[3])
+
+    def test_file_object(self) -> None:
+        fp = io.BytesIO(b"prefix")
+        fp.seek(0, io.SEEK_END)
+        dump({"a": 1, CommentedKey("b", "commented"): 2}, fp)
+        fp.seek(len(b"prefix"))
+        loaded = load(fp)
+        self.assertListEqual(["a", CommentedKey("b", "commented")], list(loaded.data))
+        self.assertEqual("", loaded.comment)
+
+    def test_mapped(self) -> None:
+        with MappedCommentedDict(self.path) as view:
+            self.assertEqual("a config", view.comment)
+            self.assertEqual(3, len(view))
+            self.assertListEqual(list(self.dictionary.data), list(view))
+            self.assertListEqual(["section", "plain", 3], list(view.keys()))
+            self.assertEqual("inner", view["section"].comment)
+            self.assertEqual(
+                view["section"], view[CommentedKey("section", "another comment")]
+            )
+            self.assertEqual({"d": "e"}, view[3.0].value)
+            self.assertIn("plain", view)
+            self.assertNotIn(CommentedKey("plain", "not commented"), view)
+            self.assertNotIn("missing", view)
+            self.assertNotIn((1, 2), view)
+            # membership follows CommentedDict, although look ups are lenient
+            for key in (
+                "section",
+                CommentedKey("section", "a section"),
+                CommentedKey("section", "another comment"),
+                "plain",
+                CommentedKey(3, "a value"),
+            ):
+                self.assertEqual(key in self.dictionary, key in view, key)
+            self.assertIn(CommentedKey("section", "a section"), view)
+            self.assertNotIn("section", view)
+            self.assertRaises(KeyError, view.__getitem__, "missing")
+            with self.assertRaises(TypeError):
+                view["plain"] = 1  # type: ignore[index]
+            copied = view.copy()
+            self.assertIsInstance(copied, CommentedDict)
+            self.assertListEqual(list(self.dictionary.data), list(copied.data))
+
+    def test_mapped_many_keys(self) -> None:
+        d = CommentedDict.fromkeys(range(1000), "value")
+        d.dump(self.path)
+        with MappedCommentedDict(self.path) as view:
+            self.assertTrue(all(view[i] == "value" for i in range(1000)))
+            self.assertListEqual(list(range(1000)), list(view))
+            self.assertNotIn(1000, view)
+
+    def test_errors(self) -> None:
+        self.assertRaises(TypeError, dump, {(1, 2): 1}, self.path)
+        self.assertRaises(TypeError, dump, {"a": {1, 2}}, self.path)
+        with open(self.path, "wb") as fp:
+            fp.write(b"not a dictionary")
+        self.assertRaises(ValueError, load, self.path)
+        self.assertRaises(ValueError, MappedCommentedDict, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
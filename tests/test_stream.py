@@ -0,0 +1,125 @@
+import gc
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+from dict_tools.stream import getSchema_json, getStructure_json
+from dict_tools.structure import DictionaryParser
+
+
+class StreamTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.parser = DictionaryParser()
+        self.document = {
+            "a": 1,
+            "b": [1, 2.5, "three", None, True],
+            "c": {"d": {"e": [{"f": 'g"h}]\\', "i": [[], {}]}, {"f": "j"}]}},
+            "k": [],
+            "l": [{"m": 1e20}, 2],
+            "n": "\u00e9" * 20,
+        }
+        self.text = json.dumps(self.document, indent=1)
+
+    def test_getStructure_json(self) -> None:
+        expected = self.parser.getStructure(self.document)
+        for chunkSize in (1, 2, 5, 4096):
+            self.assertEqual(
+                expected,
+                getStructure_json(io.StringIO(self.text), chunkSize=chunkSize),
+            )
+        parser = DictionaryParser(showExamples=True)
+        self.assertEqual(
+            parser.getStructure(self.document),
+            getStructure_json(io.StringIO(self.text), parser, chunkSize=3),
+        )
+
+    def test_getStructure_json_typeCounts(self) -> None:
+        parser = DictionaryParser(typeCounts=True)
+        self.assertEqual(
+            parser.getStructure(self.document),
+            getStructure_json(io.StringIO(self.text), parser, chunkSize=3),
+        )
+
+    def test_getStructure_json_limits(self) -> None:
+        document = {
+            "a": {f"k{i}": i if i % 3 else [i] for i in range(100)},
+            "b": [{"c": {"d": 1}, "e": 2}],
+            "f": {},
+        }
+        text = json.dumps(document)
+        for options in (
+            {"maxDepth": 1},
+            {"maxDepth": 2, "maxKeysPerMapping": 1},
+            {"maxKeysPerMapping": 0},
+            {"maxDepth": 1, "maxKeysPerMapping": 2, "showExamples": True},
+        ):
+            parser = DictionaryParser(**options)
+            expected = parser.getStructure(document)
+            self.assertIn("more keys", expected)
+            for chunkSize in (1, 4096):
+                self.assertEqual(
+                    expected,
+                    getStructure_json(io.StringIO(text), parser, chunkSize=chunkSize),
+                )
+        for options in ({"maxScan": 5}, {"maxOutputChars": 100}):
+            with self.assertRaises(ValueError):
+                getSchema_json(io.StringIO(text), DictionaryParser(**options))
+
+    def test_getStructure_json_sources(self) -> None:
+        expected = self.parser.getStructure(self.document)
+        source = io.BytesIO(self.text.encode("utf-8"))
+        self.assertEqual(expected, getStructure_json(source))
+        # the caller's file object is left open
+        gc.collect()
+        self.assertFalse(source.closed)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "document.json")
+            with open(path, "w", encoding="utf-8") as fp:
+                fp.write(self.text)
+            self.assertEqual(expected, getStructure_json(path))
+
+    def test_getSchema_json_array(self) -> None:
+        schema = getSchema_json(io.StringIO('[{"a": 1}, {"a": 2}]'))
+        self.assertEqual((2, ["dict"]), (schema.length, schema.types))
+        self.assertEqual(
+            "list [\n{\n\tstr : int\n}\n] n=2", self.parser.renderer.render(schema)
+        )
+
+    def test_getSchema_json_invalid(self) -> None:
+        for text in (
+            '{"a": 1',
+            '{"a" 1}',
+            '{"a": 1} 2',
+            '{"a": tru}',
+            "1",
+            '{"a": "b}',
+        ):
+            with self.assertRaises((ValueError, TypeError)):
+                getSchema_json(io.StringIO(text), chunkSize=2)
+        with self.assertRaises(ValueError):
+            getSchema_json(io.StringIO("{}"), DictionaryParser(mergeSchemas=True))
+
+    def test_getSchema_json_memory(self) -> None:
+        records = [
+            {"id": i, "name": "x" * 100, "tags": ["a", "b"]} for i in range(2_000)
+        ]
+        text = json.dumps({"data": [{"records": records}]})
+        for parser in (self.parser, DictionaryParser(showExamples=True)):
+            fp = io.StringIO(text)
+            tracemalloc.start()
+            try:
+                schema = getSchema_json(fp, parser, chunkSize=4096)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            self.assertLess(peak, len(text) // 10)
+        # the example of the huge first element is cut short
+        self.assertTrue(schema.children[0].example.endswith("..."))
+        self.assertTrue(schema.children[0].example.startswith("{'records': [{'id': 0"))
+
+
+if __name__ == "__main__":
+    unittest.main()
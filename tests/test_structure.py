@@ -1,11 +1,30 @@
+import array
+import asyncio
+import importlib.util
+import io
 import json
 import os
+import pickle
+import random
 import unittest
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict, defaultdict, deque
+from contextlib import redirect_stdout
 from string import ascii_lowercase
+from typing import Iterator
 
 from dict_tools.CommentedDict import CommentedDict
 from dict_tools.data_models import CommentedKey, CommentedValue
+from dict_tools.observers import ELEMENTS, ParserObserver, ProfileObserver
+from dict_tools.schema import (
+    MAPPING,
+    SEQUENCE,
+    VALUE,
+    SchemaNode,
+    SchemaRenderer,
+    TextRenderer,
+    flatten,
+    unflatten,
+)
 from dict_tools.structure import DictionaryParser
 
 
@@ -93,6 +112,141 @@ class StructureTestCase(unittest.TestCase):
         s = self.parser.getStructure(self.dictionary_with_list)
         self.assertEqual(expected, s)
 
+    def test_sample_examples(self) -> None:
+        parser = DictionaryParser(showVariables=True, nExamples=2)
+        for where, expected in (
+            ("first", [0, 1]),
+            ("last", [98, 99]),
+        ):
+            parser.whereExamples = where
+            for collection in (
+                set(range(100)),
+                range(100),
+                deque(range(100)),
+                dict.fromkeys(range(100)).keys(),
+            ):
+                self.assertEqual(expected, parser.sample_examples(collection))
+        parser.whereExamples = "random"
+        for collection in (
+            set(range(100)),
+            range(100),
+            deque(range(100)),
+            [[1], "a", 2, None, (3,)],
+        ):
+            examples = parser.sample_examples(collection)
+            self.assertEqual(2, len(examples))
+            self.assertTrue(all(x in collection for x in examples))
+
+        # deques are not indexed, as indexing their middle elements is O(n)
+        class UnindexedDeque(deque):
+            def __getitem__(self, index):  # type: ignore[no-untyped-def]
+                raise AssertionError("indexed")
+
+        for where in ("random", "first", "last"):
+            parser.whereExamples = where
+            self.assertEqual(2, len(parser.sample_examples(UnindexedDeque(range(100)))))
+        parser.whereExamples = "random"
+        self.assertEqual(
+            [1, 2.5, "a", "b", None],
+            DictionaryParser(nExamples=5).sample_examples(["b", None, 2.5, "a", 1]),
+        )
+        self.assertEqual([1], parser.sample_examples([1]))
+        self.assertEqual([], parser.sample_examples(set()))
+
+        generator = (i for i in range(3))
+        self.assertEqual(f"generator <{generator}>", parser.gtn(generator))
+        self.assertEqual(0, next(generator))
+
+    def test_getStructure_buffers(self) -> None:
+        released = memoryview(b"ab")
+        released.release()
+        d = {
+            "blob": bytes(2**20),
+            "bytearray": bytearray(10),
+            "matrix": memoryview(bytes(24)).cast("B", (4, 6)),
+            "array": array.array("d", range(100)),
+            "released": released,
+            "commented": CommentedValue(b"xyz", "comment"),
+            "blobs": [b"a", b"bb"],
+        }
+        expected = (
+            "\n{\n\tstr : bytes n=1048576\n\tstr : bytearray n=10\n\tstr : memoryview [B] shape=(4, 6) nbytes=24\n"
+            "\tstr : array [d] n=100 nbytes=800\n\tstr : memoryview\n\tstr : CommentedValue [bytes n=3]\n"
+            "\tstr : list [bytes] n=2\n}\n"
+        )
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(expected, self.parser.getStructure(d))
+            self.assertEqual(expected, DictionaryParser(cacheSize=4).getStructure(d))
+            # other iterable values are not walked either, and nothing is printed for them
+            self.assertEqual(
+                "\n{\n\tstr : set\n\tstr : frozenset\n}\n",
+                self.parser.getStructure({"set": {1, 2}, "frozenset": frozenset()}),
+            )
+        self.assertEqual("", out.getvalue())
+
+        parser = DictionaryParser(showVariables=True)
+        self.assertEqual("bytes n=1048576", parser.gtn(d["blob"]))
+        self.assertEqual("array [d] n=100 nbytes=800", parser.gtn(d["array"]))
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "NumPy is not installed")
+    def test_getStructure_numpy(self) -> None:
+        import numpy
+
+        d = {
+            "matrix": numpy.zeros((100, 3)),
+            "vector": numpy.arange(10, dtype=numpy.int32),
+            "bytes": numpy.zeros(8, dtype=numpy.uint8),
+        }
+        expected = (
+            "\n{\n\tstr : ndarray [float64] shape=(100, 3) nbytes=2400\n\tstr : ndarray [int32] n=10 nbytes=40\n"
+            "\tstr : ndarray n=8\n}\n"
+        )
+        self.assertEqual(expected, self.parser.getStructure(d))
+
+    def test_seed(self) -> None:
+        d = {"numbers": list(range(1000)), "letters": set(ascii_lowercase)}
+        state = random.getstate()
+        first = DictionaryParser(showVariables=True)
+        second = DictionaryParser(showVariables=True)
+        expected = first.getStructure(d)
+        first.getStructure(d)
+        self.assertEqual(expected, second.getStructure(d))
+        self.assertNotEqual(
+            expected, DictionaryParser(showVariables=True, seed=1).getStructure(d)
+        )
+        self.assertEqual(state, random.getstate())
+
+    def test_typeCounts(self) -> None:
+        d = {"a": [None] + list(range(9)), "b": [[1], [2, 3]], "c": []}
+        expected = (
+            "\n{\n\tstr : list [NoneType 1 (10%), int 9 (90%)] n=10\n"
+            "\tstr : list [list 2 (100%)] n=2\n\tstr : list [] n=0\n}\n"
+        )
+        parser = DictionaryParser(typeCounts=True)
+        self.assertEqual(expected, parser.getStructure(d))
+        self.assertEqual(
+            {"CommentedValue [int]": 2, "CommentedValue [str]": 1, "float": 1},
+            parser.type_histogram(
+                [
+                    CommentedValue(1, "a"),
+                    0.5,
+                    CommentedValue("b", "c"),
+                    CommentedValue(2, "d"),
+                ]
+            ),
+        )
+        # dictionaries with the same structure but different counts are not taken from the cache
+        d = {"x": {"y": [1, None, None]}, "z": {"y": [1, 2, None]}}
+        structure = DictionaryParser(typeCounts=True, cacheSize=8).getStructure(d)
+        self.assertIn("NoneType 2 (66.6667%), int 1 (33.3333%)", structure)
+        self.assertIn("NoneType 1 (33.3333%), int 2 (66.6667%)", structure)
+        # a share which is not the whole is not rounded up to 100%
+        d = {"a": [None] * 3 + [0] * 1_000_000, "b": [None] + [0] * 10_000_000}
+        structure = DictionaryParser(typeCounts=True).getStructure(d)
+        self.assertIn("[NoneType 3 (0.0003%), int 1000000 (99.9997%)]", structure)
+        self.assertIn("[NoneType 1 (<0.0001%), int 10000000 (99.9999%)]", structure)
+
     def test_getStructure_example(self) -> None:
         self.parser.showExamples = True
         expected = (
@@ -233,6 +387,366 @@ class StructureTestCase(unittest.TestCase):
         )
         self.assertEqual(s, expected)
 
+    def test_iter_structure(self) -> None:
+        chunks = list(self.parser.iter_structure(self.nested_dictionary_3))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            "".join(chunks), self.parser.getStructure(self.nested_dictionary_3)
+        )
+
+    def test_writeStructure(self) -> None:
+        out = io.StringIO()
+        n = self.parser.writeStructure(self.nested_dictionary_3, out)
+        expected = self.parser.getStructure(self.nested_dictionary_3)
+        self.assertEqual(expected, out.getvalue())
+        self.assertEqual(len(expected), n)
+
+    def test_getStructure_emptyList(self) -> None:
+        expected = "\n{\n\tstr : list [] n=0\n}\n"
+        self.assertEqual(expected, self.parser.getStructure({"empty": []}))
+
+    def test_getStructure_deep(self) -> None:
+        depth = 5000
+        d: dict = {"leaf": 1}
+        for _ in range(depth):
+            d = {"nested": d}
+        s = self.parser.getStructure(d)
+        self.assertTrue(s.startswith("\n{\n\tstr : {\n\t\tstr : {\n"))
+        self.assertIn("\n" + "\t" * (depth + 1) + "str : int\n", s)
+        self.assertTrue(s.endswith("\t}\n}\n"))
+        self.assertEqual(s.count("{"), depth + 1)
+
+    def test_getStructure_maxScan(self) -> None:
+        d = {"numbers": list(range(1000)), "few": [1, "a"]}
+        self.parser.maxScan = 10
+        expected = "\n{\n\tstr : list ~[int] n=1000 (sampled 10)\n\tstr : list [int, str] n=2\n}\n"
+        self.assertEqual(expected, self.parser.getStructure(d))
+
+        self.parser.maxScan = 1000
+        expected = "\n{\n\tstr : list [int] n=1000\n\tstr : list [int, str] n=2\n}\n"
+        self.assertEqual(expected, self.parser.getStructure(d))
+
+    def test_getStructure_maxScan_dicts(self) -> None:
+        d = {"records": [{"a": 1}] * 100}
+        self.parser.maxScan = 5
+        expected = (
+            "\n{\n\tstr : list ~[\n\t{\n\t\tstr : int\n\t}\n\t] n=100 (sampled 5)\n}\n"
+        )
+        self.assertEqual(expected, self.parser.getStructure(d))
+
+    def test_getStructure_maxKeysPerMapping(self) -> None:
+        class Unwalkable(list):
+            def __iter__(self) -> Iterator:
+                raise AssertionError("elided values should not be walked")
+
+        d = {f"key{i}": i for i in range(100)}
+        d["last"] = Unwalkable()
+        parser = DictionaryParser(maxKeysPerMapping=2)
+        expected = "\n{\n\tstr : int\n\tstr : int\n\t... 99 more keys (types of the first 64: str->int)\n}\n"
+        self.assertEqual(expected, parser.getStructure(d))
+        parser = DictionaryParser(maxKeysPerMapping=1)
+        expected = (
+            "\n{\n\tstr : list [\n\t{\n\t\tstr : int\n\t\t... 1 more key (types: str->str)\n\t}\n\t] n=2\n"
+            "\t... 1 more key (types: str->int)\n}\n"
+        )
+        self.assertEqual(
+            expected,
+            parser.getStructure({"a": [{"b": 1, "c": "d"}, {}], "e": 1}),
+        )
+        self.assertEqual(
+            self.parser.getStructure(self.nested_dictionary),
+            DictionaryParser(maxKeysPerMapping=2).getStructure(self.nested_dictionary),
+        )
+
+    def test_getStructure_maxDepth(self) -> None:
+        parser = DictionaryParser(maxDepth=2, cacheSize=4)
+        expected = (
+            "\n{\n\tstr : int\n\tstr : {\n\t\tstr : str\n\t\tstr : {\n\t\t\t... 1 more key (types: str->dict)\n"
+            "\t\t}\n\t}\n}\n"
+        )
+        self.assertEqual(expected, parser.getStructure(self.nested_dictionary_3))
+        self.assertEqual(
+            self.parser.getStructure(self.nested_dictionary_3),
+            DictionaryParser(maxDepth=4).getStructure(self.nested_dictionary_3),
+        )
+        with self.assertRaises(ValueError):
+            DictionaryParser(maxDepth=0)
+
+    def test_getStructure_maxOutputChars(self) -> None:
+        d = {f"key{i}": {"a": i, "b": [{"c": i}]} for i in range(1000)}
+        full = self.parser.getStructure(d)
+        parser = DictionaryParser(maxOutputChars=100)
+        s = parser.getStructure(d)
+        self.assertLess(len(s), 250)
+        self.assertTrue(full.startswith(s[: s.index("...")]))
+        self.assertTrue(
+            s.endswith("\t... 998 more keys (types of the first 64: str->dict)\n}\n")
+        )
+        self.assertEqual(
+            s, DictionaryParser(maxOutputChars=100, workers=2).getStructure(d)
+        )
+        self.assertEqual(
+            full, DictionaryParser(maxOutputChars=len(full)).getStructure(d)
+        )
+
+    def test_getStructure_mergeSchemas(self) -> None:
+        records = [
+            {"id": 1, "name": "a"},
+            {"id": 2, "name": None, "tags": ["x"]},
+            {"id": 3, "tags": ["x", "y"], "address": {"city": "x"}},
+        ]
+        self.parser.mergeSchemas = True
+        expected = (
+            "\n{\n\tstr : list [\n\t{\n\t\tstr (3/3) : int\n\t\tstr (2/3) : NoneType | str\n\t\tstr (2/3) : "
+            "list [str] n=1..2\n\t\tstr (1/3) : {\n\t\t\tstr : str\n\t\t}\n\t}\n\t] n=3\n}\n"
+        )
+        self.assertEqual(expected, self.parser.getStructure({"records": records}))
+
+    def test_getStructure_mergeSchemas_shapes(self) -> None:
+        records = [{"id": 1, "tags": [1, 2]}, {"id": "x", "tags": {"a": 1}}, {"id": 2}]
+        self.parser.mergeSchemas = True
+        expected = (
+            "\n{\n\tstr : list [\n\t{\n\t\tstr (3/3) : int | str\n\t\tstr (2/3) : dict | list\n\t\t\t(1/3) : "
+            "list [int] n=2\n\t\t\t(1/3) : {\n\t\t\t\tstr : int\n\t\t\t}\n\t}\n\t] n=3\n}\n"
+        )
+        self.assertEqual(expected, self.parser.getStructure({"records": records}))
+
+    def test_getStructure_mergeSchemas_dedup(self) -> None:
+        records = [{"id": i, "point": {"x": 0.1 * i, "y": 1.0}} for i in range(1000)]
+        self.parser.mergeSchemas = True
+        expected = (
+            "\n{\n\tstr : list [\n\t{\n\t\tstr (1000/1000) : int\n\t\tstr (1000/1000) : {\n\t\t\tstr : float"
+            "\n\t\t\tstr : float\n\t\t}\n\t}\n\t] n=1000\n}\n"
+        )
+        self.assertEqual(expected, self.parser.getStructure({"records": records}))
+
+    def test_fingerprint(self) -> None:
+        self.assertEqual(
+            self.parser.fingerprint({"a": [1, 2], "b": {"c": "d"}}),
+            self.parser.fingerprint({"x": [3], "y": {"z": "w"}}),
+        )
+        self.assertNotEqual(
+            self.parser.fingerprint({"a": [1, 2]}),
+            self.parser.fingerprint({"a": [1, "2"]}),
+        )
+        self.assertNotEqual(
+            self.parser.fingerprint({"a": 1, "b": "c"}),
+            self.parser.fingerprint({"a": "c", "b": 1}),
+        )
+
+    def test_getStructure_cache(self) -> None:
+        d = {
+            f"user{i}": {"name": "x", "address": {"city": "y", "zip": i}}
+            for i in range(10)
+        }
+        d["other"] = {"name": 1}
+        expected = self.parser.getStructure(d)
+        cached_parser = DictionaryParser(cacheSize=8)
+        self.assertEqual(expected, cached_parser.getStructure(d))
+        info = cached_parser.cache_info()
+        self.assertEqual(9, info["hits"])
+        self.assertEqual(3, info["misses"])
+        self.assertEqual(3, info["currsize"])
+
+        # repeated shapes are also found in later calls
+        self.assertEqual(expected, cached_parser.getStructure(d))
+        self.assertEqual(20, cached_parser.cache_info()["hits"])
+
+        cached_parser.cacheSize = 1
+        cached_parser.clear_cache()
+        self.assertEqual(expected, cached_parser.getStructure(d))
+        self.assertEqual(1, cached_parser.cache_info()["currsize"])
+        self.assertEqual(9, cached_parser.cache_info()["hits"])
+
+    def test_getStructure_cache_mergeSchemas(self) -> None:
+        # merged keys are listed in the order they are first seen, so the order of the records matters
+        first = {"x": [{"a": 1}, {"b": "s"}, {"c": 1.0}]}
+        second = {"x": [{"a": 1}, {"c": 1.0}, {"b": "s"}]}
+        cached_parser = DictionaryParser(mergeSchemas=True, cacheSize=10)
+        for d in (first, second):
+            self.assertEqual(
+                DictionaryParser(mergeSchemas=True).getStructure(d),
+                cached_parser.getStructure(d),
+            )
+        self.assertEqual(0, cached_parser.cache_info()["hits"])
+
+        # the cache is not used with maxScan, so it cannot change which elements are sampled
+        d = {f"key{i}": {"values": [1, "x"]} for i in range(10)}
+        cached_parser = DictionaryParser(maxScan=10, cacheSize=10)
+        self.assertEqual(
+            DictionaryParser(maxScan=10).getStructure(d), cached_parser.getStructure(d)
+        )
+        self.assertEqual(0, cached_parser.cache_info()["currsize"])
+
+    def test_getStructure_ordered_reset(self) -> None:
+        self.parser.getStructure(OrderedDict(a=1))
+        expected = "\n{\n\tstr : int\n}\n"
+        self.assertEqual(expected, self.parser.getStructure(dict(a=1)))
+
+    def test_getSchema(self) -> None:
+        schema = self.parser.getSchema(
+            OrderedDict(a=1, b=[{"c": "d"}, {"c": "e"}], f={"g": 1.0})
+        )
+        self.assertEqual(["OrderedDict"], schema.notes)
+        self.assertEqual(MAPPING, schema.kind)
+        self.assertEqual(["str"] * 3, [node.key for node in schema.children])
+        self.assertEqual([1, 2, 3], [node.index for node in schema.children])
+        value, sequence, mapping = schema.children
+        self.assertEqual((VALUE, "int"), (value.kind, value.type_name))
+        self.assertEqual(
+            (SEQUENCE, 2, ["dict"]), (sequence.kind, sequence.length, sequence.types)
+        )
+        self.assertEqual("str", sequence.children[0].children[0].type_name)
+        self.assertEqual(
+            (MAPPING, "float"), (mapping.kind, mapping.children[0].type_name)
+        )
+
+        # the tree is rendered without analysing the dictionary again
+        renderer = TextRenderer()
+        expected = self.parser.getStructure(
+            OrderedDict(a=1, b=[{"c": "d"}, {"c": "e"}], f={"g": 1.0})
+        )
+        self.assertEqual(expected, renderer.render(schema))
+        self.assertEqual(expected, renderer.render(schema))
+        self.assertEqual(schema, pickle.loads(pickle.dumps(schema)))
+
+    def test_renderer(self) -> None:
+        class KeyCounter(SchemaRenderer):
+            def iter_render(self, node: SchemaNode, depth: int = 0) -> Iterator[str]:
+                stack = [node]
+                n = 0
+                while stack:
+                    node = stack.pop()
+                    n += node.kind == VALUE
+                    stack.extend(node.children)
+                yield str(n)
+
+        parser = DictionaryParser(renderer=KeyCounter())
+        self.assertEqual(
+            "3", parser.getStructure({"a": 1, "b": {"c": 2, "d": [{"e": 3}]}})
+        )
+        out = io.StringIO()
+        self.assertEqual(1, parser.writeStructure({"a": 1}, out))
+        self.assertEqual("1", out.getvalue())
+
+    def test_getStructure_workers(self) -> None:
+        d = OrderedDict(
+            (f"key{i}", {"a": [{"b": i}] * (i % 3), "c": str(i)} if i % 2 else i)
+            for i in range(50)
+        )
+        d["commented"] = CommentedValue({"d": 1.0}, "comment")
+        parser = DictionaryParser(workers=2)
+        self.assertEqual(self.parser.getStructure(d), parser.getStructure(d))
+        self.assertEqual(
+            self.parser.getStructure(self.dictionary_with_list),
+            parser.getStructure(self.dictionary_with_list),
+        )
+
+        # with a cache the dictionary is analysed in this process, so the cache is shared across calls
+        d = {f"key{i}": {"a": {"b": i}} for i in range(20)}
+        parser = DictionaryParser(workers=2, cacheSize=8)
+        self.assertEqual(self.parser.getStructure(d), parser.getStructure(d))
+        parser.getStructure(d)
+        self.assertEqual(
+            {"hits": 39, "misses": 2, "maxsize": 8, "currsize": 2}, parser.cache_info()
+        )
+
+    def test_flatten(self) -> None:
+        schema = self.parser.getSchema({"a": 1, "b": [{"c": {"d": "e"}}], "f": {}})
+        rows = flatten([schema, schema.children[1]])
+        self.assertEqual([schema, schema.children[1]], unflatten(rows))
+
+    def test_incremental(self) -> None:
+        d = {
+            f"key{i}": {"a": [{"b": i}] * (i % 3), "c": str(i)} if i % 2 else i
+            for i in range(50)
+        }
+        d["commented"] = CommentedValue({"d": 1.0}, "comment")
+        expected = self.parser.getSchema(d)
+        analysis = self.parser.incremental(d)
+        self.assertFalse(analysis.done)
+        steps = 0
+        while not analysis.done:
+            analysis.run(maxNodes=7)
+            steps += 1
+        self.assertGreater(steps, 1)
+        self.assertEqual(expected, analysis.schema)
+        self.assertEqual(self.parser.getStructure(d), analysis.getStructure())
+        self.assertIs(analysis.schema, analysis.run())
+
+    def test_incremental_partial(self) -> None:
+        d = {f"key{i}": {"a": i} for i in range(10)}
+        analysis = self.parser.incremental(d)
+        schema = analysis.run(maxNodes=3)
+        self.assertFalse(analysis.done)
+        self.assertEqual(3, analysis.nodes)
+        self.assertEqual(2, len(schema.children))
+        self.assertIn("Truncated after 3 items", analysis.getStructure())
+        analysis.run(timeout=0)
+        self.assertFalse(analysis.done)
+        analysis.run()
+        self.assertTrue(analysis.done)
+        self.assertEqual(self.parser.getStructure(d), analysis.getStructure())
+
+    def test_incremental_async(self) -> None:
+        d = OrderedDict((f"key{i}", [{"a": i}, str(i)]) for i in range(100))
+        analysis = self.parser.incremental(d)
+        schema = asyncio.run(analysis.run_async(chunkNodes=10))
+        self.assertTrue(analysis.done)
+        self.assertEqual(self.parser.getSchema(d), schema)
+
+    def test_observer(self) -> None:
+        class Recorder(ParserObserver):
+            def __init__(self) -> None:
+                self.events: list = []
+
+            def enter(self, path: tuple, kind: str, count: int) -> None:
+                self.events.append(("enter", path, kind, count))
+
+            def exit(
+                self, path: tuple, kind: str, count: int, elapsed: float, size: int
+            ) -> None:
+                self.events.append(("exit", path, elapsed >= 0, size))
+
+        recorder = Recorder()
+        d = {"a": 1, CommentedKey("b", "c"): [{"c": {"d": 2}}], "e": [1, 2]}
+        parser = DictionaryParser(observer=recorder)
+        schema = parser.getSchema(d)
+        self.assertEqual(self.parser.getStructure(d), parser.renderer.render(schema))
+        renderer = TextRenderer()
+        b, e = schema.children[1], schema.children[2]
+        self.assertEqual(
+            [
+                ("enter", (), MAPPING, 3),
+                ("enter", ("b",), SEQUENCE, 1),
+                ("enter", ("b", ELEMENTS, "c"), MAPPING, 1),
+                (
+                    "exit",
+                    ("b", ELEMENTS, "c"),
+                    True,
+                    len(renderer.render(b.children[0].children[0], 2)),
+                ),
+                ("exit", ("b",), True, len(renderer.render(b, 1))),
+                ("enter", ("e",), SEQUENCE, 2),
+                ("exit", ("e",), True, len(renderer.render(e, 1))),
+                ("exit", (), True, len(renderer.render(schema))),
+            ],
+            recorder.events,
+        )
+
+        profile = ProfileObserver()
+        parser = DictionaryParser(observer=profile, cacheSize=4)
+        parser.getStructure({"a": [{"b": {"c": 1}}] * 3, "d": {"b": {"c": 1}}})
+        self.assertEqual(
+            [("a", ELEMENTS, "b"), ("a",), ("d", "b"), ("d",), ()],
+            list(profile.stats),
+        )
+        self.assertEqual(3, profile.stats[("a",)].count)
+        top = profile.top(1, by="total")
+        self.assertEqual([()], [stats.path for stats in top])
+        self.assertIn("a/[]/b", profile.summary())
+        self.assertRaises(ValueError, profile.top, by="calls")
+
 
 if __name__ == "__main__":
     unittest.main()
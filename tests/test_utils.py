@@ -1,6 +1,13 @@
 import unittest
 
-from dict_tools.utils import extract_nested_dict, order_keys
+from dict_tools.utils import (
+    KeyIndex,
+    compile_path,
+    extract_many,
+    extract_nested_dict,
+    iter_extract_many,
+    order_keys,
+)
 
 
 class UtilsTestCse(unittest.TestCase):
@@ -19,9 +26,59 @@ class UtilsTestCse(unittest.TestCase):
         keys_2 = [(1, 2), 0.51]
         self.assertEqual(extract_nested_dict(self.dictionary, keys=keys_2), "value")
 
+    def test_compile_path(self) -> None:
+        getter = compile_path("a/b")
+        self.assertEqual("c", getter(self.dictionary))
+        self.assertIs(getter, compile_path("a/b"))
+        self.assertEqual(4, compile_path([1, 2, 3, "key"])(self.dictionary))
+        self.assertEqual("c", compile_path("a.b", path_sep=".")(self.dictionary))
+        with self.assertRaisesRegex(KeyError, "a/x"):
+            compile_path("a/x")(self.dictionary)
+
+    def test_extract_many(self) -> None:
+        paths = ["a/b", [1, 2, 3, "key"], "a", ((1, 2), 0.51), [1, 2]]
+        expected = {
+            "a/b": "c",
+            (1, 2, 3, "key"): 4,
+            "a": {"b": "c"},
+            ((1, 2), 0.51): "value",
+            (1, 2): {3: {"key": 4}},
+        }
+        result = extract_many(self.dictionary, paths)
+        self.assertEqual(expected, result)
+        self.assertEqual(list(expected), list(result))
+        self.assertEqual(expected, dict(iter_extract_many(self.dictionary, paths)))
+
+        self.assertEqual(
+            {"a/x": None, "x/y": None, "a/b": "c"},
+            extract_many(self.dictionary, ["a/x", "x/y", "a/b"], default=None),
+        )
+        with self.assertRaisesRegex(KeyError, "x/y"):
+            extract_many(self.dictionary, ["a/b", "x/y"])
+
     def test_order_keys(self) -> None:
         test_data = [2, 3, 1, "key"]
         expected_output = [1, 2, 3, "key"]
         self.assertListEqual(order_keys(self.dictionary, test_data), expected_output)
 
         self.assertRaises(KeyError, order_keys, self.dictionary, [3, 1, "key"])
+
+    def test_order_keys_none_value(self) -> None:
+        data = {"a": {"b": None}, "c": 1}
+        self.assertListEqual(order_keys(data, ["b", "a"]), ["a", "b"])
+        self.assertListEqual(
+            order_keys(data, ["b", "a"], index=KeyIndex(data)), ["a", "b"]
+        )
+
+    def test_order_keys_index(self) -> None:
+        index = KeyIndex(self.dictionary)
+        self.assertListEqual(
+            order_keys(self.dictionary, [2, 3, 1, "key"], index=index), [1, 2, 3, "key"]
+        )
+        self.assertListEqual(
+            order_keys(self.dictionary, [0.51, (1, 2)], index=index), [(1, 2), 0.51]
+        )
+        self.assertRaises(
+            KeyError, order_keys, self.dictionary, [3, 1, "key"], index=index
+        )
+        self.assertRaises(KeyError, order_keys, self.dictionary, ["b", 1], index=index)